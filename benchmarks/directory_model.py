@@ -0,0 +1,77 @@
+"""
+DirectoryModel prediction benchmark for a directory of LightGBM models.
+
+Compares sequential prediction (one model at a time using all cores) against concurrent prediction
+(--num-cores models at the same time, each with cores / num-cores threads).
+Models are trained on random data and saved to a temporary directory.
+
+Usage: python benchmarks/directory_model.py --models 10 --rows 200000 --features 300 --num-cores 4
+"""
+import os
+import time
+import json
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from rich import print as rich_print
+
+from numerblox.model import LGBMModel
+from numerblox.numerframe import NumerFrame
+
+
+def create_dataf(rows: int, features: int, seed: int = 0) -> NumerFrame:
+    """ Random int8 features in [0, 4] and a target. """
+    rng = np.random.default_rng(seed)
+    dataf = pd.DataFrame(rng.integers(0, 5, size=(rows, features), dtype=np.int8),
+                         columns=[f"feature_{i}" for i in range(features)])
+    dataf["target"] = rng.uniform(0, 1, rows).astype(np.float32)
+    dataf["era"] = np.repeat(np.arange(rows // 1000 + 1), 1000)[:rows]
+    return NumerFrame(dataf)
+
+
+def save_models(dataf: NumerFrame, directory: str, models: int, trees: int):
+    train = dataf.iloc[:min(len(dataf), 20000)]
+    for seed in range(models):
+        params = {"seed": seed, "num_leaves": 32, "bagging_fraction": 0.5, "bagging_freq": 1, "verbose": -1}
+        lgb.train(params, lgb.Dataset(train[train.feature_cols], train["target"]),
+                  num_boost_round=trees).save_model(f"{directory}/model_{seed}.lgb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--features", type=int, default=300)
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--num-cores", type=int, default=os.cpu_count())
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    dataf = create_dataf(args.rows, args.features)
+    stats = {}
+    with tempfile.TemporaryDirectory() as model_dir:
+        save_models(dataf, model_dir, args.models, args.trees)
+        runs = {"sequential": dict(num_cores=1, model_threads=os.cpu_count()),
+                "concurrent": dict(num_cores=args.num_cores, max_loaded_models=args.num_cores)}
+        predictions = {}
+        for name, kwargs in runs.items():
+            model = LGBMModel(model_dir, model_name=name, **kwargs)
+            tic = time.perf_counter()
+            predictions[name] = model.predict(dataf.copy())[f"prediction_{name}"].values
+            stats[f"{name}_seconds"] = time.perf_counter() - tic
+    stats["speedup"] = stats["sequential_seconds"] / stats["concurrent_seconds"]
+    stats["max_abs_diff"] = float(np.abs(predictions["sequential"] - predictions["concurrent"]).max())
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"LGBMModel with [bold]{args.models}[/bold] models of {args.trees} trees on "
+               f"[bold]{args.rows}[/bold] rows x [bold]{args.features}[/bold] features "
+               f"({args.num_cores} concurrent models):")
+    for name, value in stats.items():
+        rich_print(f"  {name:<20} [blue]{value:.6g}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
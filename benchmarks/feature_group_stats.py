@@ -0,0 +1,70 @@
+"""
+FeatureGroupStatsPreProcessor benchmark.
+
+Compares the single pass group statistics over the compact int8 feature block against separate pandas
+mean, std and skew reductions for every group (as in GroupStatsPreProcessor).
+Data has random integer features in [0, 4] divided over --groups equally sized feature groups.
+
+Usage: python benchmarks/feature_group_stats.py --rows 2000000 --features 1050 --groups 8
+"""
+import time
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from rich import print as rich_print
+
+from numerblox.numerframe import NumerFrame
+from numerblox.preprocessing import FeatureGroupStatsPreProcessor
+
+
+def pandas_group_stats(dataf: pd.DataFrame, feature_groups: dict) -> pd.DataFrame:
+    """ Separate pandas reductions for every group. """
+    for group, cols in feature_groups.items():
+        dataf[f"feature_{group}_mean"] = dataf[cols].mean(axis=1)
+        dataf[f"feature_{group}_std"] = dataf[cols].std(axis=1)
+        dataf[f"feature_{group}_skew"] = dataf[cols].skew(axis=1)
+    return dataf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--features", type=int, default=1050)
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--quantiles", type=float, nargs="*", default=[])
+    parser.add_argument("--skip-pandas", action="store_true", help="Only time FeatureGroupStatsPreProcessor.")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    feature_names = [f"feature_{i}" for i in range(args.features)]
+    dataf = pd.DataFrame(rng.integers(0, 5, size=(args.rows, args.features), dtype=np.int8), columns=feature_names)
+    dataf["era"] = np.repeat(np.arange(args.rows // 5000 + 1), 5000)[:args.rows]
+    feature_groups = {f"group{i}": list(names) for i, names in enumerate(np.array_split(feature_names, args.groups))}
+    dataf = NumerFrame(dataf).compact_features(dtype=np.int8)
+
+    stats = {}
+    processor = FeatureGroupStatsPreProcessor(feature_groups, quantiles=args.quantiles)
+    result = dataf.copy()
+    tic = time.perf_counter()
+    result = processor.transform(result)
+    stats["single_pass_seconds"] = time.perf_counter() - tic
+    if not args.skip_pandas:
+        tic = time.perf_counter()
+        expected = pandas_group_stats(pd.DataFrame(dataf), feature_groups)
+        stats["pandas_seconds"] = time.perf_counter() - tic
+        stats["speedup"] = stats["pandas_seconds"] / stats["single_pass_seconds"]
+        cols = [f"feature_{group}_{stat}" for group in feature_groups for stat in ["mean", "std", "skew"]]
+        stats["max_abs_diff"] = float(np.nanmax(np.abs(result[cols].values - expected[cols].values)))
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"Group statistics for [bold]{args.rows}[/bold] rows x [bold]{args.features}[/bold] int8 features "
+               f"in {args.groups} groups:")
+    for name, value in stats.items():
+        rich_print(f"  {name:<20} [blue]{value:.6g}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Import-time benchmark for numerblox.
+
+Measures cold-start wall time and peak RSS of importing numerblox modules in a fresh interpreter
+and reports which heavy optional backends were loaded as a side effect.
+Exits with a non-zero status when a threshold is exceeded, so it can be used as a regression guard.
+
+Usage: python benchmarks/import_time.py --max-seconds 5 --max-rss-mb 500
+"""
+import re
+import sys
+import json
+import argparse
+import subprocess
+from rich import print as rich_print
+
+MODULES = ["numerblox.numerframe", "numerblox.preprocessing", "numerblox.model",
+           "numerblox.postprocessing", "numerblox.model_pipeline", "numerblox.evaluation",
+           "numerblox.download", "numerblox.submission", "numerblox.staking"]
+HEAVY_BACKENDS = ["tensorflow", "pandas_profiling", "sdv", "catboost", "lightgbm",
+                  "wandb", "numerbay", "google.cloud.storage", "matplotlib"]
+
+CHILD_SCRIPT = """
+import sys, json, time, resource
+tic = time.perf_counter()
+for module in {modules}:
+    __import__(module)
+seconds = time.perf_counter() - tic
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+loaded = [backend for backend in {backends} if backend in sys.modules]
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_mb, "loaded_backends": loaded}}))
+"""
+
+
+def measure_import(modules: list, backends: list = HEAVY_BACKENDS) -> dict:
+    """
+    Import modules in a fresh interpreter with '-X importtime' enabled.
+    :param modules: Module names to import.
+    :param backends: Module names of heavy backends that should not be loaded.
+    :return: Wall time, peak RSS, loaded backends and slowest imports (cumulative microseconds).
+    """
+    script = CHILD_SCRIPT.format(modules=modules, backends=backends)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                            capture_output=True, text=True, check=True)
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["slowest_imports"] = _parse_importtime(result.stderr)[:10]
+    return stats
+
+
+def _parse_importtime(stderr: str) -> list:
+    """ Top level imports sorted by cumulative import time in microseconds. """
+    pattern = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+    imports = []
+    for line in stderr.splitlines():
+        match = pattern.match(line)
+        if match and len(match.group(3)) <= 1:
+            imports.append((match.group(4), int(match.group(2))))
+    return sorted(imports, key=lambda x: x[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    stats = measure_import(args.modules)
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        rich_print(f"Imported [bold]{len(args.modules)}[/bold] modules in [blue]{stats['seconds']:.3f}s[/blue]. Peak RSS: [blue]{stats['rss_mb']:.1f} MB[/blue].")
+        rich_print(f"Heavy backends loaded at import time: {stats['loaded_backends']}")
+        for name, microseconds in stats["slowest_imports"]:
+            rich_print(f"  {name:<30} {microseconds / 1e6:.3f}s")
+
+    failed = bool(stats["loaded_backends"])
+    if args.max_seconds is not None and stats["seconds"] > args.max_seconds:
+        failed = True
+    if args.max_rss_mb is not None and stats["rss_mb"] > args.max_rss_mb:
+        failed = True
+    sys.exit(int(failed))
+
+
+if __name__ == "__main__":
+    main()
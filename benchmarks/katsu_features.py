@@ -0,0 +1,106 @@
+"""
+KatsuFeatureGenerator benchmark.
+
+Compares the vectorized feature engine against the previous approach of creating a DataFrame per ticker
+and computing features with pandas in a multiprocessing Pool.
+Also times an incremental update of the last --update-days days against a full recompute.
+Data is a random walk of daily close prices for every ticker. Use --skip-legacy for large universes.
+
+Usage: python benchmarks/katsu_features.py --tickers 1000 --days 2500 --windows 20 40 60
+"""
+import os
+import time
+import json
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from functools import partial
+from multiprocessing.pool import Pool
+from rich import print as rich_print
+
+from numerblox.preprocessing import KatsuFeatureGenerator
+
+
+def legacy_feature_engineering(dataf: pd.DataFrame, windows: list) -> pd.DataFrame:
+    """ Per ticker pandas feature engineering as it was done in every Pool worker. """
+    warnings.filterwarnings("ignore")
+    close = dataf["close"]
+    for x in windows:
+        dataf[f"feature_close_ROCP_{x}"] = close.pct_change(x)
+        dataf[f"feature_close_VOL_{x}"] = np.log1p(close).pct_change().rolling(x).std()
+        dataf[f"feature_close_MA_gap_{x}"] = close / close.rolling(x).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(com=13, min_periods=14).mean()
+    loss = delta.clip(upper=0).abs().ewm(com=13, min_periods=14).mean()
+    dataf["feature_RSI"] = 100 - (100 / (1 + gain / loss))
+    exp1, exp2 = close.ewm(alpha=2 / 13).mean(), close.ewm(alpha=2 / 27).mean()
+    dataf["feature_MACD"] = 100 * (exp1 - exp2) / exp2
+    dataf["feature_MACD_signal"] = dataf["feature_MACD"].ewm(alpha=2 / 10).mean()
+    return dataf.bfill()
+
+
+def legacy_transform(dataf: pd.DataFrame, windows: list, num_cores: int) -> pd.DataFrame:
+    dataf_list = [x for _, x in dataf.groupby("ticker")]
+    with Pool(num_cores) as p:
+        return pd.concat(p.map(partial(legacy_feature_engineering, windows=windows), dataf_list))
+
+
+def create_dataf(tickers: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """ Random walk close prices for every ticker on business days. """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2000-01-03", periods=days)
+    returns = rng.normal(0, 0.02, size=(tickers, days))
+    return pd.DataFrame({"ticker": np.repeat([f"TICKER_{i}" for i in range(tickers)], days),
+                         "date": np.tile(dates, tickers),
+                         "friday_date": np.tile(dates, tickers),
+                         "close": (50 * np.exp(np.cumsum(returns, axis=1))).ravel()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=2500)
+    parser.add_argument("--windows", type=int, nargs="+", default=[20, 40, 60])
+    parser.add_argument("--update-days", type=int, default=5)
+    parser.add_argument("--num-cores", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the vectorized engine.")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    dataf = create_dataf(args.tickers, args.days)
+    generator = KatsuFeatureGenerator(windows=args.windows)
+    stats = {}
+    tic = time.perf_counter()
+    features = generator.feature_engineering(dataf)
+    stats["vectorized_seconds"] = time.perf_counter() - tic
+
+    dates = dataf["date"].unique()
+    history = dataf[dataf["date"] < dates[-args.update_days]]
+    new_dates = dataf[dataf["date"] >= dates[-args.update_days]]
+    generator.feature_engineering(history)
+    tic = time.perf_counter()
+    updated = generator.feature_engineering(new_dates, state=generator.state)
+    stats["update_seconds"] = time.perf_counter() - tic
+    feature_cols = [col for col in updated.columns if col.startswith("feature")]
+    stats["update_max_abs_diff"] = float(np.nanmax(np.abs(updated[feature_cols].values -
+                                                           features.loc[updated.index, feature_cols].values)))
+    if not args.skip_legacy:
+        tic = time.perf_counter()
+        legacy = legacy_transform(dataf, args.windows, args.num_cores)
+        stats["legacy_pool_seconds"] = time.perf_counter() - tic
+        stats["speedup"] = stats["legacy_pool_seconds"] / stats["vectorized_seconds"]
+        feature_cols = [col for col in legacy.columns if col.startswith("feature")]
+        stats["max_abs_diff"] = float(np.nanmax(np.abs(features.loc[legacy.index, feature_cols].values -
+                                                        legacy[feature_cols].values)))
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"Katsu features for [bold]{args.tickers}[/bold] tickers x [bold]{args.days}[/bold] days "
+               f"with windows {args.windows}:")
+    for name, value in stats.items():
+        rich_print(f"  {name:<22} [blue]{value:.6g}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
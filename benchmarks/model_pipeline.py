@@ -0,0 +1,83 @@
+"""
+ModelPipeline benchmark for shared feature matrix conversion.
+
+Runs a pipeline of --models LGBMModels on v4 shaped synthetic data (int8 features in [0, 4]) with and without
+share_features. Without sharing every model converts the feature DataFrame itself.
+Every model directory holds one LightGBM model trained on random data.
+
+Usage: python benchmarks/model_pipeline.py --models 10 --rows 200000 --features 1050
+"""
+import time
+import json
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from pathlib import Path
+from rich import print as rich_print
+
+from numerblox.model import LGBMModel
+from numerblox.numerframe import NumerFrame
+from numerblox.model_pipeline import ModelPipeline
+
+
+def create_dataf(rows: int, features: int, rows_per_era: int = 5000, seed: int = 0) -> NumerFrame:
+    """ v4 shaped data: int8 features, float target and eras. """
+    rng = np.random.default_rng(seed)
+    dataf = pd.DataFrame(rng.integers(0, 5, size=(rows, features), dtype=np.int8),
+                         columns=[f"feature_{i}" for i in range(features)])
+    dataf["target"] = (rng.integers(0, 5, rows) / 4).astype(np.float32)
+    dataf["era"] = (np.arange(rows) // rows_per_era).astype(str)
+    return NumerFrame(dataf)
+
+
+def save_models(dataf: NumerFrame, directory: Path, models: int, trees: int) -> list:
+    """ One directory with one model per LGBMModel. """
+    train = dataf.iloc[:min(len(dataf), 20000)]
+    paths = []
+    for seed in range(models):
+        path = directory / f"model_{seed}"
+        path.mkdir()
+        params = {"seed": seed, "num_leaves": 32, "colsample_bytree": 0.1, "verbose": -1}
+        lgb.train(params, lgb.Dataset(train[train.feature_cols], train["target"]),
+                  num_boost_round=trees).save_model(str(path / "model.lgb"))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--features", type=int, default=1050)
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    dataf = create_dataf(args.rows, args.features)
+    stats, predictions = {}, {}
+    with tempfile.TemporaryDirectory() as model_dir:
+        paths = save_models(dataf, Path(model_dir), args.models, args.trees)
+        for share_features in [False, True]:
+            name = "shared" if share_features else "per_model"
+            models = [LGBMModel(str(path), model_name=f"lgb_{i}") for i, path in enumerate(paths)]
+            pipeline = ModelPipeline(models=models, pipeline_name=name, copy_first=False, standardize=False,
+                                     share_features=share_features)
+            tic = time.perf_counter()
+            result = pipeline.process_models(NumerFrame(dataf.copy()))
+            stats[f"{name}_seconds"] = time.perf_counter() - tic
+            predictions[name] = result[[f"prediction_lgb_{i}" for i in range(args.models)]].values
+    stats["speedup"] = stats["per_model_seconds"] / stats["shared_seconds"]
+    stats["max_abs_diff"] = float(np.abs(predictions["per_model"] - predictions["shared"]).max())
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"ModelPipeline with [bold]{args.models}[/bold] LGBMModels of {args.trees} trees on "
+               f"[bold]{args.rows}[/bold] rows x [bold]{args.features}[/bold] features:")
+    for name, value in stats.items():
+        rich_print(f"  {name:<20} [blue]{value:.6g}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+NumerFrame construction benchmark.
+
+Compares the time to wrap a wide DataFrame in a NumerFrame, derive new NumerFrames from it
+and add a column against the previous approach of recomputing all column groups with list scans.
+Defaults to a 2M x 1200 uint8 feature matrix (~2.4 GB). Use --rows to benchmark on smaller machines.
+
+Usage: python benchmarks/numerframe_construction.py --rows 2000000 --features 1200
+"""
+import time
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from rich import print as rich_print
+
+from numerblox.numerframe import NumerFrame
+
+
+def legacy_column_groups(columns: pd.Index) -> dict:
+    """ Column group classification as it was done on every NumerFrame initialization. """
+    feature_cols = [col for col in columns if str(col).startswith("feature")]
+    target_cols = [col for col in columns if str(col).startswith("target")]
+    prediction_cols = [col for col in columns if str(col).startswith("prediction")]
+    not_aux_cols = feature_cols + target_cols + prediction_cols
+    aux_cols = [col for col in columns if col not in not_aux_cols]
+    return {"feature_cols": feature_cols, "target_cols": target_cols, "prediction_cols": prediction_cols,
+            "not_aux_cols": not_aux_cols, "aux_cols": aux_cols}
+
+
+def timeit(func, repeats: int) -> float:
+    """ Best wall time in seconds over repeats. """
+    timings = []
+    for _ in range(repeats):
+        tic = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - tic)
+    return min(timings)
+
+
+def create_dataf(rows: int, features: int, targets: int) -> pd.DataFrame:
+    """ Wide DataFrame with a single uint8 feature block, float32 targets and aux columns. """
+    dataf = pd.DataFrame(np.zeros((rows, features), dtype=np.uint8),
+                         columns=[f"feature_{i}" for i in range(features)])
+    for i in range(targets):
+        dataf[f"target_{i}"] = np.zeros(rows, dtype=np.float32)
+    dataf["era"] = np.repeat(np.arange(rows // 5000 + 1), 5000)[:rows]
+    dataf["data_type"] = "train"
+    return dataf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--features", type=int, default=1200)
+    parser.add_argument("--targets", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    dataf = create_dataf(args.rows, args.features, args.targets)
+    dataf = NumerFrame(dataf)
+    feature_cols = dataf.feature_cols
+    stats = {
+        "legacy_classification": timeit(lambda: legacy_column_groups(dataf.columns), args.repeats),
+        "construct_from_dataframe": timeit(lambda: NumerFrame(pd.DataFrame(dataf, copy=False)).feature_cols,
+                                           args.repeats),
+        "construct_from_numerframe": timeit(lambda: NumerFrame(dataf).feature_cols, args.repeats),
+        "derived_row_selection": timeit(lambda: dataf.iloc[:1000].feature_cols, args.repeats),
+        "derived_column_drop": timeit(lambda: dataf.drop(columns=feature_cols[:10]).feature_cols, args.repeats),
+    }
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"NumerFrame with [bold]{args.rows}[/bold] rows and [bold]{len(dataf.columns)}[/bold] columns "
+               f"(best of {args.repeats}):")
+    for name, seconds in stats.items():
+        rich_print(f"  {name:<28} [blue]{seconds * 1000:.3f} ms[/blue]")
+
+
+if __name__ == "__main__":
+    main()
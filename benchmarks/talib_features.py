@@ -0,0 +1,84 @@
+"""
+TalibFeatureGenerator throughput benchmark (tickers/second). Requires TA-Lib.
+
+Compares the single pass generator (serial and with a process pool over shared memory) against the previous approach
+of a groupby over all tickers for every indicator, which extracts the HLOCV arrays again for every indicator.
+Data is a random walk of daily prices for every ticker.
+
+Usage: python benchmarks/talib_features.py --tickers 500 --days 1000 --windows 10 20 --num-cores 8
+"""
+import os
+import time
+import json
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from rich import print as rich_print
+
+from numerblox.preprocessing import TalibFeatureGenerator
+
+
+def legacy_features(generator: TalibFeatureGenerator, dataf: pd.DataFrame) -> pd.DataFrame:
+    """ One groupby over all tickers per indicator as in get_no_window_features and get_window_features. """
+    hlocv_cols = generator.hlocv_cols
+    groups = dataf.groupby(generator.ticker_col)
+    calls = [(f"feature_{func}", lambda inputs, func=func: generator._no_window(inputs, func))
+             for func in generator.no_window_features]
+    calls += [(f"feature_{func}_{win}", lambda inputs, func=func, win=win: generator._window(inputs, func, win))
+              for win in generator.windows for func in generator.window_features]
+    for name, call in calls:
+        dataf[name] = groups.apply(
+            lambda x: pd.Series(call({col: x[col].values.astype(np.float64) for col in hlocv_cols}),
+                                index=x.index).bfill()
+        ).reset_index(level=0, drop=True).astype(np.float32)
+    return dataf
+
+
+def create_dataf(tickers: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """ Random walk HLOCV data for every ticker. """
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(tickers, days)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low = close * (1 - rng.uniform(0, 0.02, close.shape))
+    return pd.DataFrame({"bloomberg_ticker": np.repeat([f"TICKER_{i}" for i in range(tickers)], days),
+                         "friday_date": np.tile(np.arange(days), tickers),
+                         "open": ((high + low) / 2).ravel(), "high": high.ravel(), "low": low.ravel(),
+                         "close": close.ravel(),
+                         "volume": rng.integers(1000, 100000, close.size).astype(np.float64)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--num-cores", type=int, default=os.cpu_count())
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the single pass generator.")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    dataf = create_dataf(args.tickers, args.days)
+    runs = {"single_pass_serial": 1, "single_pass_pool": args.num_cores}
+    stats = {}
+    for name, num_cores in runs.items():
+        generator = TalibFeatureGenerator(windows=args.windows, num_cores=num_cores)
+        tic = time.perf_counter()
+        generator.get_all_features(dataf.copy())
+        stats[f"{name}_tickers_per_second"] = args.tickers / (time.perf_counter() - tic)
+    if not args.skip_legacy:
+        tic = time.perf_counter()
+        legacy_features(TalibFeatureGenerator(windows=args.windows), dataf.copy())
+        stats["legacy_groupby_tickers_per_second"] = args.tickers / (time.perf_counter() - tic)
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"TA-Lib features for [bold]{args.tickers}[/bold] tickers x [bold]{args.days}[/bold] days "
+               f"with windows {args.windows} ({args.num_cores} processes for pool):")
+    for name, value in stats.items():
+        rich_print(f"  {name:<38} [blue]{value:.1f} tickers/s[/blue]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+TreeEnsemble latency benchmark on live sized data.
+
+Compares predicting with every model through its library (LightGBM Booster.predict or CatBoost.predict)
+against evaluating all models at once as a TreeEnsemble. Models are trained on random int8 data with values 0...4.
+Reports median latency over --repeats calls and the maximum absolute difference in predictions.
+TreeEnsemble is single threaded while the libraries use all CPU cores, so results depend on the core count (reported).
+
+Usage: python benchmarks/tree_ensemble.py --library lightgbm --models 10 --trees 300 --rows 5000 --features 1050
+"""
+import os
+import time
+import json
+import argparse
+import numpy as np
+from rich import print as rich_print
+
+from numerblox.model import TreeEnsemble
+
+
+def train_models(library: str, X: np.ndarray, y: np.ndarray, models: int, trees: int, leaves: int) -> list:
+    trained = []
+    for seed in range(models):
+        if library == "lightgbm":
+            import lightgbm as lgb
+            params = {"seed": seed, "num_leaves": leaves, "colsample_bytree": 0.1, "verbose": -1}
+            trained.append(lgb.train(params, lgb.Dataset(X, y), num_boost_round=trees))
+        else:
+            from catboost import CatBoostRegressor
+            depth = int(np.log2(leaves))
+            trained.append(CatBoostRegressor(iterations=trees, depth=depth, rsm=0.1, random_seed=seed,
+                                             verbose=0).fit(X, y))
+    return trained
+
+
+def median_seconds(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        tic = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - tic)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--library", choices=["lightgbm", "catboost"], default="lightgbm")
+    parser.add_argument("--models", type=int, default=10)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--leaves", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--train-rows", type=int, default=10000)
+    parser.add_argument("--features", type=int, default=1050)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Output raw JSON.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train = rng.integers(0, 5, size=(args.train_rows, args.features)).astype(np.float32)
+    y_train = X_train[:, :10].mean(axis=1) / 4 + rng.normal(0, 0.1, args.train_rows)
+    live = rng.integers(0, 5, size=(args.rows, args.features)).astype(np.int8)
+    models = train_models(args.library, X_train, y_train, args.models, args.trees, args.leaves)
+
+    stats = {"cpu_count": os.cpu_count()}
+    tic = time.perf_counter()
+    from_model = TreeEnsemble.from_lightgbm if args.library == "lightgbm" else TreeEnsemble.from_catboost
+    tree_ensemble = TreeEnsemble.combine([from_model(model) for model in models])
+    stats["export_seconds"] = time.perf_counter() - tic
+    library_predict = lambda: np.array([model.predict(live.astype(np.float32)) for model in models]).T
+    stats["library_ms"] = 1000 * median_seconds(library_predict, args.repeats)
+    stats["tree_ensemble_ms"] = 1000 * median_seconds(lambda: tree_ensemble.predict(live), args.repeats)
+    stats["speedup"] = stats["library_ms"] / stats["tree_ensemble_ms"]
+    stats["max_abs_diff"] = float(np.abs(library_predict() - tree_ensemble.predict(live)).max())
+    if args.json:
+        print(json.dumps(stats))
+        return
+    rich_print(f"{args.models} {args.library} models of {args.trees} trees ({args.leaves} leaves) on "
+               f"[bold]{args.rows}[/bold] rows x [bold]{args.features}[/bold] int8 features "
+               f"({stats['cpu_count']} CPU cores):")
+    for name, value in stats.items():
+        rich_print(f"  {name:<18} [blue]{value:.6g}[/blue]")
+
+
+if __name__ == "__main__":
+    main()
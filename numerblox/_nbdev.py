@@ -3,14 +3,35 @@
 __all__ = ["index", "modules", "custom_doc_links", "git_url"]
 
 index = {"AttrDict": "00_misc.ipynb",
+         "set_parallel_config": "00_misc.ipynb",
+         "parallel_backend": "00_misc.ipynb",
+         "limit_blas_threads": "00_misc.ipynb",
+         "parallel_config": "00_misc.ipynb",
+         "SharedArray": "00_misc.ipynb",
+         "SHARED_MEMORY_AVAILABLE": "00_misc.ipynb",
+         "ExecutionBackend": "00_misc.ipynb",
+         "SerialBackend": "00_misc.ipynb",
+         "ThreadBackend": "00_misc.ipynb",
+         "ProcessBackend": "00_misc.ipynb",
+         "get_backend": "00_misc.ipynb",
+         "BACKENDS": "00_misc.ipynb",
          "BaseIO": "01_download.ipynb",
          "BaseDownloader": "01_download.ipynb",
          "NumeraiClassicDownloader": "01_download.ipynb",
          "KaggleDownloader": "01_download.ipynb",
          "AwesomeCustomDownloader": "01_download.ipynb",
+         "ColumnGroupRegistry": "02_numerframe.ipynb",
          "NumerFrame": "02_numerframe.ipynb",
          "create_numerframe": "02_numerframe.ipynb",
+         "load_feature_set": "02_numerframe.ipynb",
+         "select_era_values": "02_numerframe.ipynb",
+         "stream_numerframe": "02_numerframe.ipynb",
+         "create_era_index": "02_numerframe.ipynb",
+         "rank_per_era": "02_numerframe.ipynb",
+         "EraBatchLoader": "02_numerframe.ipynb",
          "BaseProcessor": "03_preprocessing.ipynb",
+         "MetricsRegistry": "03_preprocessing.ipynb",
+         "metrics_registry": "03_preprocessing.ipynb",
          "display_processor_info": "03_preprocessing.ipynb",
          "CopyPreProcessor": "03_preprocessing.ipynb",
          "FeatureSelectionPreProcessor": "03_preprocessing.ipynb",
@@ -18,13 +39,22 @@ index = {"AttrDict": "00_misc.ipynb",
          "ReduceMemoryProcessor": "03_preprocessing.ipynb",
          "SyntheticDataGenerator": "03_preprocessing.ipynb",
          "BayesianGMMTargetProcessor": "03_preprocessing.ipynb",
+         "FeatureGroupStatsPreProcessor": "03_preprocessing.ipynb",
          "GroupStatsPreProcessor": "03_preprocessing.ipynb",
          "TalibFeatureGenerator": "03_preprocessing.ipynb",
          "KatsuFeatureGenerator": "03_preprocessing.ipynb",
+         "quantile_per_era": "03_preprocessing.ipynb",
+         "quantile_edges": "03_preprocessing.ipynb",
+         "apply_quantile_edges": "03_preprocessing.ipynb",
          "EraQuantileProcessor": "03_preprocessing.ipynb",
          "AwesomePreProcessor": "03_preprocessing.ipynb",
          "BaseModel": "04_model.ipynb",
+         "ModelCache": "04_model.ipynb",
+         "model_cache": "04_model.ipynb",
          "DirectoryModel": "04_model.ipynb",
+         "FeatureMatrixCache": "04_model.ipynb",
+         "shared_feature_matrices": "04_model.ipynb",
+         "TreeEnsemble": "04_model.ipynb",
          "SingleModel": "04_model.ipynb",
          "WandbKerasModel": "04_model.ipynb",
          "ExternalCSVs": "04_model.ipynb",
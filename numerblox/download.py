@@ -16,8 +16,6 @@ from abc import ABC, abstractmethod
 from rich import print as rich_print
 from numerapi import NumerAPI
 
-from google.cloud import storage
-
 # Cell
 @typechecked
 class BaseIO(ABC):
@@ -88,8 +86,9 @@ class BaseIO(ABC):
             f":cloud: :folder: Directory '{self.dir}' uploaded to '{gcs_path}' in bucket {blob.bucket.id} :folder: :cloud:"
         )
 
-    def _get_gcs_blob(self, bucket_name: str, blob_path: str) -> storage.Blob:
-        """ Create blob that interacts with Google Cloud Storage (GCS). """
+    def _get_gcs_blob(self, bucket_name: str, blob_path: str):
+        """ Create blob (storage.Blob) that interacts with Google Cloud Storage (GCS). """
+        from google.cloud import storage
         client = storage.Client()
         # https://console.cloud.google.com/storage/browser/[bucket_name]
         bucket = client.get_bucket(bucket_name)
@@ -8,10 +8,10 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 from tqdm.auto import tqdm
-import matplotlib.pyplot as plt
 from typing import Tuple, Union
 
-from .numerframe import NumerFrame, create_numerframe
+from .misc import get_backend
+from .numerframe import NumerFrame, create_numerframe, create_era_index, rank_per_era
 from .postprocessing import FeatureNeutralizer
 
 # Cell
@@ -23,11 +23,15 @@ class BaseEvaluator:
     :param era_col: Column name pointing to eras. \n
     Most commonly "era" for Numerai Classic and "friday_date" for Numerai Signals. \n
     :param fast_mode: Will skip compute intensive metrics if set to True,
-    namely max_exposure, feature neutral mean, TB200 and TB500.
+    namely max_exposure, feature neutral mean, TB200 and TB500. \n
+    :param num_cores: Number of threads to divide eras over for per era metrics
+    (max feature exposure, MMC and feature neutral mean).
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`).
     """
-    def __init__(self, era_col: str = "era", fast_mode=False):
+    def __init__(self, era_col: str = "era", fast_mode=False, num_cores: int = None):
         self.era_col = era_col
         self.fast_mode = fast_mode
+        self.num_cores = num_cores
 
     def full_evaluation(
         self,
@@ -128,11 +132,17 @@ class BaseEvaluator:
         self, dataf: pd.DataFrame, pred_col: str, target_col: str
     ) -> pd.Series:
         """Correlation between prediction and target for each era."""
-        return dataf.groupby(dataf[self.era_col]).apply(
-            lambda d: self._normalize_uniform(d[pred_col].fillna(0.5)).corr(
-                d[target_col]
-            )
-        )
+        era_index = self._get_era_index(dataf)
+        # Rank predictions within all eras at once.
+        ranks = rank_per_era(dataf[pred_col].fillna(0.5).values, era_index,
+                             method="first", pct=False, dtype=np.float64)
+        targets = dataf[target_col].values
+        era_corrs = []
+        for positions in era_index.values():
+            era_ranks = ranks[positions]
+            era_corrs.append(pd.Series((era_ranks - 0.5) / len(era_ranks)).corr(pd.Series(targets[positions])))
+        era_corrs = pd.Series(era_corrs, index=pd.Index(list(era_index), name=self.era_col))
+        return era_corrs.sort_index()
 
     def mean_std_sharpe(
         self, era_corrs: pd.Series
@@ -189,10 +199,17 @@ class BaseEvaluator:
         self, dataf: Union[pd.DataFrame, NumerFrame], pred_col: str
     ) -> np.float64:
         """Maximum exposure over all features."""
-        max_per_era = dataf.groupby(self.era_col).apply(
-            lambda d: d[dataf.feature_cols].corrwith(d[pred_col]).abs().max()
-        )
-        max_feature_exposure = max_per_era.mean(skipna=True)
+        era_index = self._get_era_index(dataf)
+        # Zero-copy if features are stored compactly. Eras are cast to float64 one at a time.
+        features = dataf.get_feature_array()
+        preds = dataf[pred_col].values.astype(np.float64)
+
+        def era_max_exposure(positions) -> float:
+            exposures = np.abs(self._corr_columns(features[positions].astype(np.float64), preds[positions]))
+            return np.nan if np.isnan(exposures).all() else np.nanmax(exposures)
+
+        max_per_era = self.__get_backend(n_tasks=len(era_index)).map(era_max_exposure, era_index.values())
+        max_feature_exposure = pd.Series(max_per_era, dtype=np.float64).mean(skipna=True)
         return max_feature_exposure
 
     def feature_neutral_mean_std_sharpe(
@@ -204,7 +221,8 @@ class BaseEvaluator:
         """
         fn = FeatureNeutralizer(pred_name=pred_col,
                                 feature_names=feature_names,
-                                proportion=1.0)
+                                proportion=1.0,
+                                num_cores=self.num_cores)
         neutralized_dataf = fn(dataf=dataf)
         neutral_corrs = self.per_era_corrs(
             dataf=neutralized_dataf,
@@ -235,14 +253,20 @@ class BaseEvaluator:
         MMC Mean, standard deviation and Sharpe ratio.
         More info: https://docs.numer.ai/tournament/metamodel-contribution
         """
-        mmc_scores = []
-        corr_scores = []
-        for _, x in dataf.groupby(self.era_col):
-            series = self._neutralize_series(
-                self._normalize_uniform(x[pred_col]), (x[example_col])
-            )
-            mmc_scores.append(np.cov(series, x[target_col])[0, 1] / (0.29 ** 2))
-            corr_scores.append(self._normalize_uniform(x[pred_col]).corr(x[target_col]))
+        era_index = self._get_era_index(dataf)
+        # Rank predictions within all eras at once.
+        ranks = rank_per_era(dataf[pred_col].values, era_index, method="first", pct=False, dtype=np.float64)
+        examples, targets = dataf[example_col], dataf[target_col]
+
+        def era_mmc(positions) -> Tuple[float, float]:
+            era_targets = targets.iloc[positions]
+            uniform = pd.Series((ranks[positions] - 0.5) / len(era_targets), index=era_targets.index)
+            series = self._neutralize_series(uniform, examples.iloc[positions])
+            return np.cov(series, era_targets)[0, 1] / (0.29 ** 2), uniform.corr(era_targets)
+
+        scores = self.__get_backend(n_tasks=len(era_index)).map(era_mmc, era_index.values())
+        mmc_scores = [mmc_score for mmc_score, _ in scores]
+        corr_scores = [corr_score for _, corr_score in scores]
 
         val_mmc_mean = np.mean(mmc_scores)
         val_mmc_std = np.std(mmc_scores)
@@ -286,10 +310,10 @@ class BaseEvaluator:
         :param tb: How many of top and bottom predictions to focus on.
         TB200 is the most common situation.
         """
-        unique_eras = dataf[self.era_col].unique()
+        era_index = self._get_era_index(dataf)
         computed = []
-        for u in unique_eras:
-            df_era = dataf[dataf[self.era_col] == u]
+        for positions in era_index.values():
+            df_era = dataf.iloc[positions]
             era_pred = np.float64(df_era[columns].values.T)
             era_target = np.float64(df_era[target].values.T)
 
@@ -305,13 +329,34 @@ class BaseEvaluator:
                 ccs = np.array(ccs)
             computed.append(ccs)
         return pd.DataFrame(
-            np.array(computed), columns=columns, index=dataf[self.era_col].unique()
+            np.array(computed), columns=columns, index=list(era_index)
         )
 
+    def __get_backend(self, n_tasks: int):
+        """ Eras are independent. Per era results are returned, so threads share the inputs without copies. """
+        return get_backend(n_workers=self.num_cores, n_tasks=n_tasks, supported=("serial", "threads"))
+
+    @staticmethod
+    def _corr_columns(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """ Pearson correlation of every column of X with y. Rows with a missing value are ignored per column (as in pd.DataFrame.corrwith). """
+        valid = ~np.isnan(X) & ~np.isnan(y)[:, None]
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            X_centered = np.where(valid, X - np.where(valid, X, 0).sum(axis=0) / counts, 0)
+            y_centered = np.where(valid, y[:, None] - np.where(valid, y[:, None], 0).sum(axis=0) / counts, 0)
+            return (X_centered * y_centered).sum(axis=0) / np.sqrt((X_centered ** 2).sum(axis=0) * (y_centered ** 2).sum(axis=0))
+
+    def _get_era_index(self, dataf: pd.DataFrame) -> dict:
+        """ Era index of NumerFrame (cached) or DataFrame. """
+        if isinstance(dataf, NumerFrame) and dataf.meta.era_col == self.era_col:
+            return dataf.era_index
+        return create_era_index(dataf[self.era_col])
+
     @staticmethod
     def _normalize_uniform(df: pd.DataFrame) -> pd.Series:
         """Normalize predictions uniformly using ranks."""
-        x = (df.rank(method="first") - 0.5) / len(df)
+        ranks = rank_per_era(df.values, method="first", pct=False, dtype=np.float64)
+        x = (ranks - 0.5) / len(df)
         return pd.Series(x, index=df.index)
 
     def plot_correlations(
@@ -325,6 +370,7 @@ class BaseEvaluator:
         Plot per era correlations over time.
         :param roll_mean: How many eras should be averaged to compute a rolling score.
         """
+        import matplotlib.pyplot as plt
         validation_by_eras = pd.DataFrame()
         pred_cols = dataf.prediction_cols if not pred_cols else pred_cols
         for pred_col in pred_cols:
@@ -367,8 +413,8 @@ class BaseEvaluator:
 # Cell
 class NumeraiClassicEvaluator(BaseEvaluator):
     """Evaluator for all metrics that are relevant in Numerai Classic."""
-    def __init__(self, era_col: str = "era", fast_mode=False):
-        super().__init__(era_col=era_col, fast_mode=fast_mode)
+    def __init__(self, era_col: str = "era", fast_mode=False, num_cores: int = None):
+        super().__init__(era_col=era_col, fast_mode=fast_mode, num_cores=num_cores)
         # 420 features in medium feature set for FNC v3 calculation
         self.v3_features_path = Path("../assets/feature_sets/v3_features.json")
         self.v3_features = self.__load_json(self.v3_features_path)['medium']
@@ -415,5 +461,5 @@ class NumeraiClassicEvaluator(BaseEvaluator):
 # Cell
 class NumeraiSignalsEvaluator(BaseEvaluator):
     """Evaluator for all metrics that are relevant in Numerai Signals."""
-    def __init__(self, era_col: str = "friday_date", fast_mode=False):
-        super().__init__(era_col=era_col, fast_mode=fast_mode)
\ No newline at end of file
+    def __init__(self, era_col: str = "friday_date", fast_mode=False, num_cores: int = None):
+        super().__init__(era_col=era_col, fast_mode=fast_mode, num_cores=num_cores)
\ No newline at end of file
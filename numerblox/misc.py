@@ -1,10 +1,317 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/00_misc.ipynb (unless otherwise specified).
 
-__all__ = ['AttrDict']
+__all__ = ['AttrDict', 'set_parallel_config', 'parallel_backend', 'limit_blas_threads', 'parallel_config',
+           'SharedArray', 'SHARED_MEMORY_AVAILABLE', 'ExecutionBackend', 'SerialBackend', 'ThreadBackend',
+           'ProcessBackend', 'get_backend', 'BACKENDS']
+
+# Cell
+import os
+import numpy as np
+from tqdm.auto import tqdm
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from multiprocessing.pool import Pool
+from typing import Callable, Iterable, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8. ProcessBackend pickles arrays to workers instead.
+    shared_memory = None
 
 # Cell
 class AttrDict(dict):
     """ Access dictionary elements as attributes. """
     def __init__(self, *args, **kwargs):
         super(AttrDict, self).__init__(*args, **kwargs)
-        self.__dict__ = self
\ No newline at end of file
+        self.__dict__ = self
+
+# Cell
+parallel_config = AttrDict(backend="auto", n_workers=None, blas_threads=None)
+
+
+def set_parallel_config(backend: str = None, n_workers: int = None, blas_threads: int = None) -> AttrDict:
+    """
+    Set global parallel execution settings for all era- and ticker-parallel components.
+    Only given settings are changed. \n
+    :param backend: 'auto' (every component uses the backend that suits it best), 'serial', 'threads' or 'processes'. \n
+    :param n_workers: Number of workers. Uses all CPU cores if not set. The num_cores argument of a component overrides this. \n
+    :param blas_threads: BLAS threads per worker. If not set, CPU cores are divided over workers (at least 1 per worker).
+    :return: Previous settings.
+    """
+    assert backend is None or backend in ["auto", *BACKENDS], f"Backend should be one of {['auto', *BACKENDS]}. Got '{backend}'."
+    previous = AttrDict(parallel_config)
+    settings = {"backend": backend, "n_workers": n_workers, "blas_threads": blas_threads}
+    parallel_config.update({key: value for key, value in settings.items() if value is not None})
+    return previous
+
+
+@contextmanager
+def parallel_backend(backend: str = None, n_workers: int = None, blas_threads: int = None):
+    """ Use parallel execution settings (see set_parallel_config) inside this context only. """
+    previous = set_parallel_config(backend=backend, n_workers=n_workers, blas_threads=blas_threads)
+    try:
+        yield parallel_config
+    finally:
+        parallel_config.update(previous)
+
+
+@contextmanager
+def limit_blas_threads(n_threads: int = None):
+    """
+    Limit threads of BLAS libraries (OpenBLAS, MKL, BLIS) inside this context with threadpoolctl. \n
+    Does nothing if n_threads is None or threadpoolctl is not installed.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        threadpool_limits = None
+    if n_threads is None or threadpool_limits is None:
+        yield
+        return
+    with threadpool_limits(limits=n_threads, user_api="blas"):
+        yield
+
+# Cell
+class SharedArray(np.ndarray):
+    """
+    NumPy array in shared memory (multiprocessing.shared_memory). \n
+    Pickling a SharedArray (or a view of it) only sends the name of the memory block and the array layout.
+    Worker processes get a regular NumPy array backed by the same memory, so large inputs are never copied
+    and workers can write results directly into a shared output array. \n
+    Create with ProcessBackend.share or ProcessBackend.empty, which also release the memory when the backend is closed.
+    Requires Python 3.8 or higher (see SHARED_MEMORY_AVAILABLE).
+    """
+
+    @classmethod
+    def create(cls, shape: Union[int, tuple], dtype=np.float64) -> "SharedArray":
+        dtype = np.dtype(dtype)
+        memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        array = np.ndarray(shape, dtype=dtype, buffer=memory.buf).view(cls)
+        array._memory = memory
+        return array
+
+    def __array_finalize__(self, obj):
+        self._memory = getattr(obj, "_memory", None)
+
+    def __reduce__(self):
+        offset = self.__memory_offset()
+        if offset is None:
+            # Not backed by shared memory (for example the result of a computation). Pickle as regular array.
+            return np.asarray(self).__reduce__()
+        return _attach_shared_array, (self._memory.name, self.shape, self.dtype, offset, self.strides)
+
+    def __memory_offset(self) -> Union[int, None]:
+        """ Offset of the array data in the shared memory block. None if data is not in the block. """
+        if self._memory is None:
+            return None
+        offset = self.__array_interface__["data"][0] - np.frombuffer(self._memory.buf, dtype=np.uint8).ctypes.data
+        return offset if 0 <= offset < self._memory.size else None
+
+
+# multiprocessing.shared_memory is only available from Python 3.8
+SHARED_MEMORY_AVAILABLE = shared_memory is not None
+
+# Shared memory blocks attached in this (worker) process by name
+_attached_memory = {}
+
+
+def _attach_shared_array(name: str, shape: tuple, dtype: np.dtype, offset: int, strides: tuple) -> np.ndarray:
+    """ Regular array on a shared memory block. Blocks are attached once per process. """
+    if name not in _attached_memory:
+        _attached_memory[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=_attached_memory[name].buf, offset=offset, strides=strides)
+
+# Cell
+class ExecutionBackend(ABC):
+    """
+    Map a function over tasks with a number of workers. \n
+    Use as a context manager to reuse workers for several maps and to release shared arrays afterwards. \n
+    :param n_workers: Number of workers. \n
+    :param blas_threads: BLAS threads per worker. No limit if None.
+    """
+    name = None
+
+    def __init__(self, n_workers: int = 1, blas_threads: int = None):
+        self.n_workers = n_workers
+        self.blas_threads = blas_threads
+        self._workers = None
+
+    def map(self, func: Callable, tasks: Iterable, desc: str = None, ordered: bool = True) -> list:
+        """
+        Apply func to every task. \n
+        :param func: Function taking one task. Has to be picklable for the 'processes' backend. \n
+        :param tasks: Tasks to process. \n
+        :param desc: Show progress bar with this description. \n
+        :param ordered: Return results in order of tasks. Otherwise in order of completion.
+        """
+        tasks = list(tasks)
+        close_workers = self._workers is None
+        try:
+            with self._limits():
+                results = self._map(func, tasks, ordered)
+                return list(tqdm(results, total=len(tasks), desc=desc, disable=desc is None))
+        finally:
+            if close_workers:
+                self._close_workers()
+
+    def share(self, array: np.ndarray) -> np.ndarray:
+        """ Array that workers can read without copying. """
+        return array
+
+    def empty(self, shape: Union[int, tuple], dtype=np.float64, fill_value=None) -> np.ndarray:
+        """ New array that workers can write results to. Filled with fill_value if given. """
+        return np.empty(shape, dtype=dtype) if fill_value is None else np.full(shape, fill_value, dtype=dtype)
+
+    @staticmethod
+    def to_local(array: np.ndarray) -> np.ndarray:
+        """ Regular array that stays valid after the backend is closed. Copies shared arrays only. """
+        return np.array(array) if isinstance(array, SharedArray) else array
+
+    def close(self):
+        """ Stop workers. """
+        self._close_workers()
+
+    @abstractmethod
+    def _map(self, func: Callable, tasks: list, ordered: bool) -> Iterable:
+        ...
+
+    def _limits(self):
+        return limit_blas_threads(self.blas_threads)
+
+    def _close_workers(self):
+        self._workers = None
+
+    def __enter__(self) -> "ExecutionBackend":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(n_workers={self.n_workers}, blas_threads={self.blas_threads})"
+
+
+class SerialBackend(ExecutionBackend):
+    """ Process all tasks in the calling thread. BLAS libraries keep their own thread settings. """
+    name = "serial"
+
+    def _map(self, func: Callable, tasks: list, ordered: bool) -> Iterable:
+        return map(func, tasks)
+
+
+class ThreadBackend(ExecutionBackend):
+    """
+    Process tasks in a thread pool. Best for NumPy/SciPy work that releases the GIL. \n
+    While mapping, every BLAS call is limited to blas_threads, so at most n_workers x blas_threads threads are busy.
+    """
+    name = "threads"
+
+    def _map(self, func: Callable, tasks: list, ordered: bool) -> Iterable:
+        if self._workers is None:
+            self._workers = ThreadPoolExecutor(self.n_workers)
+        if ordered:
+            return self._workers.map(func, tasks)
+        return (future.result() for future in as_completed([self._workers.submit(func, task) for task in tasks]))
+
+    def _close_workers(self):
+        if self._workers is not None:
+            self._workers.shutdown()
+        self._workers = None
+
+
+class ProcessBackend(ExecutionBackend):
+    """
+    Process tasks in a process pool. Best for Python-heavy work that holds the GIL. \n
+    Use .share and .empty for large input and output arrays. They are placed in shared memory and are never pickled.
+    Without shared memory (Python < 3.8) they are regular arrays that are pickled to workers,
+    so workers cannot write results into them. Components that do should not use this backend in that case.
+    Every worker process limits its BLAS libraries to blas_threads.
+    """
+    name = "processes"
+
+    def __init__(self, n_workers: int = 1, blas_threads: int = None):
+        super().__init__(n_workers=n_workers, blas_threads=blas_threads)
+        self._shared = []
+
+    def share(self, array: np.ndarray) -> np.ndarray:
+        if not SHARED_MEMORY_AVAILABLE:
+            return super().share(array)
+        shared = self.empty(array.shape, dtype=array.dtype)
+        shared[...] = array
+        return shared
+
+    def empty(self, shape: Union[int, tuple], dtype=np.float64, fill_value=None) -> np.ndarray:
+        if not SHARED_MEMORY_AVAILABLE:
+            return super().empty(shape, dtype=dtype, fill_value=fill_value)
+        shared = SharedArray.create(shape, dtype=dtype)
+        if fill_value is not None:
+            shared.fill(fill_value)
+        self._shared.append(shared._memory)
+        return shared
+
+    def close(self):
+        """ Stop workers and release shared memory. Copy shared results with .to_local before closing. """
+        super().close()
+        for memory in self._shared:
+            try:
+                memory.close()
+            except BufferError:
+                # Still referenced by arrays. Memory is unmapped when the last array is garbage collected.
+                pass
+            memory.unlink()
+        self._shared = []
+
+    def _limits(self):
+        # Workers limit their own BLAS threads when they start.
+        return limit_blas_threads(None)
+
+    def _map(self, func: Callable, tasks: list, ordered: bool) -> Iterable:
+        if self._workers is None:
+            self._workers = Pool(self.n_workers, initializer=_init_process_worker, initargs=(self.blas_threads,))
+        return (self._workers.imap if ordered else self._workers.imap_unordered)(func, tasks)
+
+    def _close_workers(self):
+        if self._workers is not None:
+            self._workers.close()
+            self._workers.join()
+        self._workers = None
+
+
+def _init_process_worker(blas_threads: int = None):
+    """ Limit BLAS threads in a new worker process. Environment variables cover libraries imported later. """
+    if blas_threads is None:
+        return
+    for var in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS"]:
+        os.environ[var] = str(blas_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=blas_threads, user_api="blas")
+
+
+BACKENDS = {backend.name: backend for backend in [SerialBackend, ThreadBackend, ProcessBackend]}
+
+
+def get_backend(backend: str = None, n_workers: int = None, blas_threads: int = None, n_tasks: int = None,
+                default: str = "threads", supported: tuple = ("serial", "threads", "processes")) -> ExecutionBackend:
+    """
+    Execution backend for a component. Settings that are not given are taken from parallel_config. \n
+    :param backend: 'serial', 'threads', 'processes' or 'auto'. \n
+    :param n_workers: Number of workers (for example the num_cores argument of a component). \n
+    :param blas_threads: BLAS threads per worker. \n
+    :param n_tasks: Number of tasks. Workers are capped at this number. \n
+    :param default: Backend the component prefers. Used for 'auto' and if the configured backend is not supported. \n
+    :param supported: Backends the component supports.
+    """
+    backend = backend or parallel_config.backend
+    backend = default if backend == "auto" or backend not in supported else backend
+    assert backend in BACKENDS, f"Backend should be one of {list(BACKENDS)}. Got '{backend}'."
+    n_workers = n_workers or parallel_config.n_workers or os.cpu_count()
+    n_workers = max(1, min(n_workers, n_tasks)) if n_tasks is not None else n_workers
+    if n_workers == 1:
+        return SerialBackend(blas_threads=blas_threads or parallel_config.blas_threads)
+    blas_threads = blas_threads or parallel_config.blas_threads or max(1, os.cpu_count() // n_workers)
+    return BACKENDS[backend](n_workers=n_workers, blas_threads=blas_threads)
\ No newline at end of file
@@ -1,33 +1,36 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/04_model.ipynb (unless otherwise specified).
 
-__all__ = ['BaseModel', 'DirectoryModel', 'SingleModel', 'WandbKerasModel', 'ExternalCSVs', 'NumerBayCSVs',
-           'JoblibModel', 'CatBoostModel', 'LGBMModel', 'ConstantModel', 'RandomModel', 'ExamplePredictionsModel',
-           'AwesomeModel', 'AwesomeDirectoryModel']
+__all__ = ['BaseModel', 'ModelCache', 'model_cache', 'DirectoryModel', 'FeatureMatrixCache', 'shared_feature_matrices',
+           'TreeEnsemble', 'SingleModel', 'WandbKerasModel', 'ExternalCSVs', 'NumerBayCSVs', 'JoblibModel',
+           'CatBoostModel', 'LGBMModel', 'ConstantModel', 'RandomModel', 'ExamplePredictionsModel', 'AwesomeModel',
+           'AwesomeDirectoryModel']
 
 # Cell
 import os
 import gc
 import uuid
-import wandb
+import json
 import joblib
 import pickle
+import tempfile
+import threading
+import contextvars
 import numpy as np
 import pandas as pd
-import lightgbm as lgb
-import tensorflow as tf
 from pathlib import Path
-from typing import Union
+from typing import Union, Callable
 from tqdm.auto import tqdm
 from functools import partial
-from catboost import CatBoost
-from numerbay import NumerBay
+from collections import OrderedDict
+from contextlib import contextmanager
 from typeguard import typechecked
 from abc import ABC, abstractmethod
 from rich import print as rich_print
 from sklearn.dummy import DummyRegressor
 
 from .download import NumeraiClassicDownloader
-from .numerframe import NumerFrame, create_numerframe
+from .numerframe import NumerFrame, create_numerframe, create_era_index
+from .misc import get_backend
 from .preprocessing import display_processor_info
 
 # Cell
@@ -36,15 +39,29 @@ class BaseModel(ABC):
     Setup for model prediction on a Dataset.
 
     :param model_directory: Main directory from which to read in models. \n
-    :param model_name: Name that will be used to create column names and for display purposes.
+    :param model_name: Name that will be used to create column names and for display purposes. \n
+    :param batch_size: Predict in batches of this many rows. Every batch is passed to the model as a C-contiguous float32 array
+    and predictions are written into one preallocated array, so input conversion takes memory for one batch only.
+    Predict on all rows at once with the feature DataFrame by default. \n
+    :param batch_by_era: Batches consist of whole eras. Rows of every era should be stored contiguously (see NumerFrame.sort_by_era).
+    Only batches with a single era larger than batch_size exceed it.
     """
+    # dtype of the shared feature matrix the model gets inside shared_feature_matrices (for example in a ModelPipeline).
+    # None passes a feature DataFrame instead. Set to np.uint8 for models that take Numerai int8 data as is.
+    feature_dtype = None
+
     def __init__(self, model_directory: str,
                  model_name: str = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False,
                  ):
         self.model_directory = Path(model_directory)
         self.model_name = model_name if model_name else uuid.uuid4().hex
         self.prediction_col_name = f"prediction_{self.model_name}"
         self.description = f"{self.__class__.__name__}: '{self.model_name}' prediction"
+        assert batch_size is None or batch_size > 0, "batch_size should be positive or None."
+        self.batch_size = batch_size
+        self.batch_by_era = batch_by_era
 
     @abstractmethod
     def predict(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
@@ -60,9 +77,167 @@ class BaseModel(ABC):
                 prediction_cols = [f"{self.prediction_col_name}_{i}" for i in range(pred_shape[1])]
         return prediction_cols
 
+    @staticmethod
+    def get_feature_input(dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list) -> pd.DataFrame:
+        """
+        Feature data for model input.
+        Features are not copied if they are stored compactly in the NumerFrame (see NumerFrame.compact_features).
+        """
+        if not isinstance(dataf, NumerFrame) or not dataf.has_compact_features:
+            return dataf[feature_cols]
+        return pd.DataFrame(dataf.get_feature_array(feature_cols), index=dataf.index,
+                            columns=feature_cols, copy=False)
+
+    def get_batches(self, dataf: Union[pd.DataFrame, NumerFrame]) -> list:
+        """
+        Row slices of at most batch_size rows. One slice with all rows if batch_size is not set.
+        With batch_by_era, slices end at era boundaries taken from the era index.
+        """
+        n_rows = len(dataf)
+        if not self.batch_size:
+            return [slice(0, n_rows)]
+        if not self.batch_by_era:
+            return [slice(start, min(start + self.batch_size, n_rows)) for start in range(0, n_rows, self.batch_size)]
+        era_index = dataf.era_index if isinstance(dataf, NumerFrame) else create_era_index(dataf["era"])
+        assert all(isinstance(rows, slice) for rows in era_index.values()), \
+            "batch_by_era requires the rows of every era to be stored contiguously. Sort rows by era first (NumerFrame.sort_by_era)."
+        batches, start, end = [], 0, 0
+        for era_end in sorted(rows.stop for rows in era_index.values()):
+            if era_end - start > self.batch_size and end > start:
+                batches.append(slice(start, end))
+                start = end
+            end = era_end
+        batches.append(slice(start, end))
+        return batches
+
+    def get_shared_feature_array(self, dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list) -> Union[np.ndarray, None]:
+        """
+        C-contiguous feature array of feature_dtype shared with other models inside shared_feature_matrices.
+        None outside of shared_feature_matrices or if the model has no feature_dtype.
+        """
+        cache = _shared_feature_matrices.get()
+        if cache is None or self.feature_dtype is None:
+            return None
+        return cache.get(dataf, feature_cols, dtype=self.feature_dtype)
+
+    def get_model_input(self, dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list) -> Union[pd.DataFrame, np.ndarray]:
+        """ Shared feature array (see get_shared_feature_array) if available. Feature DataFrame otherwise (see get_feature_input). """
+        shared = self.get_shared_feature_array(dataf, feature_cols)
+        return shared if shared is not None else self.get_feature_input(dataf, feature_cols)
+
+    @staticmethod
+    def get_feature_batch(dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list, rows: slice) -> np.ndarray:
+        """ C-contiguous float32 feature array for a slice of rows. Only values in the slice are converted. """
+        if isinstance(dataf, NumerFrame) and dataf.has_compact_features:
+            features = dataf.get_feature_array(feature_cols)[rows]
+        else:
+            features = dataf.iloc[rows][feature_cols].to_numpy()
+        return np.ascontiguousarray(features, dtype=np.float32)
+
+    def predict_in_batches(self, predict_func: Callable, dataf: Union[pd.DataFrame, NumerFrame],
+                           feature_cols: list, features: np.ndarray = None) -> np.ndarray:
+        """
+        Apply predict_func to feature batches (see get_batches and get_feature_batch).
+        Batches are sliced from the shared feature array without conversion if available (see get_shared_feature_array).
+        Predictions are written into one preallocated float32 array. \n
+        :param predict_func: Function that takes a 2D float32 feature array and returns predictions as an array. \n
+        :param features: Optional feature array to slice batches from. Uses shared feature array by default.
+        """
+        features = features if features is not None else self.get_shared_feature_array(dataf, feature_cols)
+        output = None
+        for rows in self.get_batches(dataf):
+            batch = features[rows] if features is not None else self.get_feature_batch(dataf, feature_cols, rows)
+            predictions = np.asarray(predict_func(batch))
+            if output is None:
+                output = np.empty((len(dataf), *predictions.shape[1:]), dtype=np.float32)
+            output[rows] = predictions
+        return output
+
     def __call__(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         return self.predict(dataf=dataf)
 
+# Cell
+class ModelCache:
+    """
+    Process level LRU cache for loaded models with a memory budget. \n
+    Models are keyed by resolved file path, modification time, file size and an optional key (for example the loading class),
+    so files that are changed on disk are loaded again.
+    Memory use of a model is estimated with its file size on disk.
+    Least recently used models are evicted when the budget is exceeded and models larger than the budget are not cached.
+
+    :param max_bytes: Memory budget for all cached models in bytes.
+    """
+    def __init__(self, max_bytes: int = 2 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def get(self, path: Union[str, Path], loader: Callable, key: str = None):
+        """
+        Return cached model for path or load it with loader(path) and cache it.
+        :param path: Model file path. \n
+        :param loader: Function that loads a model from a Path. \n
+        :param key: Optional extra key to distinguish models loaded from the same file in different ways.
+        """
+        path = Path(path)
+        stat = path.stat()
+        cache_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size, key)
+        with self._lock:
+            if cache_key in self._models:
+                self._models.move_to_end(cache_key)
+                self.hits += 1
+                return self._models[cache_key][0]
+            self.misses += 1
+        # Load outside of the lock so other models can be read from the cache in the meantime
+        model = loader(path)
+        with self._lock:
+            if stat.st_size <= self.max_bytes:
+                self._models[cache_key] = (model, stat.st_size)
+                self._models.move_to_end(cache_key)
+                self._evict()
+        return model
+
+    @property
+    def size_bytes(self) -> int:
+        """ Estimated memory use of all cached models. """
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def resize(self, max_bytes: int):
+        """ Set new memory budget and evict models that no longer fit. """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """ Remove all models from cache and reset statistics. """
+        with self._lock:
+            self._models.clear()
+            self.hits, self.misses, self.evictions = 0, 0, 0
+        gc.collect()
+
+    def info(self) -> dict:
+        """ Cache statistics. """
+        with self._lock:
+            return {"models": len(self._models), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _evict(self):
+        while self._models and self.size_bytes > self.max_bytes:
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        path = str(Path(path).resolve())
+        with self._lock:
+            return any(cache_key[0] == path for cache_key in self._models)
+
+model_cache = ModelCache()
+
 # Cell
 class DirectoryModel(BaseModel):
     """
@@ -73,15 +248,41 @@ class DirectoryModel(BaseModel):
     :param model_name: Name that will be used to create column names and for display purposes. \n
     :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
     :param combine_preds: Whether to average predictions along column axis. Only relevant for multi target models. \n
-    Convenient when you want to predict the main target by averaging a multi-target model.
+    Convenient when you want to predict the main target by averaging a multi-target model. \n
+    :param max_loaded_models: Maximum number of models held in memory at once.
+    Every model is loaded, used for prediction and released by a worker, so this also caps the number of models predicting concurrently.
+    None for no limit. \n
+    :param cache_models: Keep loaded models in the process level LRU cache (model_cache) so repeated predictions
+    do not read the same files from disk again. The memory budget is set with model_cache.resize. \n
+    :param num_cores: Number of models predicting concurrently in a thread pool.
+    Defaults to parallel_config (see numerblox.misc.set_parallel_config) and is capped by max_loaded_models. \n
+    :param model_threads: Threads used by every model for prediction.
+    Defaults to CPU cores divided by the number of concurrent models to avoid oversubscription. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras. \n
+    :param array_inference: Predict with all models at once as a TreeEnsemble instead of the model libraries.
+    Only for subclasses that implement .to_tree_ensemble (LGBMModel and CatBoostModel). Trees are exported once and kept.
+    Evaluation is single threaded. Mostly pays off for CatBoost models and for LightGBM models on a single core
+    (see benchmarks/tree_ensemble.py).
     """
     def __init__(self, model_directory: str, file_suffix: str,
                  model_name: str = None,
                  feature_cols: list = None,
                  combine_preds = True,
+                 max_loaded_models: Union[int, None] = 1,
+                 cache_models: bool = False,
+                 num_cores: int = None,
+                 model_threads: int = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False,
+                 array_inference: bool = False,
                  ):
+        if not self._supports_streaming() and type(self).load_models is DirectoryModel.load_models:
+            raise TypeError(f"Can't instantiate {self.__class__.__name__} without implementing .load_model or .load_models.")
         super().__init__(model_directory=model_directory,
                          model_name=model_name,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era,
                          )
         self.file_suffix = file_suffix
         self.model_paths = list(self.model_directory.glob(f'*.{self.file_suffix}'))
@@ -90,32 +291,459 @@ class DirectoryModel(BaseModel):
         self.total_models = len(self.model_paths)
         self.feature_cols = feature_cols
         self.combine_preds = combine_preds
+        assert max_loaded_models is None or max_loaded_models > 0, "max_loaded_models should be positive or None."
+        self.max_loaded_models = max_loaded_models
+        self.cache_models = cache_models
+        self.num_cores = num_cores
+        self.model_threads = model_threads
+        assert not array_inference or type(self).to_tree_ensemble is not DirectoryModel.to_tree_ensemble, \
+            f"{self.__class__.__name__} does not support array_inference."
+        self.array_inference = array_inference
+        self._tree_ensemble = None
 
     @display_processor_info
     def predict(self, dataf: NumerFrame, *args, **kwargs) -> NumerFrame:
         """
         Use all recognized models to make predictions and average them out.
+        Models predict concurrently and predictions are summed into one float32 buffer that is written to dataf once.
         :param dataf: A Preprocessed DataFrame where all its features can be passed to the model predict method.
         *args, **kwargs will be parsed into the model.predict method.
         :return: A new dataset with prediction column added.
         """
         dataf.loc[:, self.prediction_col_name] = np.zeros(len(dataf))
-        models = self.load_models()
         feature_cols = self.feature_cols if self.feature_cols else dataf.feature_cols
-        for model in tqdm(models, desc=self.description, position=1):
-            predictions = model.predict(dataf[feature_cols], *args, **kwargs)
-            # Check for if model output is a Pandas DataFrame
-            predictions = predictions.values if isinstance(predictions, pd.DataFrame) else predictions
-            predictions = predictions.mean(axis=1) if self.combine_preds and len(predictions.shape) > 1 else predictions
-            prediction_cols = self.get_prediction_col_names(predictions.shape)
-            dataf.loc[:, prediction_cols] = dataf.loc[:, prediction_cols] + (predictions / self.total_models)
-        del models; gc.collect()
+        if self.array_inference:
+            return self.__predict_tree_ensemble(dataf, feature_cols)
+        # Workers do not see shared_feature_matrices, so the shared feature array is retrieved here
+        shared_features = self.get_shared_feature_array(dataf, feature_cols)
+        feature_input = None if self.batch_size else self.get_model_input(dataf, feature_cols)
+        # Paths are loaded by workers. Models are all loaded up front only if .load_model is not implemented.
+        tasks = self.model_paths if self._supports_streaming() else self.load_models()
+        max_workers = min(len(tasks), self.max_loaded_models or len(tasks))
+        backend = get_backend(n_workers=self.num_cores, blas_threads=self.model_threads, n_tasks=max_workers,
+                              supported=("serial", "threads"))
+        model_threads = self.model_threads or backend.blas_threads
+        buffer, lock = [], threading.Lock()
+
+        def predict_model(task):
+            model = self._get_model(task) if isinstance(task, Path) else task
+
+            def predict_batch(batch_input):
+                predictions = self._predict_model(model, batch_input, model_threads, *args, **kwargs)
+                # Check for if model output is a Pandas DataFrame
+                predictions = predictions.values if isinstance(predictions, pd.DataFrame) else np.asarray(predictions)
+                return predictions.mean(axis=1) if self.combine_preds and len(predictions.shape) > 1 else predictions
+
+            if self.batch_size:
+                predictions = self.predict_in_batches(predict_batch, dataf, feature_cols, features=shared_features)
+            else:
+                predictions = predict_batch(feature_input)
+            # Release model before the worker loads the next one
+            model = None
+            if not self.cache_models and isinstance(task, Path):
+                gc.collect()
+            predictions = predictions / self.total_models
+            with lock:
+                if not buffer:
+                    buffer.append(np.zeros(predictions.shape, dtype=np.float32))
+                buffer[0] += predictions
+
+        backend.map(predict_model, tasks, desc=self.description, ordered=False)
+        tasks = None
+        if buffer:
+            dataf.loc[:, self.get_prediction_col_names(buffer[0].shape)] = buffer[0]
         return NumerFrame(dataf)
 
-    @abstractmethod
+    def __predict_tree_ensemble(self, dataf: NumerFrame, feature_cols: list) -> NumerFrame:
+        """ Average prediction of all models evaluated as one TreeEnsemble. """
+        tree_ensemble = self.get_tree_ensemble()
+        predict_batch = lambda feature_input: tree_ensemble.predict(feature_input).mean(axis=1)
+        if self.batch_size:
+            predictions = self.predict_in_batches(predict_batch, dataf, feature_cols)
+        else:
+            predictions = predict_batch(self.get_model_input(dataf, feature_cols))
+        dataf.loc[:, self.prediction_col_name] = predictions.astype(np.float32)
+        return NumerFrame(dataf)
+
+    def get_tree_ensemble(self) -> "TreeEnsemble":
+        """ All models in directory as one TreeEnsemble. Every model is exported and released before the next is loaded. """
+        if self._tree_ensemble is None:
+            if self._supports_streaming():
+                ensembles = [self.to_tree_ensemble(self._get_model(path)) for path in self.model_paths]
+            else:
+                ensembles = [self.to_tree_ensemble(model) for model in self.load_models()]
+            self._tree_ensemble = TreeEnsemble.combine(ensembles)
+        return self._tree_ensemble
+
+    def to_tree_ensemble(self, model) -> "TreeEnsemble":
+        """ Export loaded model as TreeEnsemble. Implement this to support array_inference. """
+        raise NotImplementedError(f"{self.__class__.__name__} does not implement .to_tree_ensemble.")
+
+    @staticmethod
+    def _predict_model(model, feature_input: pd.DataFrame, n_threads: int = None, *args, **kwargs):
+        """
+        Predict with a loaded model. LightGBM and CatBoost models use n_threads threads if not given in kwargs.
+        Other models are limited through the BLAS thread limits of the execution backend.
+        """
+        thread_arg = {"lightgbm": "num_threads", "catboost": "thread_count"}.get(type(model).__module__.split(".")[0])
+        if n_threads is not None and thread_arg is not None:
+            kwargs.setdefault(thread_arg, n_threads)
+        return model.predict(feature_input, *args, **kwargs)
+
+    def _get_model(self, path: Path):
+        """ Load model from path or from the model cache. """
+        if self.cache_models:
+            return model_cache.get(path, loader=self.load_model, key=self.__class__.__name__)
+        return self.load_model(path)
+
+    def _supports_streaming(self) -> bool:
+        """ Models can be loaded one at a time (.load_model is implemented). Otherwise all models are loaded with .load_models. """
+        return type(self).load_model is not DirectoryModel.load_model
+
+    def load_model(self, path: Path):
+        """ Instantiate model from a single path in self.model_paths. Implement this (or .load_models) in subclasses. Allows streaming and caching. """
+        raise NotImplementedError(f"{self.__class__.__name__} does not implement .load_model.")
+
     def load_models(self) -> list:
-        """ Instantiate all models detected in self.model_paths. """
-        ...
+        """ Instantiate all models detected in self.model_paths. Uses .load_model by default. """
+        return [self.load_model(path) for path in self.model_paths]
+
+# Cell
+class FeatureMatrixCache:
+    """
+    Feature matrices of one NumerFrame shared by models (see shared_feature_matrices). \n
+    Every distinct list of feature columns and dtype is converted once into a C-contiguous array.
+    A matrix is only reused for the same index object and the same arrays holding the feature columns.
+    These are shared by NumerFrames derived from each other by adding columns (for example predictions),
+    but not by other data with an equal index. Matrices are dropped when features of another index are requested.
+    """
+    def __init__(self):
+        self._matrices = {}
+        self._index = None
+        self._lock = threading.Lock()
+        self.conversions = 0
+
+    def get(self, dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list, dtype=np.float32) -> np.ndarray:
+        """
+        C-contiguous feature matrix (rows x feature_cols) of dtype. \n
+        :param dataf: DataFrame or NumerFrame with features. \n
+        :param feature_cols: Feature columns in order of matrix columns. \n
+        :param dtype: NumPy dtype of matrix. Conversion is not checked for loss of information.
+        """
+        key = (tuple(feature_cols), np.dtype(dtype))
+        sources = self.__get_sources(dataf, feature_cols)
+        with self._lock:
+            if self._index is not dataf.index:
+                self._matrices = {}
+            self._index = dataf.index
+            cached = self._matrices.get(key)
+            if cached is None or len(cached[0]) != len(sources) or \
+                    not all(cached_source is source for cached_source, source in zip(cached[0], sources)):
+                self._matrices[key] = (sources, self.__to_matrix(dataf, feature_cols, dtype))
+                self.conversions += 1
+            return self._matrices[key][1]
+
+    @staticmethod
+    def __get_sources(dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list) -> list:
+        """ Arrays holding the feature columns. References are kept, so their ids can not be reused by new data. """
+        sources = {}
+        for col in feature_cols:
+            values = dataf[col].values
+            source = values.base if getattr(values, "base", None) is not None else values
+            sources[id(source)] = source
+        return list(sources.values())
+
+    @staticmethod
+    def __to_matrix(dataf: Union[pd.DataFrame, NumerFrame], feature_cols: list, dtype) -> np.ndarray:
+        if isinstance(dataf, NumerFrame) and dataf.has_compact_features:
+            values = dataf.get_feature_array(feature_cols)
+        else:
+            values = dataf[feature_cols].values
+        if values.dtype == dtype and values.flags.c_contiguous:
+            return values
+        # Convert in one pass into the target layout
+        matrix = np.empty(values.shape, dtype=dtype)
+        np.copyto(matrix, values, casting="unsafe")
+        return matrix
+
+    def clear(self):
+        with self._lock:
+            self._matrices, self._index = {}, None
+
+
+_shared_feature_matrices = contextvars.ContextVar("shared_feature_matrices", default=None)
+
+
+@contextmanager
+def shared_feature_matrices():
+    """
+    Share feature matrix conversions between all models that predict inside this context.
+    Models with a feature_dtype (for example LGBMModel and CatBoostModel) then get one shared C-contiguous array
+    per distinct feature column list and dtype instead of converting the features themselves.
+    Matrices are released when the context exits. Yields the FeatureMatrixCache.
+    """
+    cache = _shared_feature_matrices.get()
+    if cache is not None:
+        # Already sharing in an outer context
+        yield cache
+        return
+    cache = FeatureMatrixCache()
+    token = _shared_feature_matrices.set(cache)
+    try:
+        yield cache
+    finally:
+        _shared_feature_matrices.reset(token)
+        cache.clear()
+
+# Cell
+class TreeEnsemble:
+    """
+    Trees of one or more GBDT models (LightGBM or CatBoost) stored in flat arrays for vectorized prediction in NumPy. \n
+    Every node has a feature index, threshold, missing value handling and two child pointers (leaves point to themselves)
+    and all trees of all models are traversed level by level for all rows at once.
+    Numerai features take only a few values (int8 0...4 or 0, 0.25, ..., 1), so the decision of every split for every
+    feature value is precomputed as a bitmask and traversal becomes a table lookup per level. \n
+    Create with .from_lightgbm, .from_catboost or .combine. .predict returns one prediction column per model.
+    """
+    # Missing value handling per node (as in LightGBM)
+    MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+    # Output transformation of LightGBM objectives. Other objectives are not supported.
+    TRANSFORMS = {"regression": "identity", "regression_l1": "identity", "huber": "identity", "fair": "identity",
+                  "quantile": "identity", "mape": "identity", "binary": "sigmoid", "cross_entropy": "sigmoid",
+                  "poisson": "exp", "gamma": "exp", "tweedie": "exp"}
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, missing_type: np.ndarray, default_left: np.ndarray,
+                 children: np.ndarray, leaf_value: np.ndarray, roots: np.ndarray, depths: np.ndarray,
+                 tree_model: np.ndarray, scale: np.ndarray, bias: np.ndarray, transforms: list):
+        self.feature, self.threshold = feature.astype(np.int32), threshold.astype(np.float64)
+        self.missing_type, self.default_left = missing_type.astype(np.int8), default_left.astype(bool)
+        self.children, self.leaf_value = children.astype(np.int32), leaf_value.astype(np.float64)
+        self.roots, self.depths, self.tree_model = roots.astype(np.int32), depths.astype(np.int32), tree_model.astype(np.int32)
+        self.scale, self.bias, self.transforms = scale.astype(np.float64), bias.astype(np.float64), list(transforms)
+        self._transitions = {}
+
+    @property
+    def n_models(self) -> int:
+        return len(self.bias)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_lightgbm(cls, booster) -> "TreeEnsemble":
+        """ Export trees of a LightGBM Booster (or scikit-learn LGBMModel). Categorical splits are not supported. """
+        booster = booster.booster_ if hasattr(booster, "booster_") else booster
+        dump = booster.dump_model()
+        objective = dump.get("objective", "regression").split(" ")[0]
+        if objective not in cls.TRANSFORMS or dump["num_tree_per_iteration"] != 1:
+            raise NotImplementedError(f"LightGBM objective '{dump.get('objective')}' is not supported.")
+        transform = cls.TRANSFORMS[objective]
+        if transform == "sigmoid":
+            sigmoid = [float(param.split(":")[1]) for param in dump["objective"].split(" ") if param.startswith("sigmoid:")]
+            transform = f"sigmoid:{sigmoid[0] if sigmoid else 1.}"
+        nodes = cls.__new_nodes()
+        roots, depths = [], []
+        for tree in dump["tree_info"]:
+            root, depth = cls.__add_lightgbm_node(nodes, tree["tree_structure"])
+            roots.append(root)
+            depths.append(depth)
+        scale = 1 / max(len(roots), 1) if dump.get("average_output") else 1.
+        return cls.__from_nodes(nodes, roots, depths, scale=scale, bias=0., transform=transform)
+
+    @classmethod
+    def from_catboost(cls, model) -> "TreeEnsemble":
+        """ Export oblivious trees of a CatBoost model with float features and one output dimension. """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "model.json"
+            model.save_model(str(path), format="json")
+            dump = json.loads(path.read_text())
+        float_features = dump["features_info"].get("float_features", [])
+        if set(dump["features_info"]) - {"float_features"} or "oblivious_trees" not in dump:
+            raise NotImplementedError("Only CatBoost models with float features and oblivious trees are supported.")
+        positions = [feature["flat_feature_index"] for feature in float_features]
+        nan_right = [feature.get("nan_value_treatment") == "AsTrue" for feature in float_features]
+        scale, bias = dump.get("scale_and_bias", [1., [0.]])
+        bias = bias if isinstance(bias, list) else [bias]
+        if len(bias) != 1:
+            raise NotImplementedError("Only CatBoost models with one output dimension are supported.")
+        nodes = cls.__new_nodes()
+        roots, depths = [], []
+        for tree in dump["oblivious_trees"]:
+            splits = tree["splits"]
+            if any(split["split_type"] != "FloatFeature" for split in splits) or \
+                    len(tree["leaf_values"]) != 2 ** len(splits):
+                raise NotImplementedError("Only CatBoost models with float features and one output dimension are supported.")
+            # Bit i of the leaf index is set if the value is larger than the border of split i
+            levels = [(positions[split["float_feature_index"]], split["border"], nan_right[split["float_feature_index"]])
+                      for split in splits]
+            roots.append(cls.__add_oblivious_node(nodes, levels, tree["leaf_values"], 0, 0))
+            depths.append(len(splits))
+        return cls.__from_nodes(nodes, roots, depths, scale=scale, bias=bias[0], transform="identity")
+
+    @classmethod
+    def combine(cls, ensembles: list) -> "TreeEnsemble":
+        """ Ensemble that predicts all models of the given ensembles (one output column per model) in one pass. """
+        offsets = np.cumsum([0] + [len(ensemble.feature) for ensemble in ensembles[:-1]])
+        model_offsets = np.cumsum([0] + [ensemble.n_models for ensemble in ensembles[:-1]])
+        concat = lambda attr, shift=None: np.concatenate(
+            [getattr(ensemble, attr) + (shift[i] if shift is not None else 0) for i, ensemble in enumerate(ensembles)])
+        return cls(feature=concat("feature"), threshold=concat("threshold"), missing_type=concat("missing_type"),
+                   default_left=concat("default_left"), children=concat("children", offsets),
+                   leaf_value=concat("leaf_value"), roots=concat("roots", offsets), depths=concat("depths"),
+                   tree_model=concat("tree_model", model_offsets), scale=concat("scale"), bias=concat("bias"),
+                   transforms=[transform for ensemble in ensembles for transform in ensemble.transforms])
+
+    def predict(self, X: Union[np.ndarray, pd.DataFrame], block_size: int = 2 ** 20) -> np.ndarray:
+        """
+        Predictions of all models (rows x models) with the output transformation of every model applied. \n
+        :param X: Features in the column order the models were trained on. \n
+        :param block_size: Maximum number of (row, tree) pairs evaluated at once. Bounds memory use.
+        """
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        codes, values = self.__discrete_codes(X)
+        if codes is not None:
+            transitions = self.__get_transitions(values)
+            features = np.ascontiguousarray(codes)
+        else:
+            features = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows = len(features)
+        raw = np.zeros((n_rows, self.n_models), dtype=np.float64)
+        if n_rows == 0 or self.n_trees == 0:
+            return self.__transform(raw)
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * features.shape[1])[:, None]
+        flat_features = features.ravel()
+        trees_per_block = max(1, block_size // n_rows)
+        # Blocks of trees with similar depth need fewer levels. Trees are grouped by model within a block.
+        order = np.argsort(self.depths, kind="stable")
+        for start in range(0, self.n_trees, trees_per_block):
+            trees = order[start:start + trees_per_block]
+            trees = trees[np.argsort(self.tree_model[trees], kind="stable")]
+            nodes = np.repeat(self.roots[None, trees], n_rows, axis=0)
+            for _ in range(self.depths[trees].max()):
+                values_at_node = flat_features.take(row_offsets + self.feature.take(nodes))
+                if codes is not None:
+                    nodes = transitions.take(nodes * transitions.shape[1] + values_at_node)
+                else:
+                    nodes = self.children.take(nodes * 2 + self.__goes_right(values_at_node, nodes))
+            leaf_values = self.leaf_value.take(nodes)
+            # Sum leaf values per model segment
+            tree_model = self.tree_model[trees]
+            segment_starts = np.flatnonzero(np.r_[True, tree_model[1:] != tree_model[:-1]])
+            raw[:, tree_model[segment_starts]] += np.add.reduceat(leaf_values, segment_starts, axis=1)
+        return self.__transform(raw)
+
+    def __transform(self, raw: np.ndarray) -> np.ndarray:
+        raw = raw * self.scale + self.bias
+        for model, transform in enumerate(self.transforms):
+            if transform.startswith("sigmoid"):
+                raw[:, model] = 1 / (1 + np.exp(-float(transform.split(":")[1]) * raw[:, model]))
+            elif transform == "exp":
+                raw[:, model] = np.exp(raw[:, model])
+        return raw
+
+    def __goes_right(self, x: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """ Split decisions (1 for right child) as in LightGBM numerical splits. Left if x <= threshold. """
+        x = x.astype(np.float64)
+        missing_type = self.missing_type.take(nodes)
+        is_nan = np.isnan(x)
+        x = np.where(is_nan & (missing_type != self.MISSING_NAN), 0., x)
+        is_missing = ((missing_type == self.MISSING_ZERO) & (np.abs(x) <= 1e-35)) | \
+                     ((missing_type == self.MISSING_NAN) & is_nan)
+        right = np.where(is_missing, ~self.default_left.take(nodes), ~(x <= self.threshold.take(nodes)))
+        return right.astype(np.int64)
+
+    def get_split_masks(self, values: np.ndarray) -> np.ndarray:
+        """ Bitmask for every node. Bit v is set if feature value values[v] goes to the right child. """
+        all_nodes = np.arange(len(self.feature))
+        masks = np.zeros(len(all_nodes), dtype=np.uint64)
+        for v, value in enumerate(values):
+            right = self.__goes_right(np.full(len(all_nodes), value), all_nodes).astype(np.uint64)
+            masks |= right << np.uint64(v)
+        return masks
+
+    def __get_transitions(self, values: np.ndarray) -> np.ndarray:
+        """ Next node for every node and feature value code (nodes x values) from split bitmasks. """
+        key = tuple(values)
+        if key not in self._transitions:
+            masks = self.get_split_masks(values)
+            bits = (masks[:, None] >> np.arange(len(values), dtype=np.uint64)) & np.uint64(1)
+            self._transitions[key] = np.take_along_axis(self.children, bits.astype(np.int64), axis=1)
+        return self._transitions[key]
+
+    @staticmethod
+    def __discrete_codes(X: np.ndarray) -> tuple:
+        """
+        Small integer codes and the feature value of every code for Numerai data.
+        (None, None) if features take other values, which are evaluated with thresholds.
+        """
+        if X.size == 0:
+            return None, None
+        # Integer values 0...63 (for example int8 data) or Numerai float format with values 0, 0.25, 0.5, 0.75 and 1
+        for step in [1, 0.25]:
+            scaled = X if step == 1 else X / step
+            if not np.issubdtype(X.dtype, np.integer) and not np.array_equal(scaled, np.rint(scaled)):
+                continue
+            low, high = scaled.min(), scaled.max()
+            if low >= 0 and high < 64:
+                return scaled.astype(np.uint8, copy=False), np.arange(int(high) + 1, dtype=np.float64) * step
+        return None, None
+
+    @staticmethod
+    def __new_nodes() -> dict:
+        return {"feature": [], "threshold": [], "missing_type": [], "default_left": [], "children": [], "leaf_value": []}
+
+    @classmethod
+    def __add_node(cls, nodes: dict, feature: int = 0, threshold: float = np.inf, missing_type: int = 0,
+                   default_left: bool = True, leaf_value: float = 0.) -> int:
+        node = len(nodes["feature"])
+        nodes["feature"].append(feature)
+        nodes["threshold"].append(threshold)
+        nodes["missing_type"].append(missing_type)
+        nodes["default_left"].append(default_left)
+        # Leaves point to themselves until children are set
+        nodes["children"].append([node, node])
+        nodes["leaf_value"].append(leaf_value)
+        return node
+
+    @classmethod
+    def __add_lightgbm_node(cls, nodes: dict, tree: dict) -> tuple:
+        """ Add LightGBM (sub)tree and return root node and depth. """
+        if "leaf_value" in tree:
+            if tree.get("leaf_coeff"):
+                raise NotImplementedError("LightGBM linear trees (linear_tree=True) are not supported.")
+            return cls.__add_node(nodes, leaf_value=tree["leaf_value"]), 0
+        if tree["decision_type"] != "<=":
+            raise NotImplementedError("Categorical LightGBM splits are not supported.")
+        missing_type = {"None": cls.MISSING_NONE, "Zero": cls.MISSING_ZERO, "NaN": cls.MISSING_NAN}[tree["missing_type"]]
+        node = cls.__add_node(nodes, feature=tree["split_feature"], threshold=tree["threshold"],
+                              missing_type=missing_type, default_left=tree["default_left"])
+        left, left_depth = cls.__add_lightgbm_node(nodes, tree["left_child"])
+        right, right_depth = cls.__add_lightgbm_node(nodes, tree["right_child"])
+        nodes["children"][node] = [left, right]
+        return node, 1 + max(left_depth, right_depth)
+
+    @classmethod
+    def __add_oblivious_node(cls, nodes: dict, levels: list, leaf_values: list, level: int, leaf_index: int) -> int:
+        """ Add CatBoost oblivious (sub)tree as regular tree and return root node. """
+        if level == len(levels):
+            return cls.__add_node(nodes, leaf_value=leaf_values[leaf_index])
+        feature, border, nan_right = levels[level]
+        # CatBoost goes right if value > border. NaN goes left unless nan_value_treatment is 'AsTrue'.
+        node = cls.__add_node(nodes, feature=feature, threshold=border, missing_type=cls.MISSING_NAN,
+                              default_left=not nan_right)
+        left = cls.__add_oblivious_node(nodes, levels, leaf_values, level + 1, leaf_index)
+        right = cls.__add_oblivious_node(nodes, levels, leaf_values, level + 1, leaf_index | (1 << level))
+        nodes["children"][node] = [left, right]
+        return node
+
+    @classmethod
+    def __from_nodes(cls, nodes: dict, roots: list, depths: list, scale: float, bias: float, transform: str) -> "TreeEnsemble":
+        return cls(feature=np.array(nodes["feature"]), threshold=np.array(nodes["threshold"], dtype=np.float64),
+                   missing_type=np.array(nodes["missing_type"]), default_left=np.array(nodes["default_left"]),
+                   children=np.array(nodes["children"]).reshape(-1, 2), leaf_value=np.array(nodes["leaf_value"]),
+                   roots=np.array(roots), depths=np.array(depths), tree_model=np.zeros(len(roots)),
+                   scale=np.array([scale]), bias=np.array([bias]), transforms=[transform])
 
 # Cell
 @typechecked
@@ -131,38 +759,52 @@ class SingleModel(BaseModel):
     Will take the 3rd of tuple output in this case. Only relevant for NN models.
     More info on autoencoders:
     https://forum.numer.ai/t/autoencoder-and-multitask-mlp-on-new-dataset-from-kaggle-jane-street/4338 \n
-    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default.
+    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras.
     """
     def __init__(self, model_file_path: str, model_name: str = None,
                  combine_preds = False, autoencoder_mlp = False,
-                 feature_cols: list = None
+                 feature_cols: list = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False
                  ):
         self.model_file_path = Path(model_file_path)
         assert self.model_file_path.exists(), f"File path '{self.model_file_path}' does not exist."
         assert self.model_file_path.is_file(), f"File path must point to file. Not valid for '{self.model_file_path}'."
         super().__init__(model_directory=str(self.model_file_path.parent),
                          model_name=model_name,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era,
                          )
         self.model_suffix = self.model_file_path.suffix
         self.suffix_to_model_mapping = {".joblib": joblib.load,
-                                        ".cbm": CatBoost().load_model,
+                                        ".cbm": self.__load_catboost_model,
                                         ".pkl": pickle.load,
                                         ".pickle": pickle.load,
-                                        ".h5": partial(tf.keras.models.load_model, compile=False)
+                                        ".h5": partial(self.__load_keras_model, compile=False)
                                         }
         self.__check_valid_suffix()
         self.combine_preds = combine_preds
         self.autoencoder_mlp = autoencoder_mlp
         self.feature_cols = feature_cols
 
+    @display_processor_info
     def predict(self, dataf: NumerFrame, *args, **kwargs) -> NumerFrame:
         model = self._load_model(*args, **kwargs)
         feature_cols = self.feature_cols if self.feature_cols else dataf.feature_cols
-        predictions = model.predict(dataf[feature_cols])
-        # Check for if model output is a Pandas DataFrame
-        predictions = predictions.values if isinstance(predictions, pd.DataFrame) else predictions
-        predictions = predictions[2] if self.autoencoder_mlp else predictions
-        predictions = predictions.mean(axis=1) if self.combine_preds else predictions
+
+        def predict_batch(feature_input):
+            predictions = model.predict(feature_input)
+            # Check for if model output is a Pandas DataFrame
+            predictions = predictions.values if isinstance(predictions, pd.DataFrame) else predictions
+            predictions = predictions[2] if self.autoencoder_mlp else predictions
+            return predictions.mean(axis=1) if self.combine_preds else predictions
+
+        if self.batch_size:
+            predictions = self.predict_in_batches(predict_batch, dataf, feature_cols)
+        else:
+            predictions = predict_batch(self.get_model_input(dataf, feature_cols))
         prediction_cols = self.get_prediction_col_names(predictions.shape)
         dataf.loc[:, prediction_cols] = predictions
         del model; gc.collect()
@@ -172,6 +814,18 @@ class SingleModel(BaseModel):
         """ Load arbitrary model from path using suffix to model mapping. """
         return self.suffix_to_model_mapping[self.model_suffix](str(self.model_file_path), *args, **kwargs)
 
+    @staticmethod
+    def __load_catboost_model(file_path: str, *args, **kwargs):
+        """ Load CatBoost model. CatBoost is only imported when a .cbm model is loaded. """
+        from catboost import CatBoost
+        return CatBoost().load_model(file_path, *args, **kwargs)
+
+    @staticmethod
+    def __load_keras_model(file_path: str, *args, **kwargs):
+        """ Load Keras model. TensorFlow is only imported when a .h5 model is loaded. """
+        import tensorflow as tf
+        return tf.keras.models.load_model(file_path, *args, **kwargs)
+
     def __check_valid_suffix(self):
         """ Detailed message if model is not supported in this class. """
         try:
@@ -201,7 +855,9 @@ class WandbKerasModel(SingleModel):
     More info on autoencoders:
     https://forum.numer.ai/t/autoencoder-and-multitask-mlp-on-new-dataset-from-kaggle-jane-street/4338 \n
     :param replace: Replace any model files saved under the same file name with downloaded W&B run model. WARNING: Setting to True may overwrite models in your local environment. \n
-    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default.
+    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras.
     """
     def __init__(self,
                  run_path: str,
@@ -209,7 +865,9 @@ class WandbKerasModel(SingleModel):
                  combine_preds = False,
                  autoencoder_mlp = False,
                  replace = False,
-                 feature_cols: list = None
+                 feature_cols: list = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False
                  ):
         self.run_path = run_path
         self.file_name = file_name
@@ -220,7 +878,9 @@ class WandbKerasModel(SingleModel):
                          model_name=self.run_path,
                          combine_preds=combine_preds,
                          autoencoder_mlp=autoencoder_mlp,
-                         feature_cols=feature_cols
+                         feature_cols=feature_cols,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era
                          )
 
     def _download_model(self):
@@ -228,6 +888,7 @@ class WandbKerasModel(SingleModel):
         Use W&B API to download .h5 model file.
         More info on API: https://docs.wandb.ai/guides/track/public-api-guide
         """
+        import wandb
         if Path(self.file_name).is_file() and not self.replace:
             rich_print(f":warning: [red] Model file '{self.file_name}' already exists in local environment.\
             Skipping download of W&B run model. If this is not the model you want to use for prediction\
@@ -254,6 +915,7 @@ class ExternalCSVs(BaseModel):
         if not self.paths:
             rich_print(f":warning: WARNING: No csvs found in directory '{self.data_directory}'. :warning:")
 
+    @display_processor_info
     def predict(self, dataf: NumerFrame) -> NumerFrame:
         """ Return NumerFrame with added external predictions. """
         for path in tqdm(self.paths, desc="External submissions"):
@@ -291,11 +953,12 @@ class NumerBayCSVs(BaseModel):
         self.numerbay_product_full_names = numerbay_product_full_names
         self.numerbay_key_path = numerbay_key_path
         self._api = None
-        self._get_api_func = lambda: NumerBay(username=numerbay_username, password=numerbay_password)
+        self._get_api_func = partial(self.__get_numerbay_api, username=numerbay_username, password=numerbay_password)
         self.ticker_col = ticker_col
         self.classic_number = 8
         self.signals_number = 11
 
+    @display_processor_info
     def predict(self, dataf: NumerFrame) -> NumerFrame:
         """ Return NumerFrame with added NumerBay predictions. """
         for numerbay_product_full_name in tqdm(self.numerbay_product_full_names, desc="NumerBay submissions"):
@@ -315,6 +978,11 @@ class NumerBayCSVs(BaseModel):
             self._api = self._get_api_func()
         return self._api
 
+    @staticmethod
+    def __get_numerbay_api(username: str, password: str):
+        from numerbay import NumerBay
+        return NumerBay(username=username, password=password)
+
     def _get_preds(self, numerbay_product_full_name: str, tournament: int) -> pd.Series:
         if tournament == self.signals_number: # Temporarily disable Signals
             raise NotImplementedError("NumerBay Signals predictions not yet supported.")
@@ -365,22 +1033,40 @@ class JoblibModel(DirectoryModel):
 
     :param model_directory: Main directory from which to read in models. \n
     :param model_name: Name that will be used to create column names and for display purposes. \n
-    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default.
+    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
+    :param max_loaded_models: Maximum number of models held in memory and predicting at once. None for no limit. \n
+    :param cache_models: Keep loaded models in the process level LRU cache (model_cache). \n
+    :param num_cores: Number of models predicting concurrently. Capped by max_loaded_models. \n
+    :param model_threads: Threads used by every model for prediction. Defaults to CPU cores divided by concurrent models. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras.
     """
     def __init__(self,
                  model_directory: str,
                  model_name: str = None,
-                 feature_cols: list = None
+                 feature_cols: list = None,
+                 max_loaded_models: Union[int, None] = 1,
+                 cache_models: bool = False,
+                 num_cores: int = None,
+                 model_threads: int = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False
                  ):
         file_suffix = 'joblib'
         super().__init__(model_directory=model_directory,
                          file_suffix=file_suffix,
                          model_name=model_name,
-                         feature_cols=feature_cols
+                         feature_cols=feature_cols,
+                         max_loaded_models=max_loaded_models,
+                         cache_models=cache_models,
+                         num_cores=num_cores,
+                         model_threads=model_threads,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era
                          )
 
-    def load_models(self) -> list:
-        return [joblib.load(path) for path in self.model_paths]
+    def load_model(self, path: Path):
+        return joblib.load(path)
 
 # Cell
 @typechecked
@@ -390,22 +1076,50 @@ class CatBoostModel(DirectoryModel):
 
     :param model_directory: Main directory from which to read in models. \n
     :param model_name: Name that will be used to define column names and for display purposes. \n
-    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default.
+    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
+    :param max_loaded_models: Maximum number of models held in memory and predicting at once. None for no limit. \n
+    :param cache_models: Keep loaded models in the process level LRU cache (model_cache). \n
+    :param num_cores: Number of models predicting concurrently. Capped by max_loaded_models. \n
+    :param model_threads: Threads used by every model for prediction. Defaults to CPU cores divided by concurrent models. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras. \n
+    :param array_inference: Predict with all models at once as a TreeEnsemble (see numerblox.model.TreeEnsemble).
+    Single threaded. Usually faster than CatBoost for a few hundred trees per model, but not for thousands.
     """
+    feature_dtype = np.float32
+
     def __init__(self,
                  model_directory: str,
                  model_name: str = None,
-                 feature_cols: list = None
+                 feature_cols: list = None,
+                 max_loaded_models: Union[int, None] = 1,
+                 cache_models: bool = False,
+                 num_cores: int = None,
+                 model_threads: int = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False,
+                 array_inference: bool = False
                  ):
         file_suffix = 'cbm'
         super().__init__(model_directory=model_directory,
                          file_suffix=file_suffix,
                          model_name=model_name,
-                         feature_cols=feature_cols
+                         feature_cols=feature_cols,
+                         max_loaded_models=max_loaded_models,
+                         cache_models=cache_models,
+                         num_cores=num_cores,
+                         model_threads=model_threads,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era,
+                         array_inference=array_inference
                          )
 
-    def load_models(self) -> list:
-        return [CatBoost().load_model(path) for path in self.model_paths]
+    def load_model(self, path: Path):
+        from catboost import CatBoost
+        return CatBoost().load_model(str(path))
+
+    def to_tree_ensemble(self, model) -> TreeEnsemble:
+        return TreeEnsemble.from_catboost(model)
 
 # Cell
 @typechecked
@@ -415,22 +1129,50 @@ class LGBMModel(DirectoryModel):
 
     :param model_directory: Main directory from which to read in models. \n
     :param model_name: Name that will be used to define column names and for display purposes. \n
-    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default.
+    :param feature_cols: optional list of features to use for prediction. Selects all feature columns (i.e. column names with prefix 'feature') by default. \n
+    :param max_loaded_models: Maximum number of models held in memory and predicting at once. None for no limit. \n
+    :param cache_models: Keep loaded models in the process level LRU cache (model_cache). \n
+    :param num_cores: Number of models predicting concurrently. Capped by max_loaded_models. \n
+    :param model_threads: Threads used by every model for prediction. Defaults to CPU cores divided by concurrent models. \n
+    :param batch_size: Predict in batches of this many rows with float32 input (see BaseModel). All rows at once by default. \n
+    :param batch_by_era: Batches consist of whole eras. \n
+    :param array_inference: Predict with all models at once as a TreeEnsemble (see numerblox.model.TreeEnsemble).
+    Single threaded. Only pays off over LightGBM on a single core and then only marginally.
     """
+    feature_dtype = np.float32
+
     def __init__(self,
                  model_directory: str,
                  model_name: str = None,
-                 feature_cols: list = None
+                 feature_cols: list = None,
+                 max_loaded_models: Union[int, None] = 1,
+                 cache_models: bool = False,
+                 num_cores: int = None,
+                 model_threads: int = None,
+                 batch_size: int = None,
+                 batch_by_era: bool = False,
+                 array_inference: bool = False
                  ):
         file_suffix = 'lgb'
         super().__init__(model_directory=model_directory,
                          file_suffix=file_suffix,
                          model_name=model_name,
-                         feature_cols=feature_cols
+                         feature_cols=feature_cols,
+                         max_loaded_models=max_loaded_models,
+                         cache_models=cache_models,
+                         num_cores=num_cores,
+                         model_threads=model_threads,
+                         batch_size=batch_size,
+                         batch_by_era=batch_by_era,
+                         array_inference=array_inference
                          )
 
-    def load_models(self) -> list:
-        return [lgb.Booster(model_file=str(path)) for path in self.model_paths]
+    def load_model(self, path: Path):
+        import lightgbm as lgb
+        return lgb.Booster(model_file=str(path))
+
+    def to_tree_ensemble(self, model) -> TreeEnsemble:
+        return TreeEnsemble.from_lightgbm(model)
 
 # Cell
 class ConstantModel(BaseModel):
@@ -449,6 +1191,7 @@ class ConstantModel(BaseModel):
                          )
         self.clf = DummyRegressor(strategy='constant', constant=constant).fit([0.], [0.])
 
+    @display_processor_info
     def predict(self, dataf: NumerFrame) -> NumerFrame:
         dataf.loc[:, self.prediction_col_name] = self.clf.predict(dataf.get_feature_data)
         return NumerFrame(dataf)
@@ -467,6 +1210,7 @@ class RandomModel(BaseModel):
                          model_name=model_name
                          )
 
+    @display_processor_info
     def predict(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         dataf.loc[:, self.prediction_col_name] = np.random.uniform(size=len(dataf))
         return NumerFrame(dataf)
@@ -560,6 +1304,6 @@ class AwesomeDirectoryModel(DirectoryModel):
                          feature_cols=feature_cols
                          )
 
-    def load_models(self) -> list:
-        """ Instantiate all models and return as a list. (abstract method) """
+    def load_model(self, path: Path):
+        """ Instantiate model from a single path in self.model_paths. """
         ...
\ No newline at end of file
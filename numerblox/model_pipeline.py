@@ -7,12 +7,14 @@ import uuid
 import pandas as pd
 from tqdm.auto import tqdm
 from typeguard import typechecked
+from pathlib import Path
+from contextlib import nullcontext
 from typing import List, Union, Dict
 from rich import print as rich_print
 
 from .numerframe import NumerFrame, create_numerframe
-from .preprocessing import BaseProcessor, CopyPreProcessor, GroupStatsPreProcessor, FeatureSelectionPreProcessor
-from .model import BaseModel, ConstantModel, RandomModel
+from .preprocessing import BaseProcessor, CopyPreProcessor, GroupStatsPreProcessor, FeatureSelectionPreProcessor, metrics_registry
+from .model import BaseModel, ConstantModel, RandomModel, shared_feature_matrices
 from .postprocessing import Standardizer, MeanEnsembler, FeatureNeutralizer
 
 # Cell
@@ -26,7 +28,8 @@ class ModelPipeline:
     :param postprocessors: List of initialized Postprocessors. \n
     :param copy_first: Whether to copy the NumerFrame as a first preprocessing step. \n
     Highly recommended in order to avoid surprise behaviour by manipulating the original dataset. \n
-    :param pipeline_name: Unique name for pipeline. Only used for display purposes.
+    :param pipeline_name: Unique name for pipeline. Used for display purposes and to label performance metrics. \n
+    :param share_features: Convert features once for all models that take feature arrays (see numerblox.model.shared_feature_matrices).
     """
     def __init__(self,
                  models: List[BaseModel],
@@ -34,45 +37,53 @@ class ModelPipeline:
                  postprocessors: List[BaseProcessor] = [],
                  copy_first = True,
                  standardize = True,
-                 pipeline_name: str = None):
+                 pipeline_name: str = None,
+                 share_features = True):
         self.pipeline_name = pipeline_name if pipeline_name else uuid.uuid4().hex
         self.models = models
         self.copy_first = copy_first
         self.standardize = standardize
         self.preprocessors = preprocessors
         self.postprocessors = postprocessors
+        self.share_features = share_features
 
     def preprocess(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         """ Run all preprocessing steps. Copies input by default. """
-        if self.copy_first:
-            dataf = CopyPreProcessor()(dataf)
-        for preprocessor in tqdm(self.preprocessors,
-                                 desc=f"{self.pipeline_name} Preprocessing:",
-                                 position=0):
-            rich_print(f":construction: Applying preprocessing: '[bold]{preprocessor.__class__.__name__}[/bold]' :construction:")
-            dataf = preprocessor(dataf)
+        with metrics_registry.labels(pipeline=self.pipeline_name, stage="preprocessing"):
+            if self.copy_first:
+                dataf = CopyPreProcessor()(dataf)
+            for preprocessor in tqdm(self.preprocessors,
+                                     desc=f"{self.pipeline_name} Preprocessing:",
+                                     position=0):
+                rich_print(f":construction: Applying preprocessing: '[bold]{preprocessor.__class__.__name__}[/bold]' :construction:")
+                dataf = preprocessor(dataf)
         return NumerFrame(dataf)
 
     def postprocess(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         """ Run all postprocessing steps. Standardizes model prediction by default. """
-        if self.standardize:
-            dataf = Standardizer()(dataf)
-        for postprocessor in tqdm(self.postprocessors,
-                                  desc=f"{self.pipeline_name} Postprocessing: ",
-                                  position=0):
-            rich_print(f":construction: Applying postprocessing: '[bold]{postprocessor.__class__.__name__}[/bold]' :construction:")
-            dataf = postprocessor(dataf)
+        with metrics_registry.labels(pipeline=self.pipeline_name, stage="postprocessing"):
+            if self.standardize:
+                dataf = Standardizer()(dataf)
+            for postprocessor in tqdm(self.postprocessors,
+                                      desc=f"{self.pipeline_name} Postprocessing: ",
+                                      position=0):
+                rich_print(f":construction: Applying postprocessing: '[bold]{postprocessor.__class__.__name__}[/bold]' :construction:")
+                dataf = postprocessor(dataf)
         return NumerFrame(dataf)
 
     def process_models(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
-        """ Run all models. """
-        for model in tqdm(self.models,
-                                  desc=f"{self.pipeline_name} Model prediction: ",
-                                  position=0):
-            rich_print(f":robot: Generating model predictions with '[bold]{model.__class__.__name__}[/bold]'. :robot:")
-            dataf = model(dataf)
+        """ Run all models. Feature matrices are shared between models by default and released afterwards. """
+        with metrics_registry.labels(pipeline=self.pipeline_name, stage="model"), self.__shared_features():
+            for model in tqdm(self.models,
+                                      desc=f"{self.pipeline_name} Model prediction: ",
+                                      position=0):
+                rich_print(f":robot: Generating model predictions with '[bold]{model.__class__.__name__}[/bold]'. :robot:")
+                dataf = model(dataf)
         return NumerFrame(dataf)
 
+    def __shared_features(self):
+        return shared_feature_matrices() if self.share_features else nullcontext()
+
     def pipeline(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         """ Process full pipeline and return resulting NumerFrame. """
         preprocessed_dataf = self.preprocess(dataf)
@@ -81,6 +92,21 @@ class ModelPipeline:
         rich_print(f":checkered_flag: [green]Finished pipeline:[green] [bold blue]'{self.pipeline_name}'[bold blue]! :checkered_flag:")
         return processed_prediction_dataf
 
+    def get_metrics(self) -> pd.DataFrame:
+        """ Performance metrics for all steps of this pipeline aggregated per stage and step (slowest first). """
+        return metrics_registry.summary(by=["stage", "step"], pipeline=self.pipeline_name)
+
+    def export_metrics(self, path: Union[str, Path] = None, format: str = "json") -> str:
+        """
+        Export performance metrics of this pipeline. \n
+        :param path: Optionally write metrics to this file. \n
+        :param format: 'json' for all step records or 'prometheus' for aggregated metrics in Prometheus text format.
+        """
+        assert format in ("json", "prometheus"), f"format should be 'json' or 'prometheus'. Got '{format}'."
+        if format == "json":
+            return metrics_registry.to_json(path=path, pipeline=self.pipeline_name)
+        return metrics_registry.to_prometheus(path=path, pipeline=self.pipeline_name)
+
     def __call__(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         return self.pipeline(dataf)
 
@@ -117,5 +143,20 @@ class ModelPipelineCollection:
         assert pipeline_name in available_pipelines, f"Requested pipeline '{pipeline_name}', but only the following models are in the collection: '{available_pipelines}'."
         return self.pipelines[pipeline_name]
 
+    def get_metrics(self) -> pd.DataFrame:
+        """ Performance metrics for all pipelines in the collection aggregated per pipeline, stage and step (slowest first). """
+        return metrics_registry.summary(by=["pipeline", "stage", "step"], pipeline=self.pipeline_names)
+
+    def export_metrics(self, path: Union[str, Path] = None, format: str = "json") -> str:
+        """
+        Export performance metrics of all pipelines in the collection. \n
+        :param path: Optionally write metrics to this file. \n
+        :param format: 'json' for all step records or 'prometheus' for aggregated metrics in Prometheus text format.
+        """
+        assert format in ("json", "prometheus"), f"format should be 'json' or 'prometheus'. Got '{format}'."
+        if format == "json":
+            return metrics_registry.to_json(path=path, pipeline=self.pipeline_names)
+        return metrics_registry.to_prometheus(path=path, pipeline=self.pipeline_names)
+
     def __call__(self, dataf: Union[pd.DataFrame, NumerFrame]) -> Dict[str, NumerFrame]:
         return self.process_all_pipelines(dataf=dataf)
\ No newline at end of file
@@ -1,33 +1,98 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/02_numerframe.ipynb (unless otherwise specified).
 
-__all__ = ['NumerFrame', 'create_numerframe']
+__all__ = ['ColumnGroupRegistry', 'NumerFrame', 'create_numerframe', 'load_feature_set', 'select_era_values',
+           'stream_numerframe', 'create_era_index', 'rank_per_era', 'EraBatchLoader']
 
 # Cell
 import uuid
 import json
+import time
+import queue
+import threading
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 from pathlib import Path
 from rich import print as rich_print
-from pandas_profiling import ProfileReport
-from typing import Union, Tuple, Any, List
+from typing import Union, Tuple, Any, List, Dict, Iterator
 
 from .misc import AttrDict
 
+# Cell
+class ColumnGroupRegistry:
+    """
+    Classification of column names into feature, target, prediction and aux groups. \n
+    Columns are classified once with hash lookups.
+    Derived registries reuse existing classifications and only classify new columns. \n
+    :param columns: Column names to classify.
+    """
+    group_prefixes = ("feature", "target", "prediction")
+
+    def __init__(self, columns: pd.Index):
+        self.columns = columns
+        self.group_map = {col: self.classify(col) for col in columns}
+        self.__build_groups()
+
+    @classmethod
+    def classify(cls, col: Any) -> str:
+        """ Group name for a single column ('feature', 'target', 'prediction' or 'aux'). """
+        col = str(col)
+        for prefix in cls.group_prefixes:
+            if col.startswith(prefix):
+                return prefix
+        return "aux"
+
+    def update(self, columns: pd.Index) -> "ColumnGroupRegistry":
+        """
+        Registry for a new set of columns.
+        Returns itself if columns did not change. Otherwise only newly added columns are classified. \n
+        :param columns: Column names of the (modified) NumerFrame.
+        """
+        if columns is self.columns or columns.equals(self.columns):
+            return self
+        registry = self.__class__.__new__(self.__class__)
+        registry.columns = columns
+        group_map = self.group_map
+        registry.group_map = {col: group_map[col] if col in group_map else self.classify(col)
+                              for col in columns}
+        registry.__build_groups()
+        return registry
+
+    def __build_groups(self):
+        """ Ordered column lists for every group in a single pass over the columns. """
+        groups = {group: [] for group in self.group_prefixes + ("aux",)}
+        for col in self.columns:
+            groups[self.group_map[col]].append(col)
+        self.feature_cols = groups["feature"]
+        self.target_cols = groups["target"]
+        self.prediction_cols = groups["prediction"]
+        self.not_aux_cols = self.feature_cols + self.target_cols + self.prediction_cols
+        self.aux_cols = groups["aux"]
+
+
 # Cell
 class NumerFrame(pd.DataFrame):
     """
     Data structure which extends Pandas DataFrames and
     allows for additional Numerai specific functionality.
     """
-    _metadata = ["meta", "feature_cols", "target_cols",
-                 "prediction_cols", "not_aux_cols", "aux_cols"]
+    # Column group registry is shared with derived NumerFrames and validated lazily.
+    _metadata = ["meta", "_column_groups"]
+    # Caches are not propagated to derived NumerFrames. They are only reused when wrapping a NumerFrame.
+    _internal_names = pd.DataFrame._internal_names + ["_era_index", "_feature_block", "_feature_cache"]
+    _internal_names_set = set(_internal_names)
     meta = AttrDict()
+    # Column that holds compact features in files created with .save.
+    feature_block_col = "__numerblox_feature_block__"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.__init_meta_attrs()
+        data = args[0] if args else kwargs.get("data")
+        self._column_groups = getattr(data, "_column_groups", None)
+        if isinstance(data, NumerFrame):
+            # Caches validate themselves, so they remain correct if data was copied.
+            self._era_index = getattr(data, "_era_index", None)
+            self._feature_block = getattr(data, "_feature_block", None)
+            self._feature_cache = getattr(data, "_feature_cache", None)
         if not "era_col_verified" in self.meta:
             self.__set_era_col()
 
@@ -35,17 +100,51 @@ class NumerFrame(pd.DataFrame):
     def _constructor(self):
         return NumerFrame
 
-    def __init_meta_attrs(self):
-        """ Dynamically track column groups. """
-        self.feature_cols = [col for col in self.columns if str(col).startswith("feature")]
-        self.target_cols = [col for col in self.columns if str(col).startswith("target")]
-        self.prediction_cols = [
-            col for col in self.columns if str(col).startswith("prediction")
-        ]
-        self.not_aux_cols = self.feature_cols + self.target_cols + self.prediction_cols
-        self.aux_cols = [
-            col for col in self.columns if col not in self.not_aux_cols
-        ]
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if isinstance(key, str) and key == self.meta.get("era_col"):
+            self.reset_era_index()
+        feature_block = getattr(self, "_feature_block", None)
+        if feature_block is not None and any(col in feature_block[0] for col in
+                                             (key if isinstance(key, list) else [key])):
+            self._feature_block = None
+            self.reset_feature_cache()
+
+    @property
+    def column_groups(self) -> "ColumnGroupRegistry":
+        """
+        Registry of feature, target, prediction and aux columns.
+        Dynamically tracks column groups. Only columns that were added since the last lookup are classified.
+        """
+        registry = getattr(self, "_column_groups", None)
+        registry = ColumnGroupRegistry(self.columns) if registry is None else registry.update(self.columns)
+        self._column_groups = registry
+        return registry
+
+    @property
+    def feature_cols(self) -> list:
+        """ All column names that start with 'feature'. """
+        return self.column_groups.feature_cols
+
+    @property
+    def target_cols(self) -> list:
+        """ All column names that start with 'target'. """
+        return self.column_groups.target_cols
+
+    @property
+    def prediction_cols(self) -> list:
+        """ All column names that start with 'prediction'. """
+        return self.column_groups.prediction_cols
+
+    @property
+    def not_aux_cols(self) -> list:
+        """ All feature, target and prediction column names. """
+        return self.column_groups.not_aux_cols
+
+    @property
+    def aux_cols(self) -> list:
+        """ All column names that are not features, targets or predictions. """
+        return self.column_groups.aux_cols
 
     def __set_era_col(self):
         """ Each NumerFrame should have an era column to benefit from all functionality. """
@@ -109,6 +208,152 @@ class NumerFrame(pd.DataFrame):
         """ All columns that are not features, targets or predictions. """
         return self.get_column_selection(cols=self.aux_cols)
 
+    def compact_features(self, dtype=np.uint8) -> "NumerFrame":
+        """
+        Store all feature columns in one contiguous 2D array (rows x features).
+        Numerai int8 data (feature values 0...4) fits in uint8, which takes 8x less memory than float64. \n
+        Use .get_feature_array to retrieve features without copying. \n
+        :param dtype: NumPy dtype of the feature block. Conversion of feature values should be lossless.
+        """
+        features = self.feature_cols
+        block = np.empty((len(self), len(features)), dtype=dtype)
+        for i, col in enumerate(features):
+            values = self[col].values
+            block[:, i] = values
+            assert np.array_equal(block[:, i], values), \
+                f"Feature '{col}' can not be stored losslessly as {np.dtype(dtype)}."
+        return self.__from_feature_block(block, features, self.columns, self)
+
+    @staticmethod
+    def __from_feature_block(block: np.ndarray, features: list, columns: list,
+                             other: pd.DataFrame) -> "NumerFrame":
+        """ NumerFrame with all features stored in block and other columns from other (in order of columns). """
+        # Pandas stores the block as is, so the NumerFrame and block share memory.
+        compact = pd.DataFrame(block, index=other.index, columns=features, copy=False)
+        feature_set = set(features)
+        for pos, col in enumerate(columns):
+            if col not in feature_set:
+                compact.insert(pos, col, other[col].values)
+        num_frame = NumerFrame(compact)
+        num_frame._feature_block = (list(features), block)
+        num_frame._feature_cache = {}
+        return num_frame
+
+    def save(self, file_path: Union[str, Path]):
+        """
+        Save NumerFrame with metadata in Arrow IPC (Feather v2) format.
+        All JSON serializable metadata is stored in the file schema.
+        Compact features (see .compact_features) are stored as one contiguous block. \n
+        :param file_path: Path to output file (for example 'train.arrow').
+        """
+        import pyarrow as pa
+        feature_block = self.__get_feature_block()
+        if feature_block is not None:
+            features, block = feature_block
+            table = pa.Table.from_pandas(pd.DataFrame(self.drop(columns=features)), preserve_index=True)
+            column = pa.FixedSizeListArray.from_arrays(pa.array(block.reshape(-1)), len(features))
+            table = table.append_column(self.feature_block_col, column)
+        else:
+            features = []
+            table = pa.Table.from_pandas(pd.DataFrame(self), preserve_index=True)
+        serializable_meta = {}
+        for key, value in self.meta.items():
+            try:
+                serializable_meta[key] = json.loads(json.dumps(value))
+            except (TypeError, ValueError):
+                continue
+        metadata = {**(table.schema.metadata or {}),
+                    b"numerblox_meta": json.dumps(serializable_meta).encode(),
+                    b"numerblox_columns": json.dumps(self.columns.tolist()).encode(),
+                    b"numerblox_features": json.dumps(features).encode()}
+        table = table.replace_schema_metadata(metadata)
+        with pa.OSFile(str(file_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    @staticmethod
+    def load(file_path: Union[str, Path], memory_map: bool = True) -> "NumerFrame":
+        """
+        Load NumerFrame and metadata saved with .save. \n
+        With memory_map=True data is not copied into process memory, so the NumerFrame opens in milliseconds
+        and processes that map the same file share memory pages.
+        Memory mapped values are read-only. New columns can be added, but modifying values in place requires .copy(). \n
+        :param file_path: Path to file created with .save. \n
+        :param memory_map: Memory map file instead of reading it into memory.
+        """
+        import pyarrow as pa
+        assert Path(file_path).is_file(), f"{file_path} does not point to file."
+        source = pa.memory_map(str(file_path)) if memory_map else pa.OSFile(str(file_path))
+        with source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = table.schema.metadata or {}
+        if NumerFrame.feature_block_col in table.column_names:
+            features = json.loads(metadata[b"numerblox_features"])
+            columns = json.loads(metadata[b"numerblox_columns"])
+            column = table.column(NumerFrame.feature_block_col).combine_chunks()
+            block = column.flatten().to_numpy(zero_copy_only=True).reshape(len(column), len(features))
+            other = table.drop([NumerFrame.feature_block_col]).to_pandas(split_blocks=True)
+            num_frame = NumerFrame.__from_feature_block(block, features, columns, other)
+        else:
+            num_frame = NumerFrame(table.to_pandas(split_blocks=True))
+        num_frame.add_metadata(json.loads(metadata.get(b"numerblox_meta", b"{}")))
+        return num_frame
+
+    @property
+    def has_compact_features(self) -> bool:
+        """ Whether features are stored in one contiguous block (see .compact_features). """
+        return self.__get_feature_block() is not None
+
+    def get_feature_array(self, features: list = None, dtype=None) -> np.ndarray:
+        """
+        2D array with feature values (rows x features). \n
+        If features are stored compactly (see .compact_features) all features are returned without copying.
+        Casts to other dtypes and feature subsets are computed once and cached.
+        Call .reset_feature_cache after modifying feature values in place. \n
+        For other NumerFrames a new array is created on every call. \n
+        :param features: List of features to select. All by default. \n
+        :param dtype: NumPy dtype of output (for example np.float32). Keeps original dtype by default.
+        """
+        features = list(features) if features is not None else self.feature_cols
+        feature_block = self.__get_feature_block()
+        if feature_block is None:
+            return self[features].to_numpy(dtype=dtype)
+        block_features, block = feature_block
+        dtype = block.dtype if dtype is None else np.dtype(dtype)
+        is_block = features == block_features
+        if is_block and dtype == block.dtype:
+            return block
+        key = (tuple(features), dtype)
+        if key not in self._feature_cache:
+            if is_block:
+                self._feature_cache[key] = block.astype(dtype)
+            else:
+                block_positions = {col: i for i, col in enumerate(block_features)}
+                if not all(col in block_positions for col in features):
+                    return self[features].to_numpy(dtype=dtype)
+                positions = np.array([block_positions[col] for col in features], dtype=np.int64)
+                self._feature_cache[key] = block[:, positions].astype(dtype, copy=False)
+        return self._feature_cache[key]
+
+    def reset_feature_cache(self):
+        """ Free cached feature casts. Needed after modifying feature values in place (for example with .loc). """
+        self._feature_cache = {}
+
+    def __get_feature_block(self) -> Union[Tuple[list, np.ndarray], None]:
+        """ Compact feature block if it still holds the feature values of this NumerFrame. """
+        feature_block = getattr(self, "_feature_block", None)
+        if feature_block is None:
+            return None
+        block_features, block = feature_block
+        if len(block) != len(self) or not all(
+                col in self.columns and np.may_share_memory(self[col].values, block)
+                for col in block_features[:1] + block_features[-1:]):
+            self._feature_block, self._feature_cache = None, None
+            return None
+        if getattr(self, "_feature_cache", None) is None:
+            self._feature_cache = {}
+        return feature_block
+
     def get_feature_target_pair(self, multi_target=False) -> Tuple[Any, Any]:
         """
         Get split of feature and target columns.
@@ -119,6 +364,72 @@ class NumerFrame(pd.DataFrame):
         y = self.get_target_data if multi_target else self.get_single_target_data
         return X, y
 
+    @property
+    def era_index(self) -> Dict[Any, Union[slice, np.ndarray]]:
+        """
+        Mapping of each era to its row positions (in order of first appearance).
+        Computed once and reused until rows change. \n
+        Eras that are stored contiguously map to a slice. Other eras map to an array of row positions.
+        """
+        era_col = self.meta.era_col
+        cached = getattr(self, "_era_index", None)
+        if cached is None or cached[0] is not self.index or cached[1] != era_col:
+            cached = (self.index, era_col, create_era_index(self[era_col]))
+            self._era_index = cached
+        return cached[2]
+
+    def reset_era_index(self):
+        """ Invalidate era index. Only needed after modifying era values in place (for example with .loc). """
+        self._era_index = None
+
+    def get_era_positions(self, eras: List[Any]) -> Union[slice, np.ndarray]:
+        """
+        Row positions for one or more eras. Output can directly be used with .iloc. \n
+        A single slice is returned if all requested eras are stored next to each other. \n
+        :param eras: Selection of era names that should be present in era_col.
+        """
+        era_index = self.era_index
+        positions = []
+        for era in eras:
+            assert era in era_index, f"Era '{era}' not found in era column ({self.meta.era_col})"
+            positions.append(era_index[era])
+        return self.__merge_positions(positions)
+
+    def get_era_ranks(self, cols: list, method: str = "average", pct: bool = True, dtype=np.float32) -> np.ndarray:
+        """
+        Rank columns within every era (see rank_per_era). \n
+        :param cols: Columns to rank. \n
+        :param method: How to rank ties. 'average', 'min', 'max', 'dense' or 'first' (same as pd.DataFrame.rank). \n
+        :param pct: Divide ranks by the number of values in era. \n
+        :param dtype: NumPy dtype of output.
+        """
+        return rank_per_era(self[cols].to_numpy(), self.era_index, method=method, pct=pct, dtype=dtype)
+
+    def sort_by_era(self) -> "NumerFrame":
+        """
+        Reorder rows so every era is stored contiguously. Eras keep their order of first appearance.
+        Era lookups on the resulting NumerFrame are slice operations.
+        """
+        codes, _ = pd.factorize(self[self.meta.era_col])
+        return self.iloc[np.argsort(codes, kind="stable")]
+
+    @staticmethod
+    def __merge_positions(positions: list) -> Union[slice, np.ndarray]:
+        """ Combine slices and position arrays into one slice if possible. """
+        if positions and all(isinstance(pos, slice) for pos in positions) and \
+                all(prev.stop == nxt.start for prev, nxt in zip(positions[:-1], positions[1:])):
+            return slice(positions[0].start, positions[-1].stop)
+        return np.concatenate(
+            [np.arange(pos.start, pos.stop) if isinstance(pos, slice) else pos for pos in positions]
+        ).astype(np.int64) if positions else np.array([], dtype=np.int64)
+
+    def __get_column_positions(self, cols: list) -> np.ndarray:
+        """ Positions of columns. Raises KeyError for columns that are not present. """
+        positions = self.columns.get_indexer(cols)
+        if (positions < 0).any():
+            raise KeyError(f"Columns not found in NumerFrame: {[col for col, pos in zip(cols, positions) if pos < 0]}")
+        return positions
+
     def get_era_batch(self, eras: List[Any],
                       convert_to_tf = False,
                       aemlp_batch = False,
@@ -135,56 +446,445 @@ class NumerFrame(pd.DataFrame):
         :param targets: List of targets to select. All by default. \n
         *args, **kwargs are passed to initialization of Tensor.
         """
-        valid_eras = []
-        for era in eras:
-            assert era in self[self.meta.era_col].unique(), f"Era '{era}' not found in era column ({self.meta.era_col})"
-            valid_eras.append(era)
+        positions = self.get_era_positions(eras)
         features = features if features else self.feature_cols
         targets = targets if targets else self.target_cols
-        X = self.loc[self[self.meta.era_col].isin(valid_eras)][features].values
-        y = self.loc[self[self.meta.era_col].isin(valid_eras)][targets].values
-        if aemlp_batch:
-            y = [X.copy(), y.copy(), y.copy()]
-
+        if self.has_compact_features:
+            X = self.get_feature_array(features)[positions]
+        else:
+            X = self.iloc[positions, self.__get_column_positions(features)].values
+        y = self.iloc[positions, self.__get_column_positions(targets)].values
         if convert_to_tf:
+            import tensorflow as tf
             X = tf.convert_to_tensor(X, *args, **kwargs)
+            y = tf.convert_to_tensor(y, *args, **kwargs)
+            # Tensors are immutable so the AE-MLP target can reuse them without copies.
             if aemlp_batch:
-                y = [tf.convert_to_tensor(i, *args, **kwargs) for i in y]
-            else:
-                y = tf.convert_to_tensor(y, *args, **kwargs)
+                y = [X, y, y]
+        elif aemlp_batch:
+            y = [X.copy(), y.copy(), y.copy()]
         return X, y
 
-    def profile_report(self, *args, **kwargs) -> ProfileReport:
+    def profile_report(self, *args, **kwargs) -> "ProfileReport":
         """
         DataFrame profiling. Might take a while to generate for large datasets.
         For more info: https://pandas-profiling.github.io/pandas-profiling/docs/master/index.html
         *args, **kwargs will be passed to ProfileReport initialization.
         """
+        from pandas_profiling import ProfileReport
         return ProfileReport(self, *args, **kwargs)
 
 # Cell
-def create_numerframe(file_path: str, metadata: dict = None, columns: list = None, *args, **kwargs) -> NumerFrame:
+def create_numerframe(file_path: str, metadata: dict = None, columns: list = None, *args,
+                      eras: list = None, era_range: Tuple[Any, Any] = None, era_step: int = None,
+                      feature_set: str = None, features_path: str = None, era_col: str = "era",
+                      **kwargs) -> NumerFrame:
     """
     Convenient function to initialize NumerFrame.
     Support most used file formats for Pandas DataFrames (.csv, .parquet, .xls, etc.).
-    For more details check https://pandas.pydata.org/docs/reference/io.html
+    For more details check https://pandas.pydata.org/docs/reference/io.html \n
+    For .parquet files era selections are pushed down to the reader as row group filters
+    and feature sets as column projection, so only the required data is loaded.
 
     :param file_path: Relative or absolute path to data file. \n
     :param metadata: Metadata to be stored in NumerFrame.meta. \n
     :param columns: Which columns to read (All by default). \n
+    :param eras: Only load these eras. \n
+    :param era_range: Only load eras between (first_era, last_era) (inclusive).
+    Bounds should have the same type as the era column (for example '0001' for Numerai v4 data). \n
+    :param era_step: Only load every nth era (after applying eras/era_range). \n
+    :param feature_set: Name of feature set to load (for example 'small' or 'medium').
+    All non-feature columns are loaded in addition to the feature set (unless columns is specified). \n
+    :param features_path: Path to features.json which defines feature sets.
+    Defaults to features.json in the same directory as file_path. \n
+    :param era_col: Era column used for era selection. \n
     *args, **kwargs will be passed to Pandas loading function.
     """
     assert Path(file_path).is_file(), f"{file_path} does not point to file."
     suffix = Path(file_path).suffix
-    if suffix in [".csv"]:
-        dataf = pd.read_csv(file_path, usecols=columns, *args, **kwargs)
-    elif suffix in [".parquet"]:
+    select_eras = eras is not None or era_range is not None or era_step is not None
+    feature_cols = load_feature_set(feature_set, features_path if features_path else
+                                    Path(file_path).parent / "features.json") if feature_set else None
+    if suffix in [".parquet"]:
+        import pyarrow.parquet as pq
+        if feature_cols is not None:
+            columns = _project_feature_set(pq.read_schema(file_path), columns, feature_cols)
+        if select_eras:
+            assert "filters" not in kwargs, "Era selection can not be combined with custom 'filters'."
+            kwargs["filters"] = _era_filters(file_path, era_col, eras, era_range, era_step)
         dataf = pd.read_parquet(file_path, columns=columns, *args, **kwargs)
-    elif suffix in [".xls", ".xlsx", ".xlsm", "xlsb", ".odf", ".ods", ".odt"]:
-        dataf = pd.read_excel(file_path, usecols=columns, *args, **kwargs)
     else:
-        raise NotImplementedError(f"Suffix '{suffix}' is not supported.")
+        if feature_cols is not None:
+            keep = set(columns) if columns else None
+            feature_cols = set(feature_cols)
+            columns = lambda col: col in feature_cols or (col in keep if keep is not None
+                                                          else not str(col).startswith("feature"))
+        if suffix in [".csv"]:
+            dataf = pd.read_csv(file_path, usecols=columns, *args, **kwargs)
+        elif suffix in [".xls", ".xlsx", ".xlsm", "xlsb", ".odf", ".ods", ".odt"]:
+            dataf = pd.read_excel(file_path, usecols=columns, *args, **kwargs)
+        else:
+            raise NotImplementedError(f"Suffix '{suffix}' is not supported.")
+        if select_eras:
+            selected_eras = select_era_values(dataf[era_col].unique(), eras=eras,
+                                              era_range=era_range, era_step=era_step)
+            dataf = dataf[dataf[era_col].isin(selected_eras)]
     num_frame = NumerFrame(dataf)
     if metadata:
         num_frame.add_metadata(metadata)
-    return num_frame
\ No newline at end of file
+    return num_frame
+
+# Cell
+def load_feature_set(feature_set: str, features_path: Union[str, Path]) -> List[str]:
+    """
+    Get feature names for a named feature set from features.json. \n
+    :param feature_set: Name of feature set (for example 'small' or 'medium'). \n
+    :param features_path: Path to features.json.
+    """
+    assert Path(features_path).is_file(), f"Features file '{features_path}' not found."
+    with open(features_path) as json_file:
+        feature_json = json.load(json_file)
+    feature_sets = feature_json.get("feature_sets", feature_json)
+    assert feature_set in feature_sets, f"Feature set '{feature_set}' not found in '{features_path}'. Options are {list(feature_sets)}."
+    return feature_sets[feature_set]
+
+
+def select_era_values(all_eras: Union[list, np.ndarray], eras: list = None,
+                      era_range: Tuple[Any, Any] = None, era_step: int = None) -> list:
+    """
+    Select eras (sorted) from all available era values. \n
+    :param all_eras: All era values. Duplicates are allowed. \n
+    :param eras: Keep only these eras. \n
+    :param era_range: Keep eras between (first_era, last_era) (inclusive). \n
+    :param era_step: Keep every nth era after applying eras and era_range.
+    """
+    selected = np.sort(pd.unique(np.asarray(all_eras)))
+    if eras is not None:
+        selected = selected[np.isin(selected, list(eras))]
+    if era_range is not None:
+        first_era, last_era = era_range
+        selected = selected[(selected >= first_era) & (selected <= last_era)]
+    if era_step is not None:
+        assert era_step >= 1, f"era_step should be a positive integer. Got '{era_step}'."
+        selected = selected[::era_step]
+    return selected.tolist()
+
+
+def _era_filters(file_path: str, era_col: str, eras: list = None,
+                 era_range: Tuple[Any, Any] = None, era_step: int = None) -> list:
+    """ pyarrow filters for an era selection. Only reads the era column if era_step is used. """
+    if era_step is None:
+        filters = [(era_col, "in", list(eras))] if eras is not None else []
+        if era_range is not None:
+            filters += [(era_col, ">=", era_range[0]), (era_col, "<=", era_range[1])]
+        return filters
+    import pyarrow.parquet as pq
+    all_eras = pq.read_table(file_path, columns=[era_col]).column(era_col).unique().to_numpy(zero_copy_only=False)
+    return [(era_col, "in", select_era_values(all_eras, eras=eras, era_range=era_range, era_step=era_step))]
+
+
+def _project_feature_set(schema, columns: list, feature_cols: list) -> list:
+    """ Columns to read for a feature set. Loads all non-feature columns if no columns are specified. """
+    index_cols = [col for col in (schema.pandas_metadata or {}).get("index_columns", []) if isinstance(col, str)]
+    if not columns:
+        columns = [col for col in schema.names if not col.startswith("feature") and col not in index_cols]
+    missing = set(feature_cols) - set(schema.names)
+    assert not missing, f"{len(missing)} features of feature set not found in data. For example: {list(missing)[:5]}"
+    keep = set(columns)
+    return list(columns) + [col for col in feature_cols if col not in keep]
+
+# Cell
+def stream_numerframe(file_path: str, eras_per_chunk: int = 1, metadata: dict = None, columns: list = None,
+                      eras: list = None, era_range: Tuple[Any, Any] = None, era_step: int = None,
+                      feature_set: str = None, features_path: str = None,
+                      era_col: str = "era") -> Iterator[NumerFrame]:
+    """
+    Generator that yields NumerFrames of one or multiple complete eras from a .parquet file.
+    Data is read one row group at a time, so only a few eras are held in memory. \n
+    :param file_path: Relative or absolute path to .parquet file. \n
+    :param eras_per_chunk: Number of eras in every yielded NumerFrame. The last chunk can contain less eras. \n
+    :param metadata: Metadata to be stored in NumerFrame.meta. \n
+    :param columns: Which columns to read (All by default). Should include era_col. \n
+    :param eras: Only load these eras. \n
+    :param era_range: Only load eras between (first_era, last_era) (inclusive). \n
+    :param era_step: Only load every nth era (after applying eras/era_range). \n
+    :param feature_set: Name of feature set to load (for example 'small' or 'medium'). \n
+    :param features_path: Path to features.json which defines feature sets.
+    Defaults to features.json in the same directory as file_path. \n
+    :param era_col: Column that defines eras.
+    """
+    import pyarrow.parquet as pq
+    assert Path(file_path).suffix == ".parquet", f"Streaming is only supported for .parquet files. Got '{file_path}'."
+    assert eras_per_chunk >= 1, f"eras_per_chunk should be a positive integer. Got '{eras_per_chunk}'."
+    parquet_file = pq.ParquetFile(file_path)
+    if feature_set:
+        feature_cols = load_feature_set(feature_set, features_path if features_path else
+                                        Path(file_path).parent / "features.json")
+        columns = _project_feature_set(parquet_file.schema_arrow, columns, feature_cols)
+    assert columns is None or era_col in columns, f"columns should include era column '{era_col}'."
+    selected_eras = None
+    if eras is not None or era_range is not None or era_step is not None:
+        all_eras = parquet_file.read(columns=[era_col]).column(era_col).unique().to_numpy(zero_copy_only=False)
+        selected_eras = set(select_era_values(all_eras, eras=eras, era_range=era_range, era_step=era_step))
+    era_col_idx = parquet_file.schema_arrow.get_field_index(era_col)
+
+    def to_numerframe(dataf: pd.DataFrame) -> NumerFrame:
+        num_frame = NumerFrame(dataf)
+        if metadata:
+            num_frame.add_metadata(metadata)
+        return num_frame
+
+    pending, finished_eras = None, set()
+    for i in range(parquet_file.num_row_groups):
+        if selected_eras is not None and \
+                not _row_group_has_eras(parquet_file.metadata.row_group(i), era_col_idx, selected_eras):
+            continue
+        dataf = parquet_file.read_row_group(i, columns=columns, use_pandas_metadata=True).to_pandas()
+        if selected_eras is not None:
+            dataf = dataf[dataf[era_col].isin(selected_eras)]
+        # Empty row groups and row groups without selected eras (no statistics to skip them) add nothing.
+        if not len(dataf):
+            continue
+        pending = dataf if pending is None else pd.concat([pending, dataf])
+        era_index = create_era_index(pending[era_col])
+        era_list = list(era_index)
+        for era, positions in era_index.items():
+            assert isinstance(positions, slice) and era not in finished_eras, \
+                f"Era '{era}' is not stored contiguously in '{file_path}'. Use create_numerframe instead."
+        # Last era can continue in the next row group.
+        num_complete = (len(era_list) - 1) // eras_per_chunk * eras_per_chunk
+        for start in range(0, num_complete, eras_per_chunk):
+            chunk_eras = era_list[start:start + eras_per_chunk]
+            finished_eras.update(chunk_eras)
+            yield to_numerframe(pending.iloc[era_index[chunk_eras[0]].start:era_index[chunk_eras[-1]].stop])
+        if num_complete:
+            pending = pending.iloc[era_index[era_list[num_complete]].start:]
+    if pending is not None and len(pending):
+        era_index = create_era_index(pending[era_col])
+        era_list = list(era_index)
+        for start in range(0, len(era_list), eras_per_chunk):
+            chunk_eras = era_list[start:start + eras_per_chunk]
+            yield to_numerframe(pending.iloc[era_index[chunk_eras[0]].start:era_index[chunk_eras[-1]].stop])
+
+
+def _row_group_has_eras(row_group, era_col_idx: int, selected_eras: set) -> bool:
+    """ Use row group statistics to check if any selected era can be present in a row group. """
+    statistics = row_group.column(era_col_idx).statistics
+    if statistics is None or not statistics.has_min_max:
+        return True
+    return any(statistics.min <= era <= statistics.max for era in selected_eras)
+
+# Cell
+def create_era_index(eras: Union[pd.Series, np.ndarray]) -> Dict[Any, Union[slice, np.ndarray]]:
+    """
+    Map each era to its row positions in order of first appearance. \n
+    If all eras are stored contiguously every era maps to a slice.
+    Otherwise eras map to sorted arrays of row positions. Rows with a missing era are left out. \n
+    :param eras: Era value for every row.
+    """
+    codes, uniques = pd.factorize(eras)
+    uniques = uniques.tolist()
+    if len(codes) and not (codes < 0).any():
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        if len(boundaries) + 1 == len(uniques):
+            starts = [0] + boundaries.tolist()
+            stops = boundaries.tolist() + [len(codes)]
+            return {era: slice(start, stop) for era, start, stop in zip(uniques, starts, stops)}
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # Missing eras (code -1) are sorted first and dropped
+    order = np.argsort(codes, kind="stable")[len(codes) - counts.sum():]
+    return dict(zip(uniques, np.split(order, np.cumsum(counts)[:-1])))
+
+# Cell
+def rank_per_era(values: Union[np.ndarray, pd.DataFrame, pd.Series],
+                 era_index: Dict[Any, Union[slice, np.ndarray]] = None,
+                 method: str = "average", pct: bool = True, dtype=np.float32) -> np.ndarray:
+    """
+    Rank values within every era. All columns are ranked at once. \n
+    :param values: 1D or 2D (rows x columns) values to rank. \n
+    :param era_index: Mapping of eras to row positions (see create_era_index and NumerFrame.era_index).
+    Ranks over all rows if not given. \n
+    :param method: How to rank ties. 'average', 'min', 'max', 'dense' or 'first' (same as pd.DataFrame.rank). \n
+    :param pct: Divide ranks by the number of values in era (same as pd.DataFrame.rank(pct=True)). \n
+    :param dtype: NumPy dtype of output. \n
+    :return: Ranks with same shape as values. NaN values remain NaN.
+    """
+    assert method in ("average", "min", "max", "dense", "first"), f"Tie method '{method}' is not supported."
+    values = np.asarray(values)
+    is_1d = values.ndim == 1
+    values = values.reshape(len(values), -1)
+    ranks = np.full(values.shape, np.nan, dtype=dtype)
+    segments = era_index.values() if era_index is not None else [slice(0, len(values))]
+    for positions in segments:
+        segment = values[positions]
+        if not len(segment):
+            continue
+        is_nan = pd.isna(segment)
+        if not is_nan.any():
+            era_ranks = _rank_segment(segment, method)
+        else:
+            era_ranks = np.full(segment.shape, np.nan)
+            for col in range(segment.shape[1]):
+                valid = ~is_nan[:, col]
+                if valid.any():
+                    era_ranks[valid, col] = _rank_segment(segment[valid, col:col + 1], method)[:, 0]
+        if pct:
+            counts = np.nanmax(era_ranks, axis=0) if method == "dense" else (~is_nan).sum(axis=0)
+            era_ranks = era_ranks / counts
+        ranks[positions] = era_ranks
+    return ranks[:, 0] if is_1d else ranks
+
+
+def _rank_segment(segment: np.ndarray, method: str) -> np.ndarray:
+    """ Rank every column of a 2D array without NaNs. Columns are sorted as contiguous rows. """
+    values = np.ascontiguousarray(segment.T)
+    n = values.shape[1]
+    order = np.argsort(values, axis=1)
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    # Marks first element of every group of tied values.
+    new_group = np.empty(values.shape, dtype=bool)
+    new_group[:, 0] = True
+    np.not_equal(sorted_values[:, 1:], sorted_values[:, :-1], out=new_group[:, 1:])
+    positions = np.arange(1, n + 1, dtype=np.float64)
+    if method == "first":
+        # Ties keep their order of appearance, which requires a (slower) stable sort.
+        if not new_group.all():
+            order = np.argsort(values, axis=1, kind="stable")
+        sorted_ranks = np.broadcast_to(positions, values.shape)
+    elif method == "dense":
+        sorted_ranks = np.cumsum(new_group, axis=1, dtype=np.float64)
+    else:
+        first = np.maximum.accumulate(np.where(new_group, positions, 0), axis=1)
+        end_group = np.empty(values.shape, dtype=bool)
+        end_group[:, -1] = True
+        end_group[:, :-1] = new_group[:, 1:]
+        last = np.minimum.accumulate(np.where(end_group, positions, n)[:, ::-1], axis=1)[:, ::-1]
+        sorted_ranks = {"min": first, "max": last, "average": (first + last) / 2}[method]
+    ranks = np.empty(values.shape, dtype=np.float64)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+    return ranks.T
+
+# Cell
+class EraBatchLoader:
+    """
+    Iterate over (shuffled) era batches of a NumerFrame with background prefetching. \n
+    :param dataf: NumerFrame to load batches from. \n
+    :param eras_per_batch: Number of eras in every batch. \n
+    :param shuffle: Shuffle order of eras every epoch. \n
+    :param seed: Random seed for shuffling. \n
+    :param features: List of features to select. All by default. \n
+    :param targets: List of targets to select. All by default. \n
+    :param aemlp_batch: Target is (X, y, y) for autoencoder + MLP training. \n
+    :param prefetch: Maximum number of batches prepared ahead in a background thread.
+    0 prepares batches on the calling thread. \n
+    :param dtype: NumPy dtype of batches.
+    """
+    def __init__(self, dataf: NumerFrame, eras_per_batch: int = 1, shuffle: bool = True,
+                 seed: int = None, features: list = None, targets: list = None,
+                 aemlp_batch: bool = False, prefetch: int = 2, dtype=np.float32):
+        assert eras_per_batch >= 1, f"eras_per_batch should be a positive integer. Got '{eras_per_batch}'."
+        self.dataf = dataf
+        self.eras_per_batch = eras_per_batch
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.features = features if features else dataf.feature_cols
+        self.targets = targets if targets else dataf.target_cols
+        self.aemlp_batch = aemlp_batch
+        self.prefetch = prefetch
+        self.dtype = dtype
+        self.eras = list(dataf.era_index)
+        self.stats = {}
+
+    def __len__(self) -> int:
+        return int(np.ceil(len(self.eras) / self.eras_per_batch))
+
+    def __iter__(self) -> Iterator[tuple]:
+        era_batches = self.__get_era_batches()
+        tic, wait_seconds, num_batches = time.perf_counter(), 0., 0
+        if self.prefetch <= 0:
+            batches = (self.get_batch(eras) for eras in era_batches)
+        else:
+            batches = self.__prefetch(era_batches)
+        try:
+            while True:
+                wait_tic = time.perf_counter()
+                try:
+                    batch = next(batches)
+                except StopIteration:
+                    break
+                wait_seconds += time.perf_counter() - wait_tic
+                num_batches += 1
+                yield batch
+        finally:
+            batches.close()
+            seconds = time.perf_counter() - tic
+            self.stats = {"batches": num_batches, "seconds": seconds,
+                          "batches_per_second": num_batches / seconds if seconds else 0.,
+                          "wait_seconds": wait_seconds}
+
+    def get_batch(self, eras: list) -> tuple:
+        """
+        Feature target pair for a selection of eras.
+        :param eras: Selection of era names that should be present in era_col.
+        """
+        X, y = self.dataf.get_era_batch(eras, features=self.features, targets=self.targets)
+        X, y = X.astype(self.dtype, copy=False), y.astype(self.dtype, copy=False)
+        return (X, (X, y, y)) if self.aemlp_batch else (X, y)
+
+    def to_tf_dataset(self) -> "tf.data.Dataset":
+        """ Wrap loader as tf.data.Dataset. Every iteration over the dataset is a new (shuffled) epoch. """
+        import tensorflow as tf
+        X_spec = tf.TensorSpec(shape=(None, len(self.features)), dtype=tf.as_dtype(self.dtype))
+        y_spec = tf.TensorSpec(shape=(None, len(self.targets)), dtype=tf.as_dtype(self.dtype))
+        output_signature = (X_spec, (X_spec, y_spec, y_spec)) if self.aemlp_batch else (X_spec, y_spec)
+        return tf.data.Dataset.from_generator(self.__iter__, output_signature=output_signature)
+
+    def report(self):
+        """ Print input pipeline throughput of the last epoch. """
+        rich_print(f":stopwatch: {self.stats.get('batches', 0)} batches in {self.stats.get('seconds', 0.):.3f}s "
+                   f"({self.stats.get('batches_per_second', 0.):.1f} batches/s). "
+                   f"Waited {self.stats.get('wait_seconds', 0.):.3f}s on data loading. :stopwatch:")
+
+    def __get_era_batches(self) -> List[list]:
+        """ Split (shuffled) eras in batches. """
+        eras = [self.eras[i] for i in self.rng.permutation(len(self.eras))] if self.shuffle else self.eras
+        return [eras[i:i + self.eras_per_batch] for i in range(0, len(eras), self.eras_per_batch)]
+
+    def __prefetch(self, era_batches: List[list]) -> Iterator[tuple]:
+        """ Prepare batches in a background thread. Exceptions are raised on the calling thread. """
+        batch_queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            try:
+                for eras in era_batches:
+                    if not put(self.get_batch(eras)):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(done)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
\ No newline at end of file
@@ -7,15 +7,16 @@ __all__ = ['BasePostProcessor', 'Standardizer', 'MeanEnsembler', 'DonateWeighted
 import scipy
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 import scipy.stats as sp
+from typing import Union
 from tqdm.auto import tqdm
 from typeguard import typechecked
 from rich import print as rich_print
 from scipy.stats.mstats import gmean
 from sklearn.preprocessing import MinMaxScaler
 
-from .numerframe import NumerFrame, create_numerframe
+from .misc import get_backend
+from .numerframe import NumerFrame, create_numerframe, rank_per_era
 from .preprocessing import BaseProcessor, display_processor_info
 
 # Cell
@@ -53,7 +54,7 @@ class Standardizer(BasePostProcessor):
     @display_processor_info
     def transform(self, dataf: NumerFrame) -> NumerFrame:
         cols = dataf.prediction_cols if not self.cols else self.cols
-        dataf.loc[:, cols] = dataf.groupby(dataf.meta.era_col)[cols].rank(pct=True)
+        dataf.loc[:, cols] = dataf.get_era_ranks(cols, pct=True)
         return NumerFrame(dataf)
 
 # Cell
@@ -79,7 +80,7 @@ class MeanEnsembler(BasePostProcessor):
     def transform(self, dataf: NumerFrame) -> NumerFrame:
         cols = self.cols if self.cols else dataf.prediction_cols
         if self.standardize:
-            to_average = dataf.groupby(dataf.meta.era_col)[cols].rank(pct=True)
+            to_average = pd.DataFrame(dataf.get_era_ranks(cols, pct=True), index=dataf.index)
         else:
             to_average = dataf[cols]
         dataf.loc[:, self.final_col_name] = to_average.mean(axis=1)
@@ -164,7 +165,9 @@ class FeatureNeutralizer(BasePostProcessor):
     :param suffix: Optional suffix that is added to new column name. \n
     :param cuda: Do neutralization on the GPU \n
     Make sure you have CuPy installed when setting cuda to True. \n
-    Installation docs: docs.cupy.dev/en/stable/install.html
+    Installation docs: docs.cupy.dev/en/stable/install.html \n
+    :param num_cores: Number of threads to divide eras over (CPU only).
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`).
     """
     def __init__(
         self,
@@ -172,7 +175,8 @@ class FeatureNeutralizer(BasePostProcessor):
         pred_name: str = "prediction",
         proportion: float = 0.5,
         suffix: str = None,
-        cuda = False
+        cuda = False,
+        num_cores: int = None
     ):
         self.pred_name = pred_name
         self.proportion = proportion
@@ -188,13 +192,29 @@ class FeatureNeutralizer(BasePostProcessor):
 
         self.feature_names = feature_names
         self.cuda = cuda
+        self.num_cores = num_cores
 
     @display_processor_info
     def transform(self, dataf: NumerFrame) -> NumerFrame:
         feature_names = self.feature_names if self.feature_names else dataf.feature_cols
-        neutralized_preds = dataf.groupby(dataf.meta.era_col).apply(
-            lambda x: self.normalize_and_neutralize(x, [self.pred_name], feature_names)
-        )
+        # Zero-copy if features are stored compactly. Eras are cast to float64 one at a time.
+        features = dataf.get_feature_array(feature_names)
+        # Rank predictions within all eras at once.
+        ranks = rank_per_era(dataf[self.pred_name].values, dataf.era_index,
+                             method="first", pct=False, dtype=np.float64)
+        neutralized_preds = np.zeros((len(dataf), 1))
+        neutralization_func = self._neutralize_cpu if not self.cuda else self._neutralize_gpu
+
+        def neutralize_era(positions: Union[slice, np.ndarray]):
+            era_ranks = ranks[positions].reshape(-1, 1)
+            scores = sp.norm.ppf((era_ranks - 0.5) / len(era_ranks))
+            exposures = features[positions].astype(np.float64)
+            neutralized_preds[positions] = neutralization_func(scores, exposures)
+
+        # Eras are independent. Threads write into neutralized_preds directly, so processes are not supported.
+        backend = get_backend(n_workers=1 if self.cuda else self.num_cores, n_tasks=len(dataf.era_index),
+                              supported=("serial", "threads"))
+        backend.map(neutralize_era, dataf.era_index.values())
         dataf.loc[:, self.new_col_name] = MinMaxScaler().fit_transform(
             neutralized_preds
         )
@@ -209,20 +229,28 @@ class FeatureNeutralizer(BasePostProcessor):
     def neutralize(self, dataf: pd.DataFrame, columns: list, by: list) -> pd.DataFrame:
         """ Neutralize on CPU. """
         scores = dataf[columns]
-        exposures = dataf[by].values
+        neutralized = self._neutralize_cpu(scores.values, dataf[by].values)
+        return pd.DataFrame(neutralized, index=scores.index, columns=scores.columns)
+
+    def neutralize_cuda(self, dataf: pd.DataFrame, columns: list, by: list) -> np.ndarray:
+        """ Neutralize on GPU. """
+        return self._neutralize_gpu(dataf[columns].values, dataf[by].values)
+
+    def _neutralize_cpu(self, scores: np.ndarray, exposures: np.ndarray) -> np.ndarray:
+        """ Neutralize scores (rows x columns) against exposures (rows x features) on CPU. """
         scores = scores - self.proportion * exposures.dot(
             np.linalg.pinv(exposures).dot(scores)
         )
-        return scores / scores.std()
+        return scores / scores.std(axis=0, ddof=1)
 
-    def neutralize_cuda(self, dataf: pd.DataFrame, columns: list, by: list) -> np.ndarray:
-        """ Neutralize on GPU. """
+    def _neutralize_gpu(self, scores: np.ndarray, exposures: np.ndarray) -> np.ndarray:
+        """ Neutralize scores (rows x columns) against exposures (rows x features) on GPU. """
         try:
             import cupy
         except ImportError:
             raise ImportError("CuPy not installed. Set cuda=False or install CuPy. Installation docs: docs.cupy.dev/en/stable/install.html")
-        scores = cupy.array(dataf[columns].values)
-        exposures = cupy.array(dataf[by].values)
+        scores = cupy.array(scores)
+        exposures = cupy.array(exposures)
         scores = scores - self.proportion * exposures.dot(
             cupy.linalg.pinv(exposures).dot(scores)
         )
@@ -230,7 +258,8 @@ class FeatureNeutralizer(BasePostProcessor):
 
     @staticmethod
     def normalize(dataf: pd.DataFrame) -> np.ndarray:
-        normalized_ranks = (dataf.rank(method="first") - 0.5) / len(dataf)
+        ranks = rank_per_era(dataf.values, method="first", pct=False, dtype=np.float64)
+        normalized_ranks = (ranks - 0.5) / len(dataf)
         return sp.norm.ppf(normalized_ranks)
 
     def normalize_and_neutralize(
@@ -246,6 +275,7 @@ class FeatureNeutralizer(BasePostProcessor):
 class FeaturePenalizer(BasePostProcessor):
     """
     Feature penalization with TensorFlow.
+    TensorFlow is only imported when FeaturePenalizer is initialized.
 
     Source (by jrb): https://github.com/jonrtaylor/twitch/blob/master/FE_Clipping_Script.ipynb
 
@@ -275,6 +305,7 @@ class FeaturePenalizer(BasePostProcessor):
         super().__init__(final_col_name=self.new_col_name)
 
         self.feature_names = feature_names
+        self.__init_tf_functions()
 
     @display_processor_info
     def transform(self, dataf: NumerFrame) -> NumerFrame:
@@ -295,19 +326,20 @@ class FeaturePenalizer(BasePostProcessor):
         normalize=True,
         gaussianize=True,
     ) -> pd.DataFrame:
+        import tensorflow as tf
         if neutralizers is None:
             neutralizers = [x for x in dataf.columns if x.startswith("feature")]
-        neutralized = []
+        neutralized = np.zeros((len(dataf), 1))
 
-        for era in tqdm(dataf[dataf.meta.era_col].unique()):
-            dataf_era = dataf[dataf[dataf.meta.era_col] == era]
+        for era, positions in tqdm(dataf.era_index.items()):
+            dataf_era = dataf.iloc[positions]
             scores = dataf_era[[column]].values
             exposure_values = dataf_era[neutralizers].values
 
             if normalize:
                 scores2 = []
                 for x in scores.T:
-                    x = (scipy.stats.rankdata(x, method="ordinal") - 0.5) / len(x)
+                    x = (rank_per_era(x, method="first", pct=False, dtype=np.float64) - 0.5) / len(x)
                     if gaussianize:
                         x = scipy.stats.norm.ppf(x)
                     scores2.append(x)
@@ -320,14 +352,15 @@ class FeaturePenalizer(BasePostProcessor):
             scores /= tf.math.reduce_std(scores)
             scores -= tf.reduce_min(scores)
             scores /= tf.reduce_max(scores)
-            neutralized.append(scores.numpy())
+            neutralized[positions] = scores.numpy()
 
         predictions = pd.DataFrame(
-            np.concatenate(neutralized), columns=[column], index=dataf.index
+            neutralized, columns=[column], index=dataf.index
         )
         return predictions
 
     def _reduce_exposure(self, prediction, features, input_size=50, weights=None):
+        import tensorflow as tf
         model = tf.keras.models.Sequential(
             [
                 tf.keras.layers.Input(input_size),
@@ -338,7 +371,7 @@ class FeaturePenalizer(BasePostProcessor):
         pred = tf.convert_to_tensor(prediction, dtype=tf.float32)
         if weights is None:
             optimizer = tf.keras.optimizers.Adamax()
-            start_exp = self.__exposures(feats, pred[:, None])
+            start_exp = self._exposures(feats, pred[:, None])
             target_exps = tf.clip_by_value(
                 start_exp, -self.max_exposure, self.max_exposure
             )
@@ -349,15 +382,21 @@ class FeaturePenalizer(BasePostProcessor):
 
     def _train_loop(self, model, optimizer, feats, pred, target_exps):
         for i in range(1000000):
-            loss, grads = self.__train_loop_body(model, feats, pred, target_exps)
+            loss, grads = self._train_loop_body(model, feats, pred, target_exps)
             optimizer.apply_gradients(zip(grads, model.trainable_variables))
             if loss < 1e-7:
                 break
 
-    @tf.function(experimental_relax_shapes=True)
+    def __init_tf_functions(self):
+        """ Compile TensorFlow graph functions used in the penalization training loop. """
+        import tensorflow as tf
+        self._train_loop_body = tf.function(self.__train_loop_body, experimental_relax_shapes=True)
+        self._exposures = tf.function(self.__exposures, experimental_relax_shapes=True, experimental_compile=True)
+
     def __train_loop_body(self, model, feats, pred, target_exps):
+        import tensorflow as tf
         with tf.GradientTape() as tape:
-            exps = self.__exposures(feats, pred[:, None] - model(feats, training=True))
+            exps = self._exposures(feats, pred[:, None] - model(feats, training=True))
             loss = tf.reduce_sum(
                 tf.nn.relu(tf.nn.relu(exps) - tf.nn.relu(target_exps))
                 + tf.nn.relu(tf.nn.relu(-exps) - tf.nn.relu(-target_exps))
@@ -365,8 +404,8 @@ class FeaturePenalizer(BasePostProcessor):
         return loss, tape.gradient(loss, model.trainable_variables)
 
     @staticmethod
-    @tf.function(experimental_relax_shapes=True, experimental_compile=True)
     def __exposures(x, y):
+        import tensorflow as tf
         x = x - tf.math.reduce_mean(x, axis=0)
         x = x / tf.norm(x, axis=0)
         y = y - tf.math.reduce_mean(y, axis=0)
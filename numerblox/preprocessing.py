@@ -1,33 +1,39 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: nbs/03_preprocessing.ipynb (unless otherwise specified).
 
-__all__ = ['BaseProcessor', 'display_processor_info', 'CopyPreProcessor', 'FeatureSelectionPreProcessor',
-           'TargetSelectionPreProcessor', 'ReduceMemoryProcessor', 'SyntheticDataGenerator',
-           'BayesianGMMTargetProcessor', 'GroupStatsPreProcessor', 'TalibFeatureGenerator', 'KatsuFeatureGenerator',
-           'EraQuantileProcessor', 'AwesomePreProcessor']
+__all__ = ['BaseProcessor', 'MetricsRegistry', 'metrics_registry', 'display_processor_info', 'CopyPreProcessor',
+           'FeatureSelectionPreProcessor', 'TargetSelectionPreProcessor', 'ReduceMemoryProcessor',
+           'SyntheticDataGenerator', 'BayesianGMMTargetProcessor', 'FeatureGroupStatsPreProcessor',
+           'GroupStatsPreProcessor', 'TalibFeatureGenerator', 'KatsuFeatureGenerator', 'quantile_per_era',
+           'quantile_edges', 'apply_quantile_edges', 'EraQuantileProcessor', 'AwesomePreProcessor']
 
 # Cell
 import os
-import sdv
+import sys
+import json
 import time
+import threading
+import contextvars
+import tracemalloc
 import warnings
 import numpy as np
 import pandas as pd
 import datetime as dt
 from pathlib import Path
 from tqdm.auto import tqdm
-from functools import wraps
-from scipy.stats import rankdata
+from functools import wraps, partial
+from collections import deque
+from contextlib import contextmanager
+from scipy.signal import lfilter
+from scipy.linalg.blas import dsyrk
 from typeguard import typechecked
 from abc import ABC, abstractmethod
 from rich import print as rich_print
-from typing import Union, List, Tuple
-from multiprocessing.pool import Pool
-from sklearn.linear_model import Ridge
+from typing import Union, List, Tuple, Dict, Any
 from sklearn.mixture import BayesianGaussianMixture
-from sklearn.preprocessing import QuantileTransformer
 
+from .misc import get_backend, SerialBackend, SHARED_MEMORY_AVAILABLE
 from .download import NumeraiClassicDownloader
-from .numerframe import NumerFrame, create_numerframe
+from .numerframe import NumerFrame, ColumnGroupRegistry, create_numerframe, create_era_index, rank_per_era
 
 # Cell
 class BaseProcessor(ABC):
@@ -47,16 +53,163 @@ class BaseProcessor(ABC):
     ) -> NumerFrame:
         return self.transform(dataf=dataf, *args, **kwargs)
 
+# Cell
+class MetricsRegistry:
+    """
+    In-process registry of performance metrics for processing steps. \n
+    Every step decorated with `display_processor_info` is recorded with wall time, CPU time, peak memory,
+    rows/s and bytes in/out. Use `.labels` to attach labels (like a pipeline name) to all steps recorded in a block. \n
+    :param max_records: Maximum number of records to keep. The oldest records are dropped first.
+    """
+
+    def __init__(self, max_records: int = 100_000):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._labels = contextvars.ContextVar("metric_labels", default={})
+
+    @contextmanager
+    def labels(self, **labels):
+        """ Attach labels to all steps recorded inside this context. Nested labels are merged. """
+        token = self._labels.set({**self._labels.get(), **labels})
+        try:
+            yield self
+        finally:
+            self._labels.reset(token)
+
+    def record(self, **metrics) -> dict:
+        """ Add a record with current labels and return it. """
+        record = {"timestamp": time.time(), **self._labels.get(), **metrics}
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def get_records(self, **labels) -> List[dict]:
+        """
+        All records matching labels. \n
+        :param labels: Label values to filter on. A list, tuple or set matches any of its values.
+        """
+        with self._lock:
+            records = list(self.records)
+        for key, value in labels.items():
+            values = set(value) if isinstance(value, (list, tuple, set)) else {value}
+            records = [record for record in records if record.get(key) in values]
+        return records
+
+    def to_frame(self, **labels) -> pd.DataFrame:
+        """ Records matching labels as DataFrame (one row per step call). """
+        return pd.DataFrame(self.get_records(**labels))
+
+    def summary(self, by: List[str] = None, **labels) -> pd.DataFrame:
+        """
+        Aggregated metrics per step sorted by total wall time (slowest step first). \n
+        :param by: Labels to group by. ['pipeline', 'stage', 'step'] by default. \n
+        :param labels: Only aggregate records matching these labels.
+        """
+        by = by if by else ["pipeline", "stage", "step"]
+        records = self.to_frame(**labels)
+        if records.empty:
+            return pd.DataFrame()
+        for col in by:
+            records[col] = records[col].fillna("") if col in records else ""
+        metric_cols = ["wall_seconds", "cpu_seconds", "rows_in", "bytes_in", "bytes_out",
+                       "peak_rss_bytes", "peak_rss_delta_bytes", "tracemalloc_peak_bytes"]
+        records[metric_cols] = records[metric_cols].astype(np.float64)
+        summary = records.groupby(by, sort=False).agg(
+            calls=("wall_seconds", "size"), wall_seconds=("wall_seconds", "sum"),
+            mean_wall_seconds=("wall_seconds", "mean"), max_wall_seconds=("wall_seconds", "max"),
+            cpu_seconds=("cpu_seconds", "sum"), rows_in=("rows_in", "sum"),
+            bytes_in=("bytes_in", "sum"), bytes_out=("bytes_out", "sum"),
+            peak_rss_bytes=("peak_rss_bytes", "max"), peak_rss_delta_bytes=("peak_rss_delta_bytes", "max"),
+            tracemalloc_peak_bytes=("tracemalloc_peak_bytes", "max"),
+        )
+        summary["rows_per_second"] = summary["rows_in"] / summary["wall_seconds"]
+        return summary.sort_values("wall_seconds", ascending=False)
+
+    def to_json(self, path: Union[str, Path] = None, **labels) -> str:
+        """
+        All records matching labels as JSON. \n
+        :param path: Optionally write JSON to this file.
+        """
+        output = json.dumps(self.get_records(**labels), default=str)
+        if path:
+            Path(path).write_text(output)
+        return output
+
+    def to_prometheus(self, path: Union[str, Path] = None, by: List[str] = None, prefix: str = "numerblox", **labels) -> str:
+        """
+        Aggregated metrics (see .summary) in Prometheus text exposition format. \n
+        :param path: Optionally write output to this file (for example for the node exporter textfile collector). \n
+        :param by: Labels to aggregate over. ['pipeline', 'stage', 'step'] by default. \n
+        :param prefix: Prefix for all metric names.
+        """
+        summary = self.summary(by=by, **labels)
+        metrics = [("calls", "counter", "Number of calls of processing step."),
+                   ("wall_seconds", "counter", "Total wall time of processing step."),
+                   ("cpu_seconds", "counter", "Total CPU time of this process during processing step."),
+                   ("rows_in", "counter", "Total input rows of processing step."),
+                   ("bytes_in", "counter", "Total input bytes of processing step."),
+                   ("bytes_out", "counter", "Total output bytes of processing step."),
+                   ("peak_rss_bytes", "gauge", "Peak resident set size of this process after processing step."),
+                   ("peak_rss_delta_bytes", "gauge", "Largest increase of peak resident set size during processing step."),
+                   ("tracemalloc_peak_bytes", "gauge", "Largest traced memory peak above start of processing step."),
+                   ("rows_per_second", "gauge", "Input rows per second of wall time for processing step.")]
+        lines = []
+        for metric, metric_type, description in metrics:
+            name = f"{prefix}_step_{metric}{'_total' if metric_type == 'counter' else ''}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+            for keys, value in summary[metric].items() if not summary.empty else []:
+                if pd.isna(value):
+                    continue
+                keys = keys if isinstance(keys, tuple) else (keys,)
+                label_str = ",".join(f'{label}="{self._escape_label(key)}"' for label, key in zip(summary.index.names, keys))
+                lines.append(f"{name}{{{label_str}}} {value:.10g}")
+        output = "\n".join(lines) + "\n"
+        if path:
+            Path(path).write_text(output)
+        return output
+
+    def reset(self):
+        """ Remove all records. """
+        with self._lock:
+            self.records.clear()
+
+    @staticmethod
+    def _escape_label(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics_registry = MetricsRegistry()
+
 # Cell
 def display_processor_info(func):
-    """Fancy console output for data processing."""
+    """Fancy console output for data processing. Performance metrics of every call are recorded in `metrics_registry`."""
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        tic = dt.datetime.now()
+        # Measure input before the step as steps can add columns in place.
+        dataf_in = next((arg for arg in [*args, *kwargs.values()] if isinstance(arg, pd.DataFrame)), None)
+        rows_in, bytes_in = _data_size(dataf_in)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            traced_start = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        rss_start = _peak_rss_bytes()
+        tic, cpu_tic = time.perf_counter(), time.process_time()
         result = func(*args, **kwargs)
-        time_taken = str(dt.datetime.now() - tic)
-        class_name = func.__qualname__.split(".")[0]
+        wall_seconds, cpu_seconds = time.perf_counter() - tic, time.process_time() - cpu_tic
+        rss_end = _peak_rss_bytes()
+        rows_out, bytes_out = _data_size(result)
+        class_name = type(args[0]).__name__ if args and "." in func.__qualname__ else func.__qualname__.split(".")[0]
+        metrics_registry.record(
+            step=class_name, method=func.__name__, model_name=getattr(args[0], "model_name", None) if args else None,
+            wall_seconds=wall_seconds, cpu_seconds=cpu_seconds,
+            rows_in=rows_in, rows_out=rows_out, bytes_in=bytes_in, bytes_out=bytes_out,
+            rows_per_second=rows_in / wall_seconds if rows_in is not None and wall_seconds > 0 else None,
+            peak_rss_bytes=rss_end, peak_rss_delta_bytes=rss_end - rss_start if rss_end is not None else None,
+            tracemalloc_peak_bytes=tracemalloc.get_traced_memory()[1] - traced_start if tracing else None,
+        )
+        time_taken = str(dt.timedelta(seconds=wall_seconds))
         rich_print(
             f":white_check_mark: Finished step [bold]{class_name}[/bold]. Output shape={result.shape}. Time taken for step: [blue]{time_taken}[/blue]. :white_check_mark:"
         )
@@ -64,6 +217,26 @@ def display_processor_info(func):
 
     return wrapper
 
+
+def _data_size(data) -> Tuple[Union[int, None], Union[int, None]]:
+    """ Number of rows and bytes (without Python object contents) of a DataFrame or array. """
+    if isinstance(data, pd.DataFrame):
+        return len(data), int(data.memory_usage(index=True, deep=False).sum())
+    if isinstance(data, np.ndarray):
+        return len(data), int(data.nbytes)
+    return None, None
+
+
+def _peak_rss_bytes() -> Union[int, None]:
+    """ Peak resident set size of this process. None on platforms without the resource module (Windows). """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes on Linux.
+    return int(peak_rss) if sys.platform == "darwin" else int(peak_rss) * 1024
+
 # Cell
 @typechecked
 class CopyPreProcessor(BaseProcessor):
@@ -128,12 +301,27 @@ class ReduceMemoryProcessor(BaseProcessor):
     Credits to kainsama and others for writing about memory usage reduction for Numerai data:
     https://forum.numer.ai/t/reducing-memory/313
 
+    A dtype plan is created from the minimum and maximum of all numeric columns (computed in one vectorized pass): \n
+    - Integer columns get the smallest (unsigned) integer type that fits all values. \n
+    - Feature columns that only contain whole numbers in [0, 255] (like Numerai int8 features in [0...4]) become uint8. \n
+    - Other float feature columns become float32. \n
+    - Target, prediction and other float columns only become float32 if no precision is lost. \n
+    The dtype plan can be saved with .save_plan and passed to a new ReduceMemoryProcessor,
+    so weekly live runs apply it directly without scanning the data.
+    Integer dtypes of a given plan are checked against the data first. Columns with missing, fractional or out of range
+    values become float32 (float columns) or keep their dtype (integer columns).
+
     :param deep_mem_inspect: Introspect the data deeply by interrogating object dtypes.
-    Yields a more accurate representation of memory usage if you have complex object columns.
+    Yields a more accurate representation of memory usage if you have complex object columns. \n
+    :param dtype_plan: Mapping of column names to dtypes or path to JSON file created with .save_plan.
+    Data is not scanned if a plan is given.
     """
-    def __init__(self, deep_mem_inspect = False):
+    def __init__(self, deep_mem_inspect = False, dtype_plan: Union[Dict[str, str], str, Path] = None):
         super().__init__()
         self.deep_mem_inspect = deep_mem_inspect
+        self.dtype_plan = self.load_plan(dtype_plan) if isinstance(dtype_plan, (str, Path)) else dtype_plan
+        self.latest_plan = None
+        self.stats = {}
 
     @display_processor_info
     def transform(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
@@ -142,56 +330,173 @@ class ReduceMemoryProcessor(BaseProcessor):
 
     def _reduce_mem_usage(self, dataf: pd.DataFrame) -> pd.DataFrame:
         """
-        Iterate through all columns and modify the numeric column types
-        to reduce memory usage.
+        Plan dtypes for all numeric columns (or use given plan) and convert all columns at once.
         """
         start_memory_usage = dataf.memory_usage(deep=self.deep_mem_inspect).sum() / 1024**2
         rich_print(f"Memory usage of DataFrame is [bold]{round(start_memory_usage, 2)} MB[/bold]")
 
-        for col in dataf.columns:
-            col_type = dataf[col].dtype.name
-
-            if col_type not in ['object', 'category', 'datetime64[ns, UTC]','datetime64[ns]']:
-                c_min = dataf[col].min()
-                c_max = dataf[col].max()
-                if str(col_type)[:3] == 'int':
-                    if c_min > np.iinfo(np.int8).min and c_max < np.iinfo(np.int8).max:
-                        dataf[col] = dataf[col].astype(np.int16)
-                    elif c_min > np.iinfo(np.int16).min and c_max < np.iinfo(np.int16).max:
-                        dataf[col] = dataf[col].astype(np.int16)
-                    elif c_min > np.iinfo(np.int32).min and c_max < np.iinfo(np.int32).max:
-                        dataf[col] = dataf[col].astype(np.int32)
-                    elif c_min > np.iinfo(np.int64).min and c_max < np.iinfo(np.int64).max:
-                        dataf[col] = dataf[col].astype(np.int64)
-                else:
-                    if c_min > np.finfo(np.float16).min and c_max < np.finfo(np.float16).max:
-                        dataf[col] = dataf[col].astype(np.float16)
-                    elif c_min > np.finfo(np.float32).min and c_max < np.finfo(np.float32).max:
-                        dataf[col] = dataf[col].astype(np.float32)
-                    else:
-                        dataf[col] = dataf[col].astype(np.float64)
+        tic = time.perf_counter()
+        self.latest_plan = self.dtype_plan if self.dtype_plan is not None else self.plan_dtypes(dataf)
+        plan_seconds = time.perf_counter() - tic
+        conversions = {col: dtype for col, dtype in self.latest_plan.items()
+                       if col in dataf.columns and dataf[col].dtype != dtype}
+        fallback_cols = []
+        if self.dtype_plan is not None:
+            conversions, fallback_cols = self.__fit_plan(dataf, conversions)
+        if conversions:
+            dataf = dataf.astype(conversions)
+        convert_seconds = time.perf_counter() - tic - plan_seconds
 
         end_memory_usage = dataf.memory_usage(deep=self.deep_mem_inspect).sum() / 1024**2
         rich_print(f"Memory usage after optimization is: [bold]{round(end_memory_usage, 2)} MB[/bold]")
         rich_print(f"[green] Usage decreased by [bold]{round(100 * (start_memory_usage - end_memory_usage) / start_memory_usage, 2)}%[/bold][/green]")
+        rich_print(f"Converted {len(conversions)} columns. Planning took [blue]{plan_seconds:.3f}s[/blue], conversion took [blue]{convert_seconds:.3f}s[/blue].")
+        self.stats = {"start_memory_mb": start_memory_usage, "end_memory_mb": end_memory_usage,
+                      "plan_seconds": plan_seconds, "convert_seconds": convert_seconds,
+                      "converted_columns": len(conversions), "plan_fallback_columns": fallback_cols}
         return dataf
 
+    def plan_dtypes(self, dataf: pd.DataFrame) -> Dict[str, str]:
+        """
+        Create dtype plan (column name -> dtype name) for all numeric columns. \n
+        :param dataf: DataFrame to scan.
+        """
+        numeric_cols = [col for col, dtype in dataf.dtypes.items()
+                        if isinstance(dtype, np.dtype) and dtype.kind in "iuf"]
+        if not numeric_cols or dataf.empty:
+            return {}
+        # Block-wise reductions over all numeric columns without copying data.
+        mins = dataf[numeric_cols].min() if dataf.columns.has_duplicates else dataf.min(numeric_only=True)
+        maxs = dataf[numeric_cols].max() if dataf.columns.has_duplicates else dataf.max(numeric_only=True)
+
+        plan, whole_candidates, float_features, other_floats = {}, [], [], []
+        for col in numeric_cols:
+            dtype, c_min, c_max = dataf[col].dtype, mins[col], maxs[col]
+            if pd.isna(c_min) or pd.isna(c_max):
+                continue
+            if dtype.kind in "iu":
+                plan[col] = self.__smallest_int_dtype(c_min, c_max)
+            elif ColumnGroupRegistry.classify(col) == "feature":
+                if 0 <= c_min and c_max <= np.iinfo(np.uint8).max:
+                    whole_candidates.append(col)
+                else:
+                    float_features.append(col)
+            elif dtype.itemsize > 4:
+                other_floats.append(col)
+
+        whole_cols = self.__check_columns(dataf, whole_candidates, lambda x: (x == np.round(x)).all(axis=0))
+        plan.update({col: "uint8" for col in whole_cols})
+        whole_set = set(whole_cols)
+        float_features += [col for col in whole_candidates if col not in whole_set]
+        plan.update({col: "float32" for col in float_features if dataf[col].dtype.itemsize > 4})
+        lossless_cols = self.__check_columns(
+            dataf, other_floats, lambda x: ((x.astype(np.float32) == x) | np.isnan(x)).all(axis=0))
+        plan.update({col: "float32" for col in lossless_cols})
+        return plan
+
+    def save_plan(self, file_path: Union[str, Path], plan: Dict[str, str] = None):
+        """
+        Save dtype plan to JSON file. \n
+        :param file_path: Path to output JSON file. \n
+        :param plan: Dtype plan to save. Uses plan of the latest transform by default.
+        """
+        plan = plan if plan is not None else self.latest_plan
+        assert plan is not None, "No dtype plan to save. Run transform or plan_dtypes first."
+        Path(file_path).write_text(json.dumps(plan))
+
+    @staticmethod
+    def load_plan(file_path: Union[str, Path]) -> Dict[str, str]:
+        """
+        Load dtype plan from JSON file.
+        The plan can also be passed to pandas loading functions (for example create_numerframe(path, dtype=plan) for .csv). \n
+        :param file_path: Path to JSON file created with .save_plan.
+        """
+        assert Path(file_path).is_file(), f"Dtype plan '{file_path}' not found."
+        return json.loads(Path(file_path).read_text())
+
+    @staticmethod
+    def __smallest_int_dtype(c_min, c_max) -> str:
+        """ Smallest integer dtype that can hold all values. Unsigned if there are no negative values. """
+        candidates = [np.uint8, np.uint16, np.uint32, np.uint64] if c_min >= 0 else [np.int8, np.int16, np.int32, np.int64]
+        for dtype in candidates:
+            if np.iinfo(dtype).min <= c_min and c_max <= np.iinfo(dtype).max:
+                return np.dtype(dtype).name
+        return "int64"
+
+    def __fit_plan(self, dataf: pd.DataFrame, conversions: Dict[str, str]) -> Tuple[Dict[str, str], list]:
+        """ Replace integer conversions of a given plan that do not fit the data (see class docstring). Also returns replaced columns. """
+        int_cols = [col for col, dtype in conversions.items() if np.dtype(dtype).kind in "iu"]
+        if not int_cols or dataf.empty:
+            return conversions, []
+        # Block-wise reductions. Duplicate column names are reduced to one value per name.
+        mins = dataf[int_cols].min().groupby(level=0).min()
+        maxs = dataf[int_cols].max().groupby(level=0).max()
+        in_range = [col for col in int_cols if np.iinfo(conversions[col]).min <= mins[col] and
+                    maxs[col] <= np.iinfo(conversions[col]).max]
+        # NaN is never equal to itself, so columns with missing values are not whole
+        float_cols = [col for col in in_range if dataf[col].dtype.kind == "f"]
+        whole_cols = set(self.__check_columns(dataf, float_cols, lambda x: (x == np.round(x)).all(axis=0)))
+        invalid = [col for col in int_cols if col not in in_range or (col in float_cols and col not in whole_cols)]
+        if invalid:
+            rich_print(f":warning: [red]{len(invalid)} columns do not fit the integer dtypes of the plan[/red] "
+                       f"(missing, fractional or out of range values): {invalid[:5]}{'...' if len(invalid) > 5 else ''}")
+        conversions = dict(conversions)
+        for col in invalid:
+            if dataf[col].dtype.kind == "f" and dataf[col].dtype.itemsize > 4:
+                conversions[col] = "float32"
+            else:
+                del conversions[col]
+        return conversions, invalid
+
+    @staticmethod
+    def __check_columns(dataf: pd.DataFrame, cols: list, check, max_elements: int = 2**25) -> list:
+        """ Columns for which check holds. Processes a limited number of values at a time to bound memory. """
+        passed = []
+        chunk_size = max(1, max_elements // max(len(dataf), 1))
+        for start in range(0, len(cols), chunk_size):
+            chunk = cols[start:start + chunk_size]
+            mask = check(dataf[chunk].to_numpy())
+            passed += [col for col, is_valid in zip(chunk, mask) if is_valid]
+        return passed
+
 # Cell
 class SyntheticDataGenerator(BaseProcessor):
     """
-    Generate synthetic eras. Uses SDV (sdv.dev) under the hood.
+    Generate synthetic eras. Uses SDV (sdv.dev) under the hood. \n
+    Eras are sampled in parallel processes. Every era gets its own seed (derived from seed),
+    so results do not depend on the number of processes.
 
     :param model_name: Exact class name of a model supported on sdv. \n
     :param model_path: Either: \n
     1. Path to trained model. \n
     2. Path to where you want to save the fitted model. \n
-    If model_path does not point to a valid file, a new model will be initialized, fitted and saved.
+    If model_path does not point to a valid file, a new model will be initialized, fitted and saved. \n
+    :param rows_per_era: Number of rows to sample for every synthetic era. \n
+    :param eras_to_add: Number of synthetic eras to generate. \n
+    :param num_cores: Number of processes to sample eras with.
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`).
+    Seeds are set per process, so eras are sampled in worker processes or serially (never in threads).
+    Global random states of the calling process are restored after fitting and sampling. \n
+    :param seed: Seed from which a seed for every synthetic era is derived. \n
+    :param fit_rows_per_era: Fit new model on a random sample of at most this many rows from every era.
+    Fits on all rows by default. \n
+    :param output_path: Directory to write synthetic eras to as parquet dataset (one file per era).
+    Synthetic eras are then not added to the NumerFrame, so memory usage does not grow with the number of eras.
+    By default synthetic eras are added to the NumerFrame.
     """
     SUPPORTED_MODELS = ["GaussianCopula", "CTGAN", "CopulaGAN", "TVAE"]
+    # Models loaded in worker processes (by model path)
+    _worker_models = {}
+
     def __init__(self, model_path: str,
                  model_name = "CTGAN",
                  rows_per_era: int = 5400,
-                 eras_to_add: int = 1):
+                 eras_to_add: int = 1,
+                 num_cores: int = None,
+                 seed: int = 0,
+                 fit_rows_per_era: int = None,
+                 output_path: Union[str, Path] = None):
+        self.__check_sdv_import()
         super().__init__()
         self.model_name = model_name
         assert self.model_name in self.SUPPORTED_MODELS,\
@@ -199,76 +504,190 @@ class SyntheticDataGenerator(BaseProcessor):
         self.model_path = Path(model_path)
         self.rows_per_era = rows_per_era
         self.eras_to_add = eras_to_add
+        self.num_cores = num_cores
+        self.seed = seed
+        self.fit_rows_per_era = fit_rows_per_era
+        self.output_path = Path(output_path) if output_path else None
 
     @display_processor_info
     def transform(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
         model = self.prepare_model(dataf=dataf)
-        synth_datafs = []
-        for era_n in tqdm(range(self.eras_to_add), desc="Generating synthetic eras"):
-            synth_era_data = self.get_synthetic_batch(model=model)
-            synth_era_data.loc[:, dataf.meta.era_col] = f"synth_{str(era_n).zfill(4)}"
-            synth_datafs.append(synth_era_data)
-
-        synth_dataf = pd.concat(synth_datafs)
+        era_col = dataf.meta.era_col
+        if self.output_path:
+            self.output_path.mkdir(parents=True, exist_ok=True)
+        seeds = [int(seq.generate_state(1)[0]) for seq in np.random.SeedSequence(self.seed).spawn(self.eras_to_add)]
+        tasks = [(f"synth_{str(era_n).zfill(4)}", era_seed, era_col) for era_n, era_seed in enumerate(seeds)]
+        backend = get_backend(n_workers=self.num_cores, n_tasks=len(tasks), default="processes",
+                              supported=("serial", "processes"))
+        rich_print(f"Generating {len(tasks)} synthetic eras using {backend.n_workers} processes.")
+        # Worker processes load the saved model once and only get the era name and seed of every era
+        generate_era = partial(self._generate_era, model=model) if isinstance(backend, SerialBackend) else self._generate_era
+        results = backend.map(generate_era, tasks, desc="Generating synthetic eras")
+        if self.output_path:
+            rich_print(f"Synthetic eras written to '{self.output_path}'.")
+            return NumerFrame(dataf)
+        synth_dataf = pd.concat(results)
         dataf = pd.concat([dataf, synth_dataf])
         return NumerFrame(dataf)
 
     def prepare_model(self, dataf: Union[pd.DataFrame, NumerFrame]):
+        import sdv
         if self.model_path.is_file():
             rich_print(f"Loading '{self.model_name}' model from '{self.model_path}'.")
             model = getattr(sdv.tabular, self.model_name).load(self.model_path)
         else:
             rich_print(f":warning: Model path '{self.model_path}' does not point to a file. Initializing, fitting and saving new model. :warning:")
             model = getattr(sdv.tabular, self.model_name)()
-            model.fit(dataf)
+            with self.__seeded(self.seed):
+                model.fit(self.get_fit_sample(dataf))
             model.save(self.model_path)
         return model
 
+    def get_fit_sample(self, dataf: Union[pd.DataFrame, NumerFrame]) -> pd.DataFrame:
+        """
+        Era-stratified random sample of at most fit_rows_per_era rows from every era.
+        Returns all data if fit_rows_per_era is not set.
+        """
+        if self.fit_rows_per_era is None:
+            return dataf
+        rng = np.random.default_rng(self.seed)
+        all_positions = np.arange(len(dataf))
+        sample_positions = []
+        for positions in create_era_index(dataf[dataf.meta.era_col]).values():
+            era_positions = all_positions[positions]
+            size = min(self.fit_rows_per_era, len(era_positions))
+            sample_positions.append(np.sort(rng.choice(era_positions, size=size, replace=False)))
+        return dataf.iloc[np.concatenate(sample_positions)]
+
     def get_synthetic_batch(self, model) -> pd.DataFrame:
         synthetic_dataf = model.sample(num_rows=self.rows_per_era)
         return synthetic_dataf
 
+    def _generate_era(self, task: tuple, model=None) -> Union[pd.DataFrame, Path]:
+        """
+        Sample one synthetic era with its own seed.
+        Returns era or path to parquet file of era if output_path is set.
+        """
+        import sdv
+        era_name, era_seed, era_col = task
+        if model is None:
+            key = str(self.model_path)
+            if key not in self._worker_models:
+                self._worker_models[key] = getattr(sdv.tabular, self.model_name).load(self.model_path)
+            model = self._worker_models[key]
+        with self.__seeded(era_seed):
+            synth_era_data = self.get_synthetic_batch(model=model)
+        synth_era_data.loc[:, era_col] = era_name
+        if self.output_path:
+            file_path = self.output_path / f"{era_name}.parquet"
+            synth_era_data.to_parquet(file_path)
+            return file_path
+        return synth_era_data
+
+    @staticmethod
+    @contextmanager
+    def __seeded(seed: int):
+        """ Seed all random number generators used by SDV models inside this context and restore their states afterwards. """
+        import random
+        try:
+            import torch
+        except ImportError:
+            torch = None
+        states = random.getstate(), np.random.get_state(), torch.get_rng_state() if torch is not None else None
+        random.seed(seed)
+        np.random.seed(seed)
+        if torch is not None:
+            torch.manual_seed(seed)
+        try:
+            yield
+        finally:
+            random.setstate(states[0])
+            np.random.set_state(states[1])
+            if torch is not None:
+                torch.set_rng_state(states[2])
+
+    @staticmethod
+    def __check_sdv_import():
+        try:
+            import sdv
+        except ImportError:
+            raise ImportError(
+                "SDV is not installed for this environment. If you are using this class make sure to have SDV installed. check https://sdv.dev/SDV/getting_started/install.html for instructions on installation."
+            )
+
 # Cell
 class BayesianGMMTargetProcessor(BaseProcessor):
     """
     Generate synthetic (fake) target using a Bayesian Gaussian Mixture model. \n
     Based on Michael Oliver's GitHub Gist implementation: \n
-    https://gist.github.com/the-moliver/dcdd2862dc2c78dda600f1b449071c93
+    https://gist.github.com/the-moliver/dcdd2862dc2c78dda600f1b449071c93 \n
+    Ridge coefficients of every era are solved in closed form from the Gram matrices of the era (XᵀX, Xᵀy).
+    Eras are processed in batches that are divided over threads (or processed serially, see `numerblox.misc.get_backend`).
 
     :param target_col: Column from which to create fake target. \n
-    :param n_components: Number of components for fitting Bayesian Gaussian Mixture Model.
+    :param n_components: Number of components for fitting Bayesian Gaussian Mixture Model. \n
+    :param n_targets: Number of fake targets to generate.
+    One target is added as 'fake_{target_col}'. Multiple targets are added as 'fake_{target_col}_0', 'fake_{target_col}_1', etc. \n
+    :param alpha: Regularization strength of ridge regression per era (same as sklearn Ridge). \n
+    :param num_cores: Number of threads to divide eras over.
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`).
     """
-    def __init__(self, target_col: str = "target", n_components: int = 6):
+    def __init__(self, target_col: str = "target", n_components: int = 6, n_targets: int = 1,
+                 alpha: float = 1.0, num_cores: int = None):
         super().__init__()
         self.target_col = target_col
         self.n_components = n_components
-        self.ridge = Ridge(fit_intercept=False)
+        self.n_targets = n_targets
+        self.alpha = alpha
+        self.num_cores = num_cores
         self.bins = [0, 0.05, 0.25, 0.75, 0.95, 1]
 
     @display_processor_info
     def transform(self, dataf: NumerFrame, *args, **kwargs) -> NumerFrame:
-        all_eras = dataf[dataf.meta.era_col].unique()
-        coefs = self._get_coefs(dataf=dataf, all_eras=all_eras)
+        all_eras = list(dataf.era_index)
+        # Zero-copy if features are stored compactly (NumerFrame.compact_features).
+        features = dataf.get_feature_array()
+        coefs = self._get_coefs(dataf=dataf, all_eras=all_eras, features=features)
         bgmm = self._fit_bgmm(coefs=coefs)
-        fake_target = self._generate_target(dataf=dataf,
-                                            bgmm=bgmm,
-                                            all_eras=all_eras)
-        dataf[f"fake_{self.target_col}"] = fake_target
+        fake_targets = self._generate_target(dataf=dataf,
+                                             bgmm=bgmm,
+                                             all_eras=all_eras,
+                                             features=features,
+                                             n_targets=self.n_targets)
+        if self.n_targets == 1:
+            dataf[f"fake_{self.target_col}"] = fake_targets[:, 0]
+        else:
+            dataf[[f"fake_{self.target_col}_{i}" for i in range(self.n_targets)]] = fake_targets
         return NumerFrame(dataf)
 
-    def _get_coefs(self, dataf: NumerFrame, all_eras: list) -> np.ndarray:
+    def _get_coefs(self, dataf: NumerFrame, all_eras: list, features: np.ndarray = None) -> np.ndarray:
         """
         Generate coefficients for BGMM.
         Data should already be scaled between 0 and 1
         (Already done with Numerai Classic data)
         """
-        coefs = []
-        for era in all_eras:
-            features, target = self.__get_features_target(dataf=dataf, era=era)
-            self.ridge.fit(features, target)
-            coefs.append(self.ridge.coef_)
-        stacked_coefs = np.vstack(coefs)
-        return stacked_coefs
+        features = features if features is not None else dataf.get_feature_array()
+        target = dataf[self.target_col].values
+        n_features = features.shape[1]
+        # Bound memory of stacked Gram matrices per batch (~128MB)
+        batch_size = max(1, 2**24 // n_features**2)
+        batches = [all_eras[i:i + batch_size] for i in range(0, len(all_eras), batch_size)]
+
+        def solve_batch(eras: list) -> np.ndarray:
+            grams = np.empty((len(eras), n_features, n_features))
+            moments = np.empty((len(eras), n_features, 1))
+            for i, era in enumerate(eras):
+                era_features, era_target = self.__get_features_target(dataf=dataf, era=era, features=features,
+                                                                      target=target)
+                era_features = np.asfortranarray(era_features, dtype=np.float64)
+                # Symmetric rank-k update only computes the lower triangle of XᵀX
+                lower = dsyrk(1.0, era_features, trans=1, lower=1)
+                grams[i] = lower + np.tril(lower, -1).T
+                np.matmul(era_features.T, era_target, out=moments[i, :, 0])
+            grams[:, np.arange(n_features), np.arange(n_features)] += self.alpha
+            return np.linalg.solve(grams, moments)[..., 0]
+
+        return np.vstack(self.__map_batches(solve_batch, batches))
 
     def _fit_bgmm(self, coefs: np.ndarray) -> BayesianGaussianMixture:
         """
@@ -282,30 +701,209 @@ class BayesianGMMTargetProcessor(BaseProcessor):
 
     def _generate_target(self, dataf: NumerFrame,
                          bgmm: BayesianGaussianMixture,
-                         all_eras: list) -> np.ndarray:
-        """ Generate fake target using Bayesian Gaussian Mixture model. """
-        fake_target = []
-        for era in tqdm(all_eras, desc="Generating fake target"):
-            features, _ = self.__get_features_target(dataf=dataf, era=era)
-            # Sample a set of weights from GMM
-            beta, _ = bgmm.sample(1)
-            # Create fake continuous target
-            fake_targ = features @ beta[0]
-            # Bin fake target like real target
-            fake_targ = (rankdata(fake_targ) - .5) / len(fake_targ)
-            fake_targ = (np.digitize(fake_targ, self.bins) - 1) / 4
-            fake_target.append(fake_targ)
-        return np.concatenate(fake_target)
-
-    def __get_features_target(self, dataf: NumerFrame, era) -> tuple:
+                         all_eras: list, features: np.ndarray = None, n_targets: int = 1) -> np.ndarray:
+        """
+        Generate fake targets using Bayesian Gaussian Mixture model.
+        For every era n_targets sets of weights are sampled and applied in one matrix multiplication. \n
+        :return: Array of shape (rows x n_targets).
+        """
+        features = features if features is not None else dataf.get_feature_array()
+        target = dataf[self.target_col].values
+        fake_target = np.zeros((len(dataf), n_targets))
+        # Sample sets of weights from GMM for every era (in random order since samples are sorted by component)
+        betas, _ = bgmm.sample(len(all_eras) * n_targets)
+        betas = betas[np.random.permutation(len(betas))].reshape(len(all_eras), n_targets, -1)
+
+        def generate_batch(batch: list):
+            for i, era in batch:
+                era_features, _ = self.__get_features_target(dataf=dataf, era=era, features=features, target=target)
+                # Create fake continuous targets
+                fake_targ = era_features @ betas[i].T
+                # Bin fake targets like real target
+                fake_targ = (rank_per_era(fake_targ, pct=False, dtype=np.float64) - .5) / len(fake_targ)
+                fake_targ = (np.digitize(fake_targ, self.bins) - 1) / 4
+                fake_target[dataf.era_index[era]] = fake_targ
+
+        n_workers = self.__get_backend(n_tasks=len(all_eras)).n_workers
+        batches = np.array_split(np.arange(len(all_eras)), max(1, min(n_workers * 4, len(all_eras))))
+        self.__map_batches(generate_batch, [[(i, all_eras[i]) for i in batch] for batch in batches],
+                           desc="Generating fake target")
+        return fake_target
+
+    def __map_batches(self, func, batches: list, desc: str = None) -> list:
+        """ Apply func to every batch of eras. Batches are divided over threads if there are multiple workers. """
+        return self.__get_backend(n_tasks=len(batches)).map(func, batches, desc=desc)
+
+    def __get_backend(self, n_tasks: int):
+        """ Batch functions write into shared arrays of this process, so only threads or serial processing are supported. """
+        return get_backend(n_workers=self.num_cores, n_tasks=n_tasks, supported=("serial", "threads"))
+
+    def __get_features_target(self, dataf: NumerFrame, era, features: np.ndarray = None,
+                              target: np.ndarray = None) -> tuple:
         """ Get features and target for one era and center data. """
-        sub_df = dataf[dataf.era == era]
-        features = sub_df.get_feature_data
-        target = sub_df[self.target_col]
-        features = features.values - .5
-        target = target.values - .5
+        positions = dataf.era_index[era]
+        features = features if features is not None else dataf.get_feature_array()
+        target = target if target is not None else dataf[self.target_col].values
+        features = features[positions] - .5
+        target = target[positions] - .5
         return features, target
 
+# Cell
+class FeatureGroupStatsPreProcessor(BaseProcessor):
+    """
+    Group statistics for feature groups of any Numerai Classic version (for example the v4 feature groups in features.json). \n
+    Column positions of all groups are resolved once per feature layout. Mean, standard deviation and skew
+    (and optionally quantiles) of all groups are computed in one pass over the feature array in row chunks.
+    Small integer (compact) features are summed exactly with integer arithmetic. Results match pandas .mean, .std and .skew over columns. \n
+    :param feature_groups: Dictionary mapping group names to feature names or path to features.json.
+    All feature sets in features.json (under 'feature_sets' if present) are available as groups. \n
+    :param groups: Groups to create features for. All groups in feature_groups by default. \n
+    :param quantiles: Quantiles (between 0 and 1) to add for every group as 'feature_{group}_q{100 * q}'. \n
+    :param dtype: dtype of the new features.
+    """
+
+    def __init__(self, feature_groups: Union[Dict[str, List[str]], str, Path], groups: list = None,
+                 quantiles: list = None, dtype=np.float32):
+        super().__init__()
+        if not isinstance(feature_groups, dict):
+            feature_groups = self.load_feature_groups(feature_groups)
+        groups = groups if groups else list(feature_groups)
+        missing_groups = [group for group in groups if group not in feature_groups]
+        assert not missing_groups, f"Groups {missing_groups} not found. Options are {list(feature_groups)}."
+        self.feature_groups = {group: list(feature_groups[group]) for group in groups}
+        assert all(self.feature_groups.values()), "Feature groups should not be empty."
+        self.quantiles = list(quantiles) if quantiles else []
+        assert all(0 <= q <= 1 for q in self.quantiles), f"Quantiles should be between 0 and 1. Got '{self.quantiles}'."
+        self.dtype = dtype
+        self.stat_names = ["mean", "std", "skew"] + [f"q{100 * q:g}" for q in self.quantiles]
+        self._positions = {}
+
+    @display_processor_info
+    def transform(self, dataf: NumerFrame, *args, **kwargs) -> NumerFrame:
+        """Add group statistics for all groups."""
+        dataf = NumerFrame(dataf)
+        order, starts = self.__resolve_positions(dataf.feature_cols)
+        stats = self.get_group_stats(dataf.get_feature_array(), order, starts)
+        new_cols = [f"feature_{group}_{stat}" for group in self.feature_groups for stat in self.stat_names]
+        dataf[new_cols] = stats.reshape(len(dataf), -1)
+        return NumerFrame(dataf)
+
+    def get_group_stats(self, feature_array: np.ndarray, order: Union[np.ndarray, slice], starts: np.ndarray) -> np.ndarray:
+        """
+        Statistics with shape (rows x groups x stats). \n
+        :param feature_array: 2D array with all features (rows x features). \n
+        :param order: Feature positions of all groups after each other (or a slice if this is a contiguous range). \n
+        :param starts: Start of every group in order.
+        """
+        n_columns = len(range(feature_array.shape[1])[order]) if isinstance(order, slice) else len(order)
+        ends = np.append(starts[1:], n_columns)
+        chunk_size = max(1, 2 ** 20 // n_columns)
+        output = np.empty((len(feature_array), len(starts), len(self.stat_names)), dtype=self.dtype)
+        # Counts and power sums for every row and group with the shift of every row.
+        power_sums = np.empty((4, len(feature_array), len(starts)), dtype=np.float64)
+        shifts = np.empty((len(feature_array), 1), dtype=np.float64)
+        for start in range(0, len(feature_array), chunk_size):
+            chunk = feature_array[start:start + chunk_size]
+            ordered = chunk[:, order] if isinstance(order, slice) else np.take(chunk, order, axis=1)
+            *sums, shifts[start:start + len(chunk)] = self._power_sums(ordered, starts)
+            power_sums[:, start:start + len(chunk)] = np.broadcast_arrays(*sums)
+            for i, (group_start, group_end) in enumerate(zip(starts, ends)):
+                if self.quantiles:
+                    output[start:start + len(chunk), i, 3:] = self._quantiles(ordered[:, group_start:group_end], self.quantiles)
+        output[:, :, :3] = self._moment_stats(*power_sums, shifts)
+        return output
+
+    @staticmethod
+    def _power_sums(ordered: np.ndarray, starts: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Non-NaN counts and sums of values, squares and cubes for every group after shifting all values by a constant.
+        Statistics are shift invariant and shifting towards the center keeps power sums small.
+        Small byte integers (like v4 int8 features) are summed exactly in integer arithmetic without float conversion.
+        """
+        if ordered.dtype.itemsize == 1 and ordered.dtype.kind in "iu" and ordered.size:
+            low, high = int(ordered.min()), int(ordered.max())
+            # Shifted values in [-5, 5] fit in int8 and their cubes in int16.
+            if high - low <= 10:
+                shift = (low + high) // 2
+                # Columns x rows so groups are reduced with vectorized row additions.
+                values = (ordered - ordered.dtype.type(shift)).view(np.int8).T.astype(np.int16)
+                counts = np.diff(np.append(starts, ordered.shape[1]))[None, :].astype(np.float64)
+                powers = values * values
+                sums = [np.add.reduceat(x, starts, axis=0, dtype=np.int32).T for x in [values, powers, powers * values]]
+                return (counts, *[x.astype(np.float64) for x in sums], shift)
+        values = ordered.astype(np.float64)
+        valid = ~np.isnan(values)
+        shift = np.nanmean(values) if valid.any() else 0.
+        values -= shift
+        values[~valid] = 0
+        counts = np.add.reduceat(valid, starts, axis=1, dtype=np.int64).astype(np.float64)
+        powers = values * values
+        sums = [np.add.reduceat(x, starts, axis=1) for x in [values, powers, powers * values]]
+        return (counts, *sums, shift)
+
+    @staticmethod
+    def _quantiles(group_values: np.ndarray, quantiles: list) -> np.ndarray:
+        """ Quantiles (rows x quantiles) ignoring NaNs with linear interpolation (as np.quantile). """
+        is_byte_integer = group_values.dtype.itemsize == 1 and group_values.dtype.kind in "iu"
+        # Stable sort is a radix sort for byte integers. NaNs are sorted last.
+        sorted_values = np.sort(group_values, axis=1, kind="stable" if is_byte_integer else "quicksort")
+        if sorted_values.dtype.kind == "f":
+            counts = (~np.isnan(sorted_values)).sum(axis=1, keepdims=True)
+        else:
+            counts = np.full((len(sorted_values), 1), sorted_values.shape[1])
+        positions = (counts - 1) * np.asarray(quantiles, dtype=np.float64)
+        below = np.floor(positions).clip(0).astype(np.int64)
+        above = np.minimum(below + 1, np.maximum(counts - 1, 0))
+        low = np.take_along_axis(sorted_values, below, axis=1).astype(np.float64)
+        high = np.take_along_axis(sorted_values, above, axis=1).astype(np.float64)
+        result = low + (positions - below) * (high - low)
+        result[counts[:, 0] == 0] = np.nan
+        return result
+
+    @staticmethod
+    def _moment_stats(counts: np.ndarray, s1: np.ndarray, s2: np.ndarray, s3: np.ndarray,
+                      shift: Union[float, np.ndarray]) -> np.ndarray:
+        """ Mean, standard deviation (ddof=1) and bias corrected skew (as pandas) from power sums. """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Sums of squared and cubed deviations. Exact for integer power sums.
+            m2 = (counts * s2 - s1 * s1) / counts
+            m3 = (counts * counts * s3 - 3 * counts * s1 * s2 + 2 * s1 * s1 * s1) / (counts * counts)
+            m2[np.abs(m2) < 1e-14] = 0
+            m3[np.abs(m3) < 1e-14] = 0
+            mean = s1 / counts + shift
+            std = np.sqrt(np.maximum(m2, 0) / (counts - 1))
+            skew = counts * np.sqrt(counts - 1) / (counts - 2) * m3 / (m2 * np.sqrt(m2))
+        std[counts < 2] = np.nan
+        skew[m2 == 0] = 0
+        skew[counts < 3] = np.nan
+        return np.stack([mean, std, skew], axis=-1)
+
+    def __resolve_positions(self, feature_cols: list) -> Tuple[Union[np.ndarray, slice], np.ndarray]:
+        """ Positions of group features in feature_cols with groups after each other. Computed once for every feature layout. """
+        key = tuple(feature_cols)
+        if key not in self._positions:
+            col_positions = {col: i for i, col in enumerate(feature_cols)}
+            missing = sorted({col for features in self.feature_groups.values() for col in features} - set(col_positions))
+            assert not missing, f"{len(missing)} group features not found in data. For example: {missing[:5]}."
+            group_positions = [[col_positions[col] for col in dict.fromkeys(features)] for features in self.feature_groups.values()]
+            order = np.concatenate(group_positions)
+            starts = np.cumsum([0] + [len(positions) for positions in group_positions[:-1]])
+            # Groups covering a contiguous range of columns are read as a view.
+            if np.all(np.diff(order) == 1):
+                order = slice(order[0], order[-1] + 1)
+            self._positions[key] = (order, starts)
+        return self._positions[key]
+
+    @staticmethod
+    def load_feature_groups(features_path: Union[str, Path]) -> Dict[str, List[str]]:
+        """
+        All feature sets in features.json as groups. \n
+        :param features_path: Path to features.json (or a feature set file in assets/feature_sets).
+        """
+        assert Path(features_path).is_file(), f"Features file '{features_path}' not found."
+        with open(features_path) as json_file:
+            feature_json = json.load(json_file)
+        return feature_json.get("feature_sets", feature_json)
 
 # Cell
 class GroupStatsPreProcessor(BaseProcessor):
@@ -360,17 +958,23 @@ class TalibFeatureGenerator(BaseProcessor):
     Input DataFrames for these functions should have the following columns defined:
     ['open', 'high', 'low', 'close', 'volume'] \n
     Make sure that all values are sorted in chronological order (by ticker). \n
+    Transform computes all features for a ticker in a single pass over its HLOCV arrays.
+    Tickers are divided over a process pool by default. Inputs and the float32 output block are shared between processes.
+    On Python < 3.8 (no multiprocessing.shared_memory) a thread pool is used instead. \n
     :param windows: List of ranges for window features.
     Windows will be applied for all features specified in self.window_features. \n
-    :param ticker_col: Which column to groupby for feature generation.
+    :param ticker_col: Which column to groupby for feature generation. \n
+    :param num_cores: Number of processes to compute features with.
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`).
     """
 
-    def __init__(self, windows: List[int], ticker_col: str = "bloomberg_ticker"):
+    def __init__(self, windows: List[int], ticker_col: str = "bloomberg_ticker", num_cores: int = None):
         self.__check_talib_import()
         super().__init__()
 
         self.windows = windows
         self.ticker_col = ticker_col
+        self.num_cores = num_cores
         self.window_features = [
             "NATR",
             "ADXR",
@@ -396,11 +1000,17 @@ class TalibFeatureGenerator(BaseProcessor):
         self.no_window_features = ["AD", "OBV", "APO", "MACD", "PPO"]
         self.hlocv_cols = ["open", "high", "low", "close", "volume"]
 
+    @property
+    def feature_names(self) -> List[str]:
+        """ Names of all generated features in output order. """
+        window_names = [f"feature_{func}_{win}" for win in self.windows for func in self.window_features]
+        return list(dict.fromkeys([f"feature_{func}" for func in self.no_window_features] + window_names))
+
     def get_no_window_features(self, dataf: pd.DataFrame):
         for func in tqdm(self.no_window_features, desc="No window features"):
             dataf.loc[:, f"feature_{func}"] = (
                 dataf.groupby(self.ticker_col)
-                .apply(lambda x: pd.Series(self._no_window(x, func)).bfill())
+                .apply(lambda x: pd.Series(self._no_window(self.__get_inputs(x), func)).bfill())
                 .values.astype(np.float32)
             )
         return dataf
@@ -410,33 +1020,71 @@ class TalibFeatureGenerator(BaseProcessor):
             for func in tqdm(self.window_features, position=1):
                 dataf.loc[:, f"feature_{func}_{win}"] = (
                     dataf.groupby(self.ticker_col)
-                    .apply(lambda x: pd.Series(self._window(x, func, win)).bfill())
+                    .apply(lambda x: pd.Series(self._window(self.__get_inputs(x), func, win)).bfill())
                     .values.astype(np.float32)
                 )
         return dataf
 
     def get_all_features(self, dataf: pd.DataFrame) -> pd.DataFrame:
-        dataf = self.get_no_window_features(dataf)
-        dataf = self.get_window_features(dataf)
+        """
+        Compute all features in a single pass per ticker.
+        HLOCV arrays of every ticker are extracted once and all features are written into one float32 block.
+        """
+        codes, _ = pd.factorize(dataf[self.ticker_col])
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        ticker_positions = np.split(order, np.cumsum(np.bincount(codes[order]))[:-1]) if len(order) else []
+        feature_names = self.feature_names
+        hlocv = np.ascontiguousarray(dataf[self.hlocv_cols].values.T, dtype=np.float64)
+        # Workers write into output, which needs shared memory for the process backend (Python 3.8+)
+        default, supported = ("processes", ("serial", "threads", "processes")) if SHARED_MEMORY_AVAILABLE \
+            else ("threads", ("serial", "threads"))
+        backend = get_backend(n_workers=self.num_cores, n_tasks=len(ticker_positions), default=default,
+                              supported=supported)
+        rich_print(f"Generating {len(feature_names)} TA-Lib features for {len(ticker_positions)} tickers "
+                   f"using {backend.n_workers} workers ({backend.name}).")
+        with backend:
+            # Input and output blocks are in shared memory for the process backend, so they are never pickled.
+            hlocv = backend.share(hlocv)
+            output = backend.empty((len(dataf), len(feature_names)), dtype=np.float32, fill_value=np.nan)
+            # Several chunks per worker to balance tickers with long and short histories
+            chunks = [chunk for chunk in np.array_split(np.arange(len(ticker_positions)), backend.n_workers * 4) if len(chunk)]
+            tasks = [([ticker_positions[i] for i in chunk], hlocv, output) for chunk in chunks]
+            backend.map(self._process_ticker_chunk, tasks, desc="Generating TA-Lib features", ordered=False)
+            output = backend.to_local(output)
+        dataf[feature_names] = output
         return dataf
 
     def transform(self, dataf: pd.DataFrame, *args, **kwargs) -> NumerFrame:
         return NumerFrame(self.get_all_features(dataf=dataf))
 
-    def _no_window(self, dataf: pd.DataFrame, func) -> pd.Series:
+    def _process_tickers(self, ticker_positions: List[np.ndarray], hlocv: np.ndarray, output: np.ndarray):
+        """ Compute all features for every ticker and write them to the rows of the ticker in output. """
+        for positions in ticker_positions:
+            inputs = dict(zip(self.hlocv_cols, hlocv[:, positions]))
+            columns = [self._no_window(inputs, func) for func in self.no_window_features]
+            columns += [self._window(inputs, func, win)
+                        for win in self.windows for func in dict.fromkeys(self.window_features)]
+            output[positions] = self.__bfill(np.column_stack(columns))
+
+    def _process_ticker_chunk(self, task: tuple) -> int:
+        """ Worker task. Processes a chunk of tickers with (shared) input and output blocks. """
+        ticker_positions, hlocv, output = task
+        self._process_tickers(ticker_positions, hlocv, output)
+        return len(ticker_positions)
+
+    def _no_window(self, inputs: dict, func) -> np.ndarray:
         from talib import abstract as tab
 
-        inputs = self.__get_inputs(dataf)
         if func in ["MACD"]:
             # MACD outputs tuple of 3 elements (value, signal and hist)
             return tab.Function(func)(inputs["close"])[0]
         else:
             return tab.Function(func)(inputs)
 
-    def _window(self, dataf: pd.DataFrame, func, window: int) -> pd.Series:
+    def _window(self, inputs: dict, func, window: int) -> np.ndarray:
         from talib import abstract as tab
 
-        inputs = self.__get_inputs(dataf)
         if func in ["ULTOSC"]:
             # ULTOSC requires 3 timeperiods as input
             return tab.Function(func)(
@@ -453,6 +1101,14 @@ class TalibFeatureGenerator(BaseProcessor):
     def __get_inputs(self, dataf: pd.DataFrame) -> dict:
         return {col: dataf[col].values.astype(np.float64) for col in self.hlocv_cols}
 
+    @staticmethod
+    def __bfill(values: np.ndarray) -> np.ndarray:
+        """ Backward fill missing values in every column. """
+        length = len(values)
+        positions = np.where(np.isnan(values), length - 1, np.arange(length)[:, None])
+        positions = np.minimum.accumulate(positions[::-1], axis=0)[::-1]
+        return np.take_along_axis(values, positions, axis=0)
+
     @staticmethod
     def __check_talib_import():
         try:
@@ -466,14 +1122,22 @@ class TalibFeatureGenerator(BaseProcessor):
 class KatsuFeatureGenerator(BaseProcessor):
     """
     Effective feature engineering setup based on Katsu's starter notebook.
-    Based on source by Katsu1110: https://www.kaggle.com/code1110/numeraisignals-starter-for-beginners
+    Based on source by Katsu1110: https://www.kaggle.com/code1110/numeraisignals-starter-for-beginners \n
+    Data is sorted once by ticker and date. Features for all tickers and windows are computed
+    on a (tickers x dates) array, so no DataFrame is created per ticker. \n
+    After every transform the state of each ticker (last closes and moving average states) is kept in `.state`.
+    `.update` uses this state to compute features only for newly added dates.
 
     :param windows: Time interval to apply for window features: \n
     1. Percentage Rate of change \n
     2. Volatility \n
     3. Moving Average gap \n
     :param ticker_col: Columns with tickers to iterate over. \n
-    :param close_col: Column name where you have closing price stored.
+    :param close_col: Column name where you have closing price stored. \n
+    :param date_col: Column to sort dates by within every ticker. Original order is kept if the column is not in the data. \n
+    :param num_cores: Not used. Kept for backwards compatibility. \n
+    :param dtype: Data type of generated features. \n
+    :param state: Ticker state from a previous run or path to .npz file created with .save_state.
     """
 
     warnings.filterwarnings("ignore")
@@ -484,103 +1148,429 @@ class KatsuFeatureGenerator(BaseProcessor):
         ticker_col: str = "ticker",
         close_col: str = "close",
         num_cores: int = None,
+        date_col: str = "date",
+        dtype=np.float32,
+        state: Union[Dict[str, np.ndarray], str, Path] = None,
     ):
         super().__init__()
         self.windows = windows
         self.ticker_col = ticker_col
         self.close_col = close_col
         self.num_cores = num_cores if num_cores else os.cpu_count()
+        self.date_col = date_col
+        self.dtype = dtype
+        self.state = self.load_state(state) if isinstance(state, (str, Path)) else state
+        # Closes needed to compute window features for a new date
+        self.context_length = max(self.windows) + 1
 
     @display_processor_info
     def transform(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
-        """Multiprocessing feature engineering."""
-        tickers = dataf.loc[:, self.ticker_col].unique().tolist()
+        """Vectorized feature engineering for all tickers."""
         rich_print(
-            f"Feature engineering for {len(tickers)} tickers using {self.num_cores} CPU cores."
+            f"Feature engineering for {dataf[self.ticker_col].nunique()} tickers."
         )
-        dataf_list = [
-            x
-            for _, x in tqdm(
-                dataf.groupby(self.ticker_col), desc="Generating ticker DataFrames"
-            )
-        ]
-        dataf = self._generate_features(dataf_list=dataf_list)
+        dataf = self.feature_engineering(dataf)
         return NumerFrame(dataf)
 
-    def feature_engineering(self, dataf: pd.DataFrame) -> pd.DataFrame:
-        """Feature engineering for single ticker."""
-        close_series = dataf.loc[:, self.close_col]
-        for x in self.windows:
-            dataf.loc[
-                :, f"feature_{self.close_col}_ROCP_{x}"
-            ] = close_series.pct_change(x)
-
-            dataf.loc[:, f"feature_{self.close_col}_VOL_{x}"] = (
-                np.log1p(close_series).pct_change().rolling(x).std()
-            )
+    @display_processor_info
+    def update(self, dataf: Union[pd.DataFrame, NumerFrame]) -> NumerFrame:
+        """
+        Compute features only for new dates. Continues from the state of the last transform or update.
+        Results are equal to a transform on the full history (up to floating point precision). \n
+        :param dataf: Data with dates after the last date of every ticker in state.
+        Tickers without state are computed from scratch.
+        """
+        assert self.state is not None, "No ticker state found. Run .transform on history or pass state first."
+        rich_print(
+            f"Updating features for {dataf[self.ticker_col].nunique()} tickers."
+        )
+        dataf = self.feature_engineering(dataf, state=self.state)
+        return NumerFrame(dataf)
 
-            dataf.loc[:, f"feature_{self.close_col}_MA_gap_{x}"] = (
-                close_series / close_series.rolling(x).mean()
-            )
+    def feature_engineering(self, dataf: pd.DataFrame, state: Dict[str, np.ndarray] = None) -> pd.DataFrame:
+        """
+        Feature engineering for all tickers at once. Stores state of every ticker in `.state`.
+        Returns data sorted by ticker and date. Rows without ticker are dropped. \n
+        :param dataf: Price data. \n
+        :param state: Ticker state to continue from. Computes features from scratch by default.
+        """
+        codes, tickers = pd.factorize(dataf[self.ticker_col], sort=True)
+        has_dates = self.date_col in dataf.columns
+        if has_dates:
+            order = np.lexsort((dataf[self.date_col].values, codes))
+        else:
+            order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        dataf = dataf.iloc[order].copy()
+        codes = codes[order]
+        # Position of every row in the (tickers x dates) array. New dates follow the context of previous closes.
+        counts = np.bincount(codes, minlength=len(tickers))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        context = self.context_length if state is not None else 0
+        steps = context + np.arange(len(codes)) - starts[codes]
+        close = np.full((len(tickers), context + (counts.max() if len(counts) else 0)), np.nan)
+        close[codes, steps] = dataf[self.close_col].values
+        filled_close = close.copy()
+        ewm_states = {}
+        if state is not None:
+            assert list(state["windows"]) == list(self.windows), \
+                f"State was created for windows {list(state['windows'])}, not {self.windows}."
+            rows = pd.Index(state["tickers"]).get_indexer(np.asarray(tickers, dtype=str))
+            known = rows >= 0
+            if has_dates and "last_date" in state and known.any():
+                first_dates = dataf[self.date_col].values[starts[known]]
+                assert (first_dates > state["last_date"][rows[known]]).all(), \
+                    "Data contains dates that are already in state. Pass only new dates to update."
+            close[known, :context] = state["close"][rows[known]]
+            filled_close[known, :context] = state["filled_close"][rows[known]]
+            for name in ["gain", "loss", "exp1", "exp2", "signal"]:
+                ewm_states[name] = np.zeros((len(tickers), 3))
+                ewm_states[name][known] = state[name][rows[known]]
+        padding = np.arange(close.shape[1]) >= (context + counts)[:, None]
+
+        features = {}
+        filled_close = self.__ffill(filled_close)
+        log_close = np.log1p(filled_close)
+        log_returns = self.__pct_change(log_close, 1)
+        for x in self.windows:
+            features[f"feature_{self.close_col}_ROCP_{x}"] = self.__pct_change(filled_close, x)[:, context:]
+            features[f"feature_{self.close_col}_VOL_{x}"] = self.__rolling(log_returns, x, std=True)[:, context:]
+            features[f"feature_{self.close_col}_MA_gap_{x}"] = (close / self.__rolling(close, x))[:, context:]
+        features["feature_RSI"] = self._rsi(close, counts, ewm_states, context=context)
+        features["feature_MACD"], features["feature_MACD_signal"] = self._macd(close[:, context:], counts, ewm_states)
+        for name, values in features.items():
+            # Values after the last date of a ticker should not be backward filled
+            values[padding[:, context:]] = np.nan
+            dataf[name] = self.__bfill(values)[codes, steps - context].astype(self.dtype)
+
+        # Keep last closes of every ticker for the next update
+        last_positions = (context + counts)[:, None] - self.context_length + np.arange(self.context_length)
+        new_state = {"windows": np.asarray(self.windows), "tickers": np.asarray(tickers, dtype=str),
+                     "close": self.__take_positions(close, last_positions),
+                     "filled_close": self.__take_positions(filled_close, last_positions), **ewm_states}
+        if has_dates:
+            dates = dataf[self.date_col].values
+            new_state["last_date"] = dates[starts + counts - 1].astype(str) if dates.dtype == object else dates[starts + counts - 1]
+        if state is not None:
+            new_state = self.__merge_states(state, new_state)
+        self.state = new_state
+        return dataf
 
-        dataf.loc[:, "feature_RSI"] = self._rsi(close_series)
-        macd, macd_signal = self._macd(close_series)
-        dataf.loc[:, "feature_MACD"] = macd
-        dataf.loc[:, "feature_MACD_signal"] = macd_signal
-        return dataf.bfill()
-
-    def _generate_features(self, dataf_list: list) -> pd.DataFrame:
-        """Add features for list of ticker DataFrames and concatenate."""
-        with Pool(self.num_cores) as p:
-            feature_datafs = list(
-                tqdm(
-                    p.imap(self.feature_engineering, dataf_list),
-                    desc="Generating features",
-                    total=len(dataf_list),
-                )
-            )
-        return pd.concat(feature_datafs)
+    def save_state(self, file_path: Union[str, Path]):
+        """
+        Save ticker state to compressed .npz file. \n
+        :param file_path: Path to output .npz file.
+        """
+        assert self.state is not None, "No ticker state to save. Run .transform first."
+        np.savez_compressed(file_path, **self.state)
 
     @staticmethod
-    def _rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    def load_state(file_path: Union[str, Path]) -> Dict[str, np.ndarray]:
+        """
+        Load ticker state from .npz file. \n
+        :param file_path: Path to .npz file created with .save_state.
+        """
+        assert Path(file_path).is_file(), f"Ticker state '{file_path}' not found."
+        with np.load(file_path) as state:
+            return {key: state[key] for key in state.files}
+
+    @classmethod
+    def _rsi(cls, close: np.ndarray, lengths: np.ndarray, states: dict, period: int = 14, context: int = 0) -> np.ndarray:
         """
+        RSI for every row of (tickers x dates) array. Starts after context and updates states in place.
         See source https://github.com/peerchemist/finta
         and fix https://www.tradingview.com/wiki/Talk:Relative_Strength_Index_(RSI)
         """
-        delta = close.diff()
-        up, down = delta.copy(), delta.copy()
-        up[up < 0] = 0
-        down[down > 0] = 0
-
-        gain = up.ewm(com=(period - 1), min_periods=period).mean()
-        loss = down.abs().ewm(com=(period - 1), min_periods=period).mean()
-
-        rs = gain / loss
-        return pd.Series(100 - (100 / (1 + rs)))
-
-    def _macd(
-        self, close: pd.Series, span1=12, span2=26, span3=9
-    ) -> Tuple[pd.Series, pd.Series]:
-        """Compute MACD and MACD signal."""
-        exp1 = self.__ema1(close, span1)
-        exp2 = self.__ema1(close, span2)
-        macd = 100 * (exp1 - exp2) / exp2
-        signal = self.__ema1(macd, span3)
+        delta = np.full(close.shape, np.nan)
+        delta[:, 1:] = np.diff(close, axis=1)
+        delta = delta[:, context:]
+        # NaN deltas stay NaN
+        up = np.where(delta < 0, 0, delta)
+        down = np.abs(np.where(delta > 0, 0, delta))
+        gain = cls.__ewm_mean(up, 1 / period, lengths, states, "gain", min_periods=period)
+        loss = cls.__ewm_mean(down, 1 / period, lengths, states, "loss", min_periods=period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = gain / loss
+            return 100 - (100 / (1 + rs))
+
+    @classmethod
+    def _macd(cls, close: np.ndarray, lengths: np.ndarray, states: dict,
+              span1=12, span2=26, span3=9) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute MACD and MACD signal for every row of (tickers x dates) array. Updates states in place."""
+        exp1 = cls.__ewm_mean(close, 2 / (span1 + 1), lengths, states, "exp1")
+        exp2 = cls.__ewm_mean(close, 2 / (span2 + 1), lengths, states, "exp2")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            macd = 100 * (exp1 - exp2) / exp2
+        signal = cls.__ewm_mean(macd, 2 / (span3 + 1), lengths, states, "signal")
         return macd, signal
 
     @staticmethod
-    def __ema1(series: pd.Series, span: int) -> pd.Series:
-        """Exponential moving average"""
-        a = 2 / (span + 1)
-        return series.ewm(alpha=a).mean()
+    def __ewm_mean(values: np.ndarray, alpha: float, lengths: np.ndarray, states: dict, name: str,
+                   min_periods: int = 0) -> np.ndarray:
+        """
+        Exponentially weighted mean along rows (same as pd.Series.ewm(alpha=alpha, min_periods=min_periods).mean()).
+        Weighted sums are computed with a linear filter. \n
+        States hold the weighted sum, sum of weights and number of observations of every row.
+        The filter starts from states[name] if available and states[name] is set to the values at the last position (lengths - 1).
+        """
+        observed = ~np.isnan(values)
+        decay = [1, alpha - 1]
+        state = states.get(name, np.zeros((len(values), 3)))
+        weighted_sum, _ = lfilter([1], decay, np.where(observed, values, 0), axis=1, zi=(1 - alpha) * state[:, :1])
+        weights, _ = lfilter([1], decay, observed.astype(np.float64), axis=1, zi=(1 - alpha) * state[:, 1:2])
+        n_observed = np.cumsum(observed, axis=1) + state[:, 2:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = weighted_sum / weights
+        if min_periods:
+            mean[n_observed < min_periods] = np.nan
+        last = np.maximum(lengths - 1, 0)[:, None]
+        new_state = np.hstack([np.take_along_axis(x, last, axis=1) if x.shape[1] else np.zeros((len(x), 1))
+                               for x in [weighted_sum, weights, n_observed]])
+        states[name] = np.where((lengths > 0)[:, None], new_state, state)
+        return mean
+
+    @staticmethod
+    def __rolling(values: np.ndarray, window: int, std: bool = False) -> np.ndarray:
+        """
+        Rolling mean (or standard deviation) along rows from cumulative sums.
+        NaN if window is incomplete or contains missing values (same as pandas rolling).
+        """
+        def window_sum(x: np.ndarray) -> np.ndarray:
+            cumsum = np.cumsum(x, axis=1)
+            cumsum[:, window:] -= cumsum[:, :-window].copy()
+            return cumsum
+
+        observed = ~np.isnan(values)
+        complete = window_sum(observed.astype(np.int64)) == window
+        # Center rows to limit floating point error in cumulative sums
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            center = np.nan_to_num(np.nanmean(values, axis=1, keepdims=True))
+        centered = np.where(observed, values - center, 0)
+        sums = window_sum(centered)
+        if std:
+            variance = (window_sum(centered ** 2) - sums ** 2 / window) / (window - 1)
+            result = np.sqrt(np.maximum(variance, 0))
+        else:
+            result = sums / window + center
+        result[~complete] = np.nan
+        return result
+
+    @staticmethod
+    def __pct_change(values: np.ndarray, periods: int) -> np.ndarray:
+        """ Percentage change along rows over number of periods. """
+        result = np.full(values.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[:, periods:] = values[:, periods:] / values[:, :-periods] - 1
+        return result
+
+    @staticmethod
+    def __ffill(values: np.ndarray) -> np.ndarray:
+        """ Forward fill missing values along rows. """
+        positions = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+        np.maximum.accumulate(positions, axis=1, out=positions)
+        return np.take_along_axis(values, positions, axis=1)
+
+    @staticmethod
+    def __bfill(values: np.ndarray) -> np.ndarray:
+        """ Backward fill missing values along rows. """
+        length = values.shape[1]
+        positions = np.where(np.isnan(values), length - 1, np.arange(length))
+        positions = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1]
+        return np.take_along_axis(values, positions, axis=1)
+
+    @staticmethod
+    def __take_positions(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """ Values at positions for every row. NaN for negative positions. """
+        taken = np.take_along_axis(values, np.maximum(positions, 0), axis=1) if values.shape[1] else \
+            np.full(positions.shape, np.nan)
+        taken[positions < 0] = np.nan
+        return taken
+
+    @staticmethod
+    def __merge_states(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """ Add state of tickers that were not updated to new state. Result is sorted by ticker. """
+        keep = ~np.isin(old["tickers"], new["tickers"])
+        order = np.argsort(np.concatenate([new["tickers"], old["tickers"][keep]]), kind="stable")
+        return {key: new[key] if key == "windows" else np.concatenate([new[key], old[key][keep]])[order]
+                for key in new if key == "windows" or key in old}
+
+# Cell
+def quantile_per_era(values: Union[np.ndarray, pd.DataFrame, pd.Series],
+                     era_index: Dict[Any, Union[slice, np.ndarray]] = None,
+                     num_quantiles: int = 50, num_cores: int = None, dtype=np.float32) -> np.ndarray:
+    """
+    Uniform quantile transform of all columns within every era. \n
+    :param values: 1D or 2D (rows x columns) values to transform. NaNs are ignored and kept. \n
+    :param era_index: Mapping of eras to row positions (see create_era_index and NumerFrame.era_index).
+    Transforms over all rows if not given. \n
+    :param num_quantiles: Number of quantiles per era (capped at number of rows in era). \n
+    :param num_cores: Number of workers to split columns over.
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`). \n
+    :param dtype: Data type of output array.
+    """
+    values = np.asarray(values)
+    is_1d = values.ndim == 1
+    values = values.reshape(len(values), -1)
+    segments = list(era_index.values()) if era_index is not None else [slice(0, len(values))]
+    # Workers write into output, which needs shared memory for the process backend
+    supported = ("serial", "threads", "processes") if SHARED_MEMORY_AVAILABLE else ("serial", "threads")
+    backend = get_backend(n_workers=num_cores, n_tasks=values.shape[1], supported=supported)
+    bounds = np.linspace(0, values.shape[1], backend.n_workers + 1).astype(int)
+    with backend:
+        # Shared memory for the process backend. Threads and serial work on the arrays directly.
+        shared_values = backend.share(values)
+        output = backend.empty(values.shape, dtype=dtype, fill_value=np.nan)
+        backend.map(_quantile_columns, [(shared_values[:, start:stop], output[:, start:stop], segments, num_quantiles)
+                                        for start, stop in zip(bounds[:-1], bounds[1:])])
+        output = backend.to_local(output)
+    return output[:, 0] if is_1d else output
+
+
+def _quantile_columns(task: tuple):
+    """ Quantile transform a block of columns (values, output) within every era. """
+    values, output, segments, num_quantiles = task
+    for positions in segments:
+        segment = values[positions]
+        if len(segment):
+            output[positions] = _quantile_segment(segment, num_quantiles)
+
+
+def quantile_edges(values: Union[np.ndarray, pd.DataFrame],
+                   era_index: Dict[Any, Union[slice, np.ndarray]] = None,
+                   num_quantiles: int = 50, max_elements: int = 2**25) -> np.ndarray:
+    """
+    Learn quantile edges for every column that can be applied to new data with `apply_quantile_edges`. \n
+    :param values: 2D (rows x columns) training values. NaNs are ignored. \n
+    :param era_index: Mapping of eras to row positions. If given, edges are the mean of the quantiles of every era.
+    Otherwise edges are the quantiles over all rows. \n
+    :param num_quantiles: Number of quantile edges per column. \n
+    :param max_elements: Maximum number of values to sort at once. Columns are processed in chunks to bound memory. \n
+    :return: Array of shape (columns x num_quantiles).
+    """
+    values = np.asarray(values)
+    values = values.reshape(len(values), -1)
+    edges = np.full((values.shape[1], num_quantiles), np.nan)
+    segments = list(era_index.values()) if era_index is not None else [slice(0, len(values))]
+    chunk_size = max(1, max_elements // max(len(values), 1))
+    with warnings.catch_warnings():
+        # All NaN columns or eras give NaN edges
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, values.shape[1], chunk_size):
+            cols = slice(start, start + chunk_size)
+            era_quantiles = [_segment_quantiles(np.ascontiguousarray(values[positions, cols].T, dtype=np.float64),
+                                                num_quantiles)[0]
+                             for positions in segments]
+            edges[cols] = np.nanmean(era_quantiles, axis=0)
+    return edges
+
+
+def apply_quantile_edges(values: Union[np.ndarray, pd.DataFrame, pd.Series],
+                         edges: Union[np.ndarray, List[np.ndarray]], dtype=np.float32) -> np.ndarray:
+    """
+    Uniform quantile transform of new data with learned quantile edges (same as QuantileTransformer.transform).
+    Only does a binary search per value so cost does not depend on the size of the training data. \n
+    :param values: 1D or 2D (rows x columns) values to transform. NaNs are kept. \n
+    :param edges: Sorted quantile edges for every column (see `quantile_edges`). \n
+    :param dtype: Data type of output array.
+    """
+    values = np.asarray(values)
+    is_1d = values.ndim == 1
+    values = values.reshape(len(values), -1)
+    assert len(edges) == values.shape[1], f"Got {len(edges)} quantile edges for {values.shape[1]} columns."
+    output = np.empty(values.shape, dtype=dtype)
+    for col, quantiles in enumerate(edges):
+        x = values[:, col].astype(np.float64)
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        nq = len(quantiles)
+        below = np.searchsorted(quantiles, x, side="left")
+        at_or_below = np.searchsorted(quantiles, x, side="right")
+        previous_q = quantiles[np.clip(at_or_below - 1, 0, nq - 1)]
+        next_q = quantiles[np.minimum(at_or_below, nq - 1)]
+        result = _interpolate_quantiles(x, below, at_or_below, previous_q, next_q, quantiles[0], quantiles[-1], nq)
+        result[np.isnan(x)] = np.nan
+        output[:, col] = result
+    return output[:, 0] if is_1d else output
+
+
+def _segment_quantiles(values: np.ndarray, nq: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Quantiles of every row of a 2D array with linear interpolation (same as np.nanpercentile) and NaN mask. """
+    n = values.shape[1]
+    is_nan = np.isnan(values)
+    # NaNs are sorted last
+    sorted_values = np.sort(values, axis=1)
+    counts = n - is_nan.sum(axis=1, keepdims=True)
+    virtual = np.linspace(0, 1, nq) * (np.maximum(counts, 1) - 1)
+    floor = np.floor(virtual).astype(np.int64)
+    weight = virtual - floor
+    below = np.take_along_axis(sorted_values, floor, axis=1)
+    above = np.take_along_axis(sorted_values, np.minimum(floor + 1, np.maximum(counts - 1, 0)), axis=1)
+    quantiles = np.where(weight >= 0.5, above - (above - below) * (1 - weight), below + (above - below) * weight)
+    return np.maximum.accumulate(quantiles, axis=1), is_nan
+
+
+def _interpolate_quantiles(values, below, at_or_below, previous_q, next_q, first_q, last_q, nq: int) -> np.ndarray:
+    """
+    Map values to [0, 1] from the number of quantiles below and at or below every value
+    and the quantiles surrounding it (same as QuantileTransformer). nq is the number of quantiles.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = at_or_below - 1 + (values - previous_q) / (next_q - previous_q)
+    # Values equal to quantiles get the mean of all matching references
+    result = np.where(at_or_below > below, (below + at_or_below - 1) / 2, between) / max(nq - 1, 1)
+    result[values >= last_q] = 1
+    result[values <= first_q] = 0
+    return result
+
+
+def _quantile_segment(segment: np.ndarray, num_quantiles: int) -> np.ndarray:
+    """ Quantile transform every column of a 2D array. Columns are sorted as contiguous rows. """
+    values = np.ascontiguousarray(segment.T, dtype=np.float64)
+    nq = max(1, min(num_quantiles, values.shape[1]))
+    quantiles, is_nan = _segment_quantiles(values, nq)
+
+    # Sort quantiles together with values so that every value sees which quantiles surround it
+    merged = np.concatenate([quantiles, values], axis=1)
+    order = np.argsort(merged, axis=1)
+    sorted_merged = np.take_along_axis(merged, order, axis=1)
+    is_quantile = order < nq
+    upto = np.cumsum(is_quantile, axis=1)
+    new_group = np.empty(merged.shape, dtype=bool)
+    new_group[:, 0] = True
+    np.not_equal(sorted_merged[:, 1:], sorted_merged[:, :-1], out=new_group[:, 1:])
+    end_group = np.empty(merged.shape, dtype=bool)
+    end_group[:, -1] = True
+    end_group[:, :-1] = new_group[:, 1:]
+    below = np.maximum.accumulate(np.where(new_group, upto - is_quantile, 0), axis=1)
+    at_or_below = np.minimum.accumulate(np.where(end_group, upto, nq)[:, ::-1], axis=1)[:, ::-1]
+    previous_q = np.maximum.accumulate(np.where(is_quantile, sorted_merged, -np.inf), axis=1)
+    next_q = np.minimum.accumulate(np.where(is_quantile, sorted_merged, np.inf)[:, ::-1], axis=1)[:, ::-1]
+    sorted_result = _interpolate_quantiles(sorted_merged, below, at_or_below, previous_q, next_q,
+                                           quantiles[:, :1], quantiles[:, -1:], nq)
+    result = np.empty(merged.shape)
+    np.put_along_axis(result, order, sorted_result, axis=1)
+    result = result[:, nq:]
+    result[is_nan] = np.nan
+    return result.T
 
 # Cell
 class EraQuantileProcessor(BaseProcessor):
     """
-    Transform features into quantiles on a per-era basis
+    Transform features into quantiles on a per-era basis. \n
+    All features are quantiled in one vectorized pass over the eras (see `quantile_per_era`).
+    Output is equal to fitting a `QuantileTransformer` per era and feature for eras up to 10000 rows.
+    For larger eras quantiles are computed on all rows instead of a random subsample. \n
+    Alternatively, quantile edges can be learned once on training data with `.fit` (or loaded from a file).
+    Transform then only has to look up every value in the stored edges, which is useful for live data that contains a single era.
 
     :param num_quantiles: Number of buckets to split data into: \n
     :param era_col: Era column name in the dataframe to perform each transformation \n
+    :param features: Features to quantile. All features in NumerFrame by default. \n
+    :param num_cores: Number of workers to split feature columns over.
+    Uses the global parallel configuration by default (see `numerblox.misc.set_parallel_config`). \n
+    :param dtype: Data type of quantile features. \n
+    :param quantile_edges: Mapping of features to learned quantile edges or path to .npz file created with .save_edges.
+    If given, transform uses these edges instead of quantiles per era.
     """
 
     def __init__(
@@ -589,43 +1579,76 @@ class EraQuantileProcessor(BaseProcessor):
         era_col: str = "friday_date",
         features: list = None,
         num_cores: int = None,
+        dtype=np.float32,
+        quantile_edges: Union[Dict[str, np.ndarray], str, Path] = None,
     ):
         super().__init__()
         self.num_quantiles = num_quantiles
         self.era_col = era_col
-        self.num_cores = num_cores if num_cores else os.cpu_count()
+        self.num_cores = num_cores
         self.features = features
+        self.dtype = dtype
+        self.quantile_edges = self.load_edges(quantile_edges) if isinstance(quantile_edges, (str, Path)) else quantile_edges
+        if self.quantile_edges is not None and self.features is None:
+            self.features = list(self.quantile_edges.keys())
 
-    def _process_eras(self, groupby_object):
-        quantizer = QuantileTransformer(n_quantiles=self.num_quantiles, random_state=0)
-        qt = lambda x: quantizer.fit_transform(x.values.reshape(-1, 1)).ravel()
+    def fit(self, dataf: Union[pd.DataFrame, NumerFrame], window: int = None) -> "EraQuantileProcessor":
+        """
+        Learn quantile edges for every feature from training data. \n
+        :param dataf: Training data. \n
+        :param window: Learn edges as the mean of quantiles in the last window eras.
+        By default edges are quantiles over all rows.
+        """
+        self.features = self.features if self.features else dataf.feature_cols
+        era_index = None
+        if window is not None:
+            full_index = create_era_index(dataf[self.era_col])
+            era_index = {era: full_index[era] for era in sorted(full_index)[-window:]}
+        edges = quantile_edges(dataf[self.features].values, era_index=era_index, num_quantiles=self.num_quantiles)
+        self.quantile_edges = dict(zip(self.features, edges))
+        return self
+
+    def save_edges(self, file_path: Union[str, Path]):
+        """
+        Save learned quantile edges to compressed .npz file. \n
+        :param file_path: Path to output .npz file.
+        """
+        assert self.quantile_edges is not None, "No quantile edges to save. Run .fit first."
+        np.savez_compressed(file_path, **self.quantile_edges)
 
-        column = groupby_object.transform(qt)
-        return column
+    @staticmethod
+    def load_edges(file_path: Union[str, Path]) -> Dict[str, np.ndarray]:
+        """
+        Load quantile edges from .npz file. \n
+        :param file_path: Path to .npz file created with .save_edges.
+        """
+        assert Path(file_path).is_file(), f"Quantile edges '{file_path}' not found."
+        with np.load(file_path) as edges:
+            return {feature: edges[feature] for feature in edges.files}
 
     @display_processor_info
     def transform(
         self,
         dataf: Union[pd.DataFrame, NumerFrame],
     ) -> NumerFrame:
-        """Multiprocessing quantile transforms by era."""
+        """Vectorized quantile transforms by era or with learned quantile edges."""
         self.features = self.features if self.features else dataf.feature_cols
-        rich_print(
-            f"Quantiling for {len(self.features)} features using {self.num_cores} CPU cores."
-        )
-
-        date_groups = dataf.groupby(self.era_col)
-        groupby_objects = [date_groups[feature] for feature in self.features]
-
-        with Pool() as p:
-            results = list(
-                tqdm(
-                    p.imap(self._process_eras, groupby_objects),
-                    total=len(groupby_objects),
-                )
+        if self.quantile_edges is not None:
+            missing = [feature for feature in self.features if feature not in self.quantile_edges]
+            assert not missing, f"No quantile edges for features: {missing}. Run .fit on these features."
+            rich_print(f"Quantiling for {len(self.features)} features using learned quantile edges.")
+            quantiles = apply_quantile_edges(dataf[self.features].values,
+                                             [self.quantile_edges[feature] for feature in self.features],
+                                             dtype=self.dtype)
+        else:
+            backend = get_backend(n_workers=self.num_cores, n_tasks=len(self.features))
+            rich_print(
+                f"Quantiling for {len(self.features)} features using {backend.n_workers} workers ({backend.name})."
             )
-
-        quantiles = pd.concat(results, axis=1)
+            era_index = create_era_index(dataf[self.era_col])
+            quantiles = quantile_per_era(dataf[self.features].values, era_index=era_index,
+                                         num_quantiles=self.num_quantiles, num_cores=self.num_cores,
+                                         dtype=self.dtype)
         dataf[[f"{feature}_quantile" for feature in self.features]] = quantiles
         return NumerFrame(dataf)
 
@@ -17,11 +17,11 @@ from typeguard import typechecked
 from string import ascii_uppercase
 from rich import print as rich_print
 from numerapi import NumerAPI, SignalsAPI
-from numerbay import NumerBay
 from dateutil.relativedelta import relativedelta, FR
 
 from .download import BaseIO
 from .key import Key
+from .numerframe import create_era_index, rank_per_era
 
 # Cell
 @typechecked
@@ -122,8 +122,15 @@ class BaseSubmitter(BaseIO):
                            inplace=True)
         # Combine all numeric columns with rank mean
         num_dataf = final_dataf.select_dtypes(include=np.number)
-        num_dataf = num_dataf.groupby(era_col) if era_col else num_dataf
-        final_dataf[pred_col] = num_dataf.rank(pct=True, method="first").mean(axis=1)
+        era_index = None
+        if era_col:
+            if era_col in num_dataf.columns:
+                eras = num_dataf.pop(era_col)
+            else:
+                eras = num_dataf.index.get_level_values(era_col)
+            era_index = create_era_index(eras)
+        ranks = rank_per_era(num_dataf.values, era_index, method="first", pct=True)
+        final_dataf[pred_col] = pd.DataFrame(ranks, index=num_dataf.index).mean(axis=1)
         return final_dataf[[pred_col]]
 
     def _get_model_id(self, model_name: str) -> str:
@@ -301,6 +308,7 @@ class NumerBaySubmitter(BaseSubmitter):
         super().__init__(
             directory_path=str(tournament_submitter.dir), api=tournament_submitter.api
         )
+        from numerbay import NumerBay
         self.numerbay_api = NumerBay(username=numerbay_username, password=numerbay_password)
         self.tournament_submitter = tournament_submitter
         self.upload_to_numerai = upload_to_numerai